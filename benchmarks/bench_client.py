@@ -0,0 +1,172 @@
+'''
+Measures houndipy's own throughput, CPU use and latency against a mock
+Houndify server on localhost, in sync, batch, streaming and async modes.
+
+    python benchmarks/bench_client.py [--requests 2000] [--concurrency 8]
+
+The server runs in a separate process, so the CPU time reported is the
+client's alone.
+'''
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+
+from houndipy import Client
+from houndipy.batch import aimap_ordered, imap_ordered
+from houndipy.testing import MOCK_CLIENT_ID, MOCK_CLIENT_KEY
+
+try:
+    from houndipy.aio import AsyncClient
+except ImportError:
+    AsyncClient = None
+
+AUDIO = b'\0' * 32000
+
+
+def start_server(*args):
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'houndipy.testing'] + list(args),
+        stdout=subprocess.PIPE
+    )
+    return proc, proc.stdout.readline().decode().strip()
+
+
+def timed(func):
+    latencies = []
+
+    def call(*args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        latencies.append(time.perf_counter() - start)
+        return result
+
+    call.latencies = latencies
+    return call
+
+
+def atimed(func):
+    latencies = []
+
+    async def call(*args, **kwargs):
+        start = time.perf_counter()
+        result = await func(*args, **kwargs)
+        latencies.append(time.perf_counter() - start)
+        return result
+
+    call.latencies = latencies
+    return call
+
+
+def percentile(latencies, q):
+    latencies = sorted(latencies)
+    return latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+
+
+def report(name, number, wall, cpu, latencies):
+    print('{:<12} {:>9.0f} {:>12.1f} {:>9.2f} {:>9.2f} {:>9.2f}'.format(
+        name,
+        number / wall,
+        cpu / number * 1e6,
+        percentile(latencies, 0.5) * 1e3,
+        percentile(latencies, 0.9) * 1e3,
+        percentile(latencies, 0.99) * 1e3,
+    ))
+
+
+def bench(name, number, run):
+    wall, cpu = time.perf_counter(), time.process_time()
+    latencies = run()
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    report(name, number, wall, cpu, latencies)
+
+
+def bench_sync(client, number):
+    text = timed(client.text)
+    for i in range(number):
+        text(str(i))
+    return text.latencies
+
+
+def bench_batch(client, number, concurrency):
+    text = timed(client.text)
+    for result in imap_ordered(text, map(str, range(number)), concurrency):
+        result.response
+    return text.latencies
+
+
+def bench_speech(client, number):
+    speech = timed(client.speech)
+    for _ in range(number):
+        speech(AUDIO)
+    return speech.latencies
+
+
+def bench_stream(client, number):
+    @timed
+    def stream(audio):
+        for event in client.stream_speech(audio):
+            pass
+
+    for _ in range(number):
+        stream(AUDIO)
+    return stream.latencies
+
+
+def bench_async(url, number, concurrency):
+    async def run():
+        async with AsyncClient(
+            MOCK_CLIENT_ID, MOCK_CLIENT_KEY, base_url=url
+        ) as client:
+            text = atimed(client.text)
+            async for result in aimap_ordered(
+                text, map(str, range(number)), concurrency
+            ):
+                result.response
+            return text.latencies
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+    number, concurrency = args.requests, args.concurrency
+
+    proc, url = start_server(
+        '--partial-transcript', 'what', '--partial-transcript', 'what time'
+    )
+    try:
+        client = Client(
+            MOCK_CLIENT_ID, MOCK_CLIENT_KEY, base_url=url,
+            pool_maxsize=concurrency
+        )
+        # open connections and fill caches before timing anything
+        bench_batch(client, concurrency * 4, concurrency)
+
+        print('{:<12} {:>9} {:>12} {:>9} {:>9} {:>9}'.format(
+            'mode', 'req/s', 'cpu us/req', 'p50 ms', 'p90 ms', 'p99 ms'
+        ))
+        bench('sync', number, lambda: bench_sync(client, number))
+        bench(
+            'batch', number,
+            lambda: bench_batch(client, number, concurrency)
+        )
+        bench('speech', number, lambda: bench_speech(client, number))
+        bench('stream', number, lambda: bench_stream(client, number))
+        if AsyncClient is not None:
+            bench(
+                'async', number,
+                lambda: bench_async(url, number, concurrency * 8)
+            )
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+'''
+Times parsing a Houndify response, and encoding and decoding stored
+ConversationState, with each JSON backend that is installed.
+
+    python benchmarks/bench_codec.py [--number 20000]
+'''
+import argparse
+import timeit
+
+from houndipy import codec
+from houndipy.response import HoundResponse
+from houndipy.store import pack, unpack
+from houndipy.streaming import iter_events
+from houndipy.testing import DEFAULT_RESPONSE
+
+# a response the size of a typical informational answer
+RESPONSE = dict(DEFAULT_RESPONSE, AllResults=[
+    dict(
+        DEFAULT_RESPONSE['AllResults'][0],
+        NativeData={'Items': [
+            {'Title': 'Item {}'.format(i), 'Score': i / 7, 'Tags': ['a', 'b']}
+            for i in range(40)
+        ]},
+        ConversationState={
+            'ConversationStateTime': 1700000000,
+            'History': ['turn {}'.format(i) for i in range(20)],
+        },
+    )
+])
+BODY = codec.dumps(RESPONSE).encode()
+STATE = RESPONSE['AllResults'][0]['ConversationState']
+
+
+def parse():
+    HoundResponse(None, BODY).json()
+
+
+def stream():
+    list(iter_events([BODY]))
+
+
+def store():
+    unpack(pack(STATE))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args()
+
+    print('{} byte response'.format(len(BODY)))
+    print('{:<8} {:>10} {:>10} {:>10}'.format(
+        'backend', 'parse us', 'stream us', 'store us'
+    ))
+    for backend in codec.available():
+        codec.use(backend)
+        print('{:<8} {:>10.1f} {:>10.1f} {:>10.1f}'.format(backend, *(
+            min(timeit.repeat(func, number=args.number, repeat=3))
+            / args.number * 1e6
+            for func in (parse, stream, store)
+        )))
+
+
+if __name__ == '__main__':
+    main()
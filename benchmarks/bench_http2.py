@@ -0,0 +1,111 @@
+'''
+Compares the HTTP/2 transport with the default HTTP/1.1 adapter, sending
+concurrent text queries to mock Houndify servers on localhost which take
+`--delay` seconds to answer each.
+
+    python benchmarks/bench_http2.py [--requests 2000] [--concurrency 64]
+
+Each transport is run in a fresh process, so that peak RSS is its own.
+Sockets are those left open to the server at the end of the run.
+'''
+import os
+import time
+import argparse
+import resource
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from houndipy import Client
+from houndipy.batch import imap_ordered
+from houndipy.testing import MOCK_CLIENT_ID, MOCK_CLIENT_KEY
+
+from bench_client import percentile, start_server, timed
+
+
+def open_sockets():
+    try:
+        fds = os.listdir('/proc/self/fd')
+    except OSError:
+        return None
+
+    sockets = 0
+    for fd in fds:
+        try:
+            sockets += os.readlink('/proc/self/fd/' + fd).startswith('socket:')
+        except OSError:
+            pass
+    return sockets
+
+
+def run(url, http2, number, concurrency):
+    before = open_sockets()
+    kwargs = {'http2': True, 'prior_knowledge': True} if http2 else {}
+    client = Client(
+        MOCK_CLIENT_ID, MOCK_CLIENT_KEY, base_url=url,
+        pool_maxsize=concurrency, **kwargs
+    )
+    text = timed(lambda i: client.text(str(i)))
+    # open connections before timing anything
+    for result in imap_ordered(text, range(concurrency), concurrency):
+        result.response
+    del text.latencies[:]
+
+    start, cpu = time.perf_counter(), time.process_time()
+    for result in imap_ordered(text, range(number), concurrency):
+        result.response
+    wall = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+
+    after = open_sockets()
+    sockets = None if before is None else after - before
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return wall, cpu, text.latencies, sockets, maxrss
+
+
+def report(name, number, wall, cpu, latencies, sockets, maxrss):
+    print('{:<8} {:>9.0f} {:>12.1f} {:>8} {:>9.1f} {:>9.2f} {:>9.2f} '
+          '{:>9.2f}'.format(
+        name,
+        number / wall,
+        cpu / number * 1e6,
+        '-' if sockets is None else sockets,
+        # kilobytes on linux
+        maxrss / 1024,
+        percentile(latencies, 0.5) * 1e3,
+        percentile(latencies, 0.9) * 1e3,
+        percentile(latencies, 0.99) * 1e3,
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--delay', type=float, default=0.02)
+    args = parser.parse_args()
+    number, concurrency = args.requests, args.concurrency
+
+    delay = ['--delay', str(args.delay)]
+    servers = [start_server(*delay), start_server('--http2', *delay)]
+    context = multiprocessing.get_context('spawn')
+    try:
+        print('{:<8} {:>9} {:>12} {:>8} {:>9} {:>9} {:>9} {:>9}'.format(
+            'mode', 'req/s', 'cpu us/req', 'sockets', 'rss MiB', 'p50 ms',
+            'p90 ms', 'p99 ms'
+        ))
+        for name, (_, url), http2 in zip(
+            ('http/1.1', 'http/2'), servers, (False, True)
+        ):
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                result = executor.submit(
+                    run, url, http2, number, concurrency
+                ).result()
+            report(name, number, *result)
+    finally:
+        for proc, _ in servers:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+'''
+Times importing houndipy, and the parts of it most programs use, each in
+a fresh interpreter.
+
+    python benchmarks/bench_import.py [--number 20]
+
+The time for the interpreter to start and exit without importing
+anything is measured too, and taken off the others.
+'''
+import sys
+import time
+import argparse
+import subprocess
+
+STATEMENTS = [
+    'import houndipy',
+    'from houndipy import Client',
+    'from houndipy import Client; Client("id", "a2V5").text',
+    'from houndipy.aio import AsyncClient',
+    'from houndipy.request_info import validate_request_info as v; v({})',
+]
+
+
+def timed(statement, number):
+    times = []
+    for _ in range(number):
+        start = time.perf_counter()
+        subprocess.check_call([sys.executable, '-c', statement])
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+
+    baseline = timed('pass', args.number)
+    print('{:>8}  {}'.format('ms', 'statement'))
+    for statement in STATEMENTS:
+        elapsed = timed(statement, args.number) - baseline
+        print('{:>8.1f}  {}'.format(elapsed * 1e3, statement))
+
+
+if __name__ == '__main__':
+    main()
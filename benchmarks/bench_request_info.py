@@ -0,0 +1,94 @@
+'''
+Measures the per-request cost of validating and serialising request info
+for the Hound-Request-Info header, with 50 ClientMatches.
+
+    python benchmarks/bench_request_info.py
+'''
+import json
+import time
+from uuid import uuid4
+from timeit import Timer
+
+from houndipy.request_info import validate_request_info
+
+try:
+    from houndipy.request_info import encode_request_info
+except ImportError:
+    encode_request_info = None
+
+try:
+    from houndipy.request_info import RequestInfoTemplate
+except ImportError:
+    RequestInfoTemplate = None
+
+STATIC_FIELDS = (
+    'ClientID', 'DeviceID', 'UnitPreference', 'InputLanguage',
+    'OutputLanguage', 'ClientMatches',
+)
+
+CLIENT_MATCHES = [
+    {
+        'Expression': '"open" . "menu" . "{}"'.format(i),
+        'Result': {'Intent': 'OPEN_MENU', 'Item': i},
+        'SpokenResponse': 'Opening menu {}'.format(i),
+        'SpokenResponseLong': 'Opening menu {} for you'.format(i),
+        'WrittenResponse': 'Opening menu {}'.format(i),
+        'WrittenResponseLong': 'Opening menu {} for you'.format(i),
+    }
+    for i in range(50)
+]
+
+
+def request_info():
+    return {
+        'ClientID': 'kiosk',
+        'DeviceID': 'a0e4f8b2',
+        'UnitPreference': 'METRIC',
+        'InputLanguage': 'English',
+        'OutputLanguage': 'English',
+        'Latitude': -31,
+        'Longitude': 115,
+        'MinResults': 1,
+        'MaxResults': 3,
+        'RequestID': uuid4().hex,
+        'TimeStamp': int(time.time()),
+        'ConversationState': {'ConversationStateTime': 1418068667},
+        'ClientMatches': CLIENT_MATCHES,
+    }
+
+
+def bench(name, func, number=20000, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        # fresh request info each time, as RequestID and TimeStamp change
+        infos = iter([request_info() for _ in range(number)])
+        timings.append(Timer(lambda: func(next(infos))).timeit(number))
+    best = min(timings)
+    print('{:<40} {:8.2f} us/request'.format(name, best / number * 1e6))
+
+
+def main():
+    bench('validate_request_info(...)', validate_request_info)
+    bench(
+        'json.dumps(validate_request_info(...))',
+        lambda info: json.dumps(validate_request_info(info))
+    )
+    if encode_request_info is not None:
+        bench('encode_request_info(...)', encode_request_info)
+    if RequestInfoTemplate is not None:
+        info = request_info()
+        template = RequestInfoTemplate(
+            **{key: info[key] for key in STATIC_FIELDS}
+        )
+
+        def render(info):
+            return template.render({
+                key: val
+                for key, val in info.items()
+                if key not in STATIC_FIELDS
+            })
+        bench('RequestInfoTemplate.render(...)', render)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+'''
+Compares the peak RSS of uploading a large WAV file as speech, read into
+bytes first, opened as a file, and given by its path, which maps it.
+
+    python benchmarks/bench_speech_file.py [--megabytes 256]
+
+Each is run in a fresh process, so that peak RSS is its own, against a
+mock Houndify server in another.
+'''
+import os
+import time
+import argparse
+import resource
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from houndipy import Client
+from houndipy.audio import wav_header
+from houndipy.testing import MOCK_CLIENT_ID, MOCK_CLIENT_KEY
+
+from bench_client import start_server
+
+
+def run(url, path, mode):
+    client = Client(MOCK_CLIENT_ID, MOCK_CLIENT_KEY, base_url=url)
+    # the baseline, of python and houndipy with nothing sent
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    if mode == 'bytes':
+        with open(path, 'rb') as fh:
+            client.speech(fh.read())
+    elif mode == 'file':
+        with open(path, 'rb') as fh:
+            client.speech(fh)
+    else:
+        client.speech(path)
+    wall = time.perf_counter() - start
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return wall, maxrss - baseline
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--megabytes', type=int, default=256)
+    args = parser.parse_args()
+
+    size = args.megabytes * 2 ** 20
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as fh:
+        fh.write(wav_header(16000, data_size=size))
+        block = os.urandom(2 ** 20)
+        for _ in range(args.megabytes):
+            fh.write(block)
+
+    context = multiprocessing.get_context('spawn')
+    try:
+        print('{:<8} {:>9} {:>14}'.format('mode', 'wall s', 'peak rss MiB'))
+        for mode in ('bytes', 'file', 'path'):
+            # a server each, as it keeps what it is sent
+            proc, url = start_server()
+            try:
+                with ProcessPoolExecutor(1, mp_context=context) as executor:
+                    wall, rss = executor.submit(
+                        run, url, fh.name, mode
+                    ).result()
+            finally:
+                proc.terminate()
+                proc.wait()
+            # kilobytes on linux
+            print('{:<8} {:>9.2f} {:>14.1f}'.format(mode, wall, rss / 1024))
+    finally:
+        os.unlink(fh.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
+import os
 import json
-from io import BytesIO
+import tempfile
 from contextlib import closing
 
 import wave
@@ -26,7 +27,7 @@ class SendStream:
         print('stopping')
 
 
-def get_recording(seconds):
+def get_recording(seconds, path):
     CHUNK = 1024
     WIDTH = 2
     CHANNELS = 1
@@ -49,14 +50,41 @@ def get_recording(seconds):
 
     p.terminate()
 
-    file = BytesIO()
-    with wave.open(file, 'wb') as wf:
+    with wave.open(path, 'wb') as wf:
         wf.setnchannels(CHANNELS)
         wf.setsampwidth(p.get_sample_size(FORMAT))
         wf.setframerate(RATE)
         wf.writeframes(b''.join(frames))
 
-    return file.getvalue()
+    return path
+
+
+def send_recording(client, seconds):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = get_recording(seconds, os.path.join(tmp, 'recording.wav'))
+        print('sending')
+        # speech accepts the path, and maps the file rather than reading it
+        return client.speech(path)
+
+
+def stream_recording(client, seconds):
+    CHUNK = 1024
+    WIDTH = 2
+    CHANNELS = 1
+    RATE = 16000
+
+    p = pyaudio.PyAudio()
+    FORMAT = p.get_format_from_width(WIDTH)
+    with closing(p.open(format=FORMAT,
+                        channels=CHANNELS,
+                        rate=RATE,
+                        input=True,
+                        frames_per_buffer=CHUNK)) as stream:
+        # frames are uploaded as they are recorded, rather than after
+        res = client.speech(SendStream(stream, RATE, CHUNK, seconds))
+
+    p.terminate()
+    return res
 
 
 def main():
@@ -68,24 +96,18 @@ def main():
     )
 
     r = client.text('how old is chad reed')
-    # data = get_recording(seconds=5)
-    # print('sending')
-    # r = client.speech(data)
+    # r = send_recording(client, seconds=5)
     # print('sent')
+    # r = stream_recording(client, seconds=5)
 
     if not r.ok:
         print(r.text)
 
     r.raise_for_status()
 
-    res = r.json()
-
-    try:
-        for sres in res['AllResults']:
-            print(sres['NativeData']['LongResult'])
-    except KeyError:
-        from pprint import pprint
-        pprint(res)
+    for result in r.results:
+        print(result.command_kind, result.native_data.get('LongResult'))
+    print(r.spoken_text)
 
 if __name__ == '__main__':
     main()
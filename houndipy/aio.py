@@ -0,0 +1,486 @@
+import time
+from urllib.parse import urlencode, quote
+
+import aiohttp
+from yarl import URL
+
+from . import DEFAULT_BASE_URL, translate_request_headers
+from .audio import (
+    AsyncAudioStream, AudioStream, MappedAudio, aiter_audio, is_mappable
+)
+from .auth import Signer
+from .batch import aimap_ordered
+from .compression import Compression, decoder
+from .exceptions import HoundipyException
+from .ratelimit import BATCH, INTERACTIVE
+from .request_info import RequestInfoTemplate
+from .response import HoundResponse
+from .store import MemoryStore
+from .streaming import EventParser, HoundServer
+from .trace import count_sent, current_trace, start_trace
+
+
+def response_decoder(res):
+    '''
+    aiohttp only decodes bodies based on Content-Encoding, so we have to
+    handle Houndify's Hound-Response-Content-Encoding ourselves
+    '''
+    if 'Content-Encoding' in res.headers:
+        return None
+    return decoder(res.headers.get('Hound-Response-Content-Encoding'))
+
+
+class AsyncConversation:
+    def __init__(self, client, template=None, session_id=None, store=None):
+        self.client = client
+        self.template = template or client.request_info
+        self.session_id = session_id
+        self.store = store
+        self._converstation_state = None
+
+    @property
+    def converstation_state(self):
+        if self.store is not None:
+            return self.store.load(self.session_id)
+        return self._converstation_state
+
+    @converstation_state.setter
+    def converstation_state(self, state):
+        if self.store is not None:
+            self.store.save(self.session_id, state)
+        else:
+            self._converstation_state = state
+
+    async def _conversation_state_request(self, func, *args, **kwargs):
+        kwargs.setdefault('ConversationState', self.converstation_state or {})
+        kwargs.setdefault('template', self.template)
+
+        res = await func(*args, **kwargs)
+
+        if res.all_results:
+            self.converstation_state = res.conversation_state
+        return res
+
+    async def _conversation_state_stream(self, func, *args, **kwargs):
+        kwargs.setdefault('ConversationState', self.converstation_state or {})
+        kwargs.setdefault('template', self.template)
+
+        async for event in func(*args, **kwargs):
+            if isinstance(event, HoundServer) and event.get('AllResults'):
+                self.converstation_state = (
+                    event['AllResults'][0]['ConversationState']
+                )
+            yield event
+
+    async def text(self, *args, **kwargs):
+        return await self._conversation_state_request(
+            self.client.text,
+            *args, **kwargs
+        )
+
+    async def speech(self, *args, **kwargs):
+        return await self._conversation_state_request(
+            self.client.speech,
+            *args, **kwargs
+        )
+
+    def stream_text(self, *args, **kwargs):
+        return self._conversation_state_stream(
+            self.client.stream_text,
+            *args, **kwargs
+        )
+
+    def stream_speech(self, *args, **kwargs):
+        return self._conversation_state_stream(
+            self.client.stream_speech,
+            *args, **kwargs
+        )
+
+
+class AsyncClient(Signer):
+    '''
+    asyncio counterpart to :class:`houndipy.Client`, so many queries can
+    share a single event loop instead of a thread each.
+
+    The underlying aiohttp session is created lazily, so an AsyncClient can
+    be constructed outside of a running event loop. Use it as an async
+    context manager, or call :meth:`close` when done.
+
+    `request_info`, `conversation_store`, `rate_limiter`, `single_flight`
+    and `base_url` are as for :class:`houndipy.Client`, and `compression`
+    as for :class:`houndipy.HoundifyAdapter`.
+    '''
+
+    def __init__(self, client_id, client_key, request_info=None,
+                 conversation_store=None, session=None, compression=None,
+                 rate_limiter=None, single_flight=None,
+                 base_url=DEFAULT_BASE_URL):
+        super(AsyncClient, self).__init__(client_id, client_key)
+        self.base_url = base_url
+        self._sess = session
+        if conversation_store is None:
+            # not `or`, as an empty store is falsy
+            conversation_store = MemoryStore()
+        self.conversation_store = conversation_store
+        self.compression = compression or Compression()
+        self.rate_limiter = rate_limiter
+        self.single_flight = single_flight
+
+        if not isinstance(request_info, RequestInfoTemplate):
+            request_info = RequestInfoTemplate(**(request_info or {}))
+        self.request_info = request_info
+
+    def __getstate__(self):
+        state = super(AsyncClient, self).__getstate__()
+        state['_sess'] = None
+        return state
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self._sess is not None:
+            await self._sess.close()
+            self._sess = None
+
+    def _session(self):
+        if self._sess is None:
+            self._sess = aiohttp.ClientSession()
+        return self._sess
+
+    def converse(self, session_id=None, **request_info):
+        '''
+        `request_info` is sent with every request in the conversation, in
+        addition to the client wide request info.
+
+        If a `session_id` is given, it is sent as the SessionID, and the
+        ConversationState is kept in the client's conversation store under
+        it rather than on the conversation object, so the conversation can
+        be continued by any worker sharing the store.
+        '''
+        if session_id is None:
+            return AsyncConversation(
+                self, self.request_info.extend(**request_info)
+            )
+
+        return AsyncConversation(
+            self,
+            self.request_info.extend(SessionID=session_id, **request_info),
+            session_id,
+            self.conversation_store
+        )
+
+    def _post(self, url, request_info, template=None, params=None,
+              **kwargs):
+        if params:
+            # yarl would otherwise encode spaces as +, which houndify
+            # doesn't accept
+            url = URL(
+                url + '?' + urlencode(params, quote_via=quote),
+                encoded=True
+            )
+
+        template = template or self.request_info
+
+        trace = current_trace()
+        if trace is None:
+            header = template.render(request_info)
+            auth_headers = self.auth_headers()
+        else:
+            with trace.phase('encode'):
+                header = template.render(request_info)
+            with trace.phase('sign'):
+                auth_headers = self.auth_headers()
+
+        headers = {'Hound-Request-Info': header}
+        headers.update(auth_headers)
+
+        compression = self.compression
+        if compression.accept_encoding is not None:
+            headers['Accept-Encoding'] = compression.accept_encoding
+        if 'data' in kwargs:
+            kwargs['data'] = compression.compress(headers, kwargs['data'])
+            if trace is not None:
+                kwargs['data'] = count_sent(trace, kwargs['data'])
+
+        translate_request_headers(headers)
+
+        return self._session().post(url, headers=headers, **kwargs)
+
+    async def _throttle(self, priority, trace=None):
+        if self.rate_limiter is None:
+            return
+        if trace is None:
+            await self.rate_limiter.acquire_async(priority)
+        else:
+            with trace.phase('throttle'):
+                await self.rate_limiter.acquire_async(priority)
+
+    async def _request(self, url, request_info, **kwargs):
+        trace = start_trace(url)
+        if trace is None:
+            return await self._fetch(url, request_info, **kwargs)
+
+        with trace:
+            return await self._fetch(url, request_info, trace, **kwargs)
+
+    async def _fetch(self, url, request_info, trace=None,
+                     priority=INTERACTIVE, **kwargs):
+        flight = self.single_flight
+        template = kwargs.get('template') or self.request_info
+        if (
+            flight is None or
+            'data' in kwargs or
+            not flight.coalescable(template, request_info)
+        ):
+            return await self._send(
+                url, request_info, trace, priority, **kwargs
+            )
+
+        res, coalesced = await flight.do_async(
+            flight.key(url, kwargs.get('params'), template, request_info),
+            lambda: self._send(url, request_info, trace, priority, **kwargs)
+        )
+        if coalesced:
+            if trace is not None:
+                trace.coalesced = True
+            # parsed separately, so callers can't see each other's changes
+            res = HoundResponse(res.response, res.content)
+        return res
+
+    async def _send(self, url, request_info, trace, priority, **kwargs):
+        await self._throttle(priority, trace)
+        request = self._post(url, request_info, **kwargs)
+
+        if trace is None:
+            async with request as res:
+                body = await _read(res)
+        else:
+            # aiohttp only sends the request once it is awaited
+            sent = time.perf_counter()
+            async with request as res:
+                trace.add('send', time.perf_counter() - sent)
+                trace.status_code = res.status
+                with trace.phase('read'):
+                    body = await _read(res, trace)
+
+        res = HoundResponse(res, body)
+        if trace is None:
+            error_message = res.error_message
+        else:
+            with trace.phase('parse'):
+                error_message = res.error_message
+
+        if error_message is not None:
+            raise HoundipyException(error_message)
+        return res
+
+    async def _stream(self, url, request_info, template=None,
+                      priority=INTERACTIVE, **kwargs):
+        template = template or self.request_info
+        request_info.setdefault('PartialTranscriptsDesired', True)
+        request_info.setdefault('ResultUpdateAllowed', True)
+
+        parser = EventParser(request_info.get(
+            'ObjectByteCountPrefix',
+            template.request_info.get('ObjectByteCountPrefix', False)
+        ))
+
+        trace = start_trace(url)
+        if trace is None:
+            await self._throttle(priority)
+            request = self._post(url, request_info, template, **kwargs)
+            async for event in self._stream_events(request, parser):
+                yield event
+            return
+
+        error = None
+        try:
+            # only current while sending, as the caller may well make other
+            # requests between events
+            with trace.active():
+                await self._throttle(priority, trace)
+                request = self._post(url, request_info, template, **kwargs)
+            async for event in self._stream_events(request, parser, trace):
+                yield event
+        except GeneratorExit:
+            raise
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            trace.finish(error)
+
+    async def _stream_events(self, request, parser, trace=None):
+        if trace is not None:
+            sent = time.perf_counter()
+
+        async with request as res:
+            if trace is not None:
+                received = time.perf_counter()
+                trace.add('send', received - sent)
+                trace.status_code = res.status
+
+            dec = response_decoder(res)
+
+            async for chunk in res.content.iter_any():
+                if trace is not None:
+                    trace.bytes_received += len(chunk)
+                if dec is not None:
+                    chunk = dec.decompress(chunk)
+                for event in parser.feed(chunk):
+                    if 'ErrorMessage' in event:
+                        raise HoundipyException(event['ErrorMessage'])
+                    yield event
+
+            if dec is not None:
+                for event in parser.feed(dec.flush()):
+                    if 'ErrorMessage' in event:
+                        raise HoundipyException(event['ErrorMessage'])
+                    yield event
+        parser.close()
+
+        if trace is not None:
+            trace.add('stream', time.perf_counter() - received)
+
+    async def text(self, query, template=None, priority=INTERACTIVE,
+                   **kwargs):
+        '''
+        `priority` is as for :meth:`houndipy.Client.text`
+        '''
+        return await self._request(
+            self.base_url + 'v1/text',
+            params={'query': query},
+            template=template,
+            request_info=kwargs,
+            priority=priority
+        )
+
+    async def speech(self, audio, template=None, priority=INTERACTIVE,
+                     **kwargs):
+        '''
+        `audio` may be bytes, the path to an audio file, a buffer such as a
+        memoryview or mmap, a file-like object, or a sync or async
+        iterator of audio frames (such as an
+        :class:`houndipy.audio.AsyncAudioStream`)
+        '''
+        data = _map(audio)
+        try:
+            return await self._request(
+                self.base_url + 'v1/audio',
+                data=aiter_audio(data),
+                template=template,
+                request_info=kwargs,
+                priority=priority
+            )
+        finally:
+            _finish(audio, data)
+
+    def stream_text(self, query, template=None, priority=INTERACTIVE,
+                    **kwargs):
+        '''
+        Like :meth:`text`, but an async iterator of
+        :class:`houndipy.streaming.HoundEvent` objects as they arrive
+        '''
+        return self._stream(
+            self.base_url + 'v1/text',
+            params={'query': query},
+            template=template,
+            request_info=kwargs,
+            priority=priority
+        )
+
+    def stream_speech(self, audio, template=None, priority=INTERACTIVE,
+                      **kwargs):
+        '''
+        Like :meth:`speech`, but an async iterator of
+        :class:`houndipy.streaming.HoundEvent` objects, starting with partial
+        transcripts while the audio is still being uploaded
+        '''
+        data = _map(audio)
+        return _finishing(audio, data, self._stream(
+            self.base_url + 'v1/audio',
+            data=aiter_audio(data),
+            template=template,
+            request_info=kwargs,
+            priority=priority
+        ))
+
+    def text_many(self, queries, concurrency=64, **kwargs):
+        '''
+        Runs :meth:`text` for each of `queries`, with at most `concurrency`
+        in flight at once, and yields :class:`houndipy.batch.BatchResult`
+        objects in the order of `queries`.
+
+        `queries` may be an iterable or an async iterable of any length.
+        Queries are sent with :data:`houndipy.ratelimit.BATCH` priority
+        unless another is given.
+        '''
+        kwargs.setdefault('priority', BATCH)
+        return aimap_ordered(
+            lambda query: self.text(query, **kwargs),
+            queries,
+            concurrency
+        )
+
+    def speech_many(self, audios, concurrency=64, **kwargs):
+        '''
+        Like :meth:`text_many`, but for :meth:`speech`. Each of `audios` may
+        be a path to an audio file.
+        '''
+        kwargs.setdefault('priority', BATCH)
+        return aimap_ordered(
+            lambda audio: self.speech(audio, **kwargs),
+            audios,
+            concurrency
+        )
+
+
+def _map(audio):
+    # mapped here rather than by aiter_audio, so that it can be unmapped
+    # once the request is over
+    if is_mappable(audio):
+        return MappedAudio(audio)
+    return audio
+
+
+def _finish(audio, data):
+    # once the request is over, nothing will read any more of the audio,
+    # so a producer still writing to a stream mustn't be left waiting, and
+    # files mapped for the request are unmapped
+    if isinstance(audio, (AsyncAudioStream, AudioStream)):
+        audio.abort()
+    if data is not audio and isinstance(data, MappedAudio):
+        data.close()
+
+
+async def _finishing(audio, data, events):
+    try:
+        async for event in events:
+            yield event
+    finally:
+        try:
+            await events.aclose()
+        finally:
+            _finish(audio, data)
+
+
+async def _read(res, trace=None):
+    # decoded as it arrives, rather than after buffering the whole body
+    dec = response_decoder(res)
+    if dec is None:
+        body = await res.read()
+        if trace is not None:
+            trace.bytes_received = len(body)
+        return body
+
+    parts = []
+    async for chunk in res.content.iter_any():
+        if trace is not None:
+            trace.bytes_received += len(chunk)
+        parts.append(dec.decompress(chunk))
+    parts.append(dec.flush())
+    return b''.join(parts)
@@ -0,0 +1,673 @@
+import os
+import mmap
+import queue
+import struct
+import warnings
+from collections import deque
+
+# numpy takes longer to import than the rest of houndipy, so it is only
+# imported once audio is first processed, by _load_numpy
+numpy = None
+_numpy_loaded = False
+
+try:
+    with warnings.catch_warnings():
+        # deprecated since python 3.11, only used when numpy isn't available
+        warnings.simplefilter('ignore', DeprecationWarning)
+        import audioop
+except ImportError:
+    audioop = None
+
+from .exceptions import AudioStreamAborted, HoundipyException
+
+
+def _load_numpy():
+    global numpy, _numpy_loaded
+    if not _numpy_loaded:
+        try:
+            import numpy
+        except ImportError:
+            pass
+        _numpy_loaded = True
+    return numpy
+
+
+DEFAULT_CHUNK_SIZE = 4096
+
+# what houndify's recogniser wants; anything more is wasted upload
+TARGET_RATE = 16000
+
+_EOF = object()
+
+
+class AudioStream:
+    '''
+    A bounded buffer between something producing audio, such as a
+    microphone callback, and an upload consuming it.
+
+    Once `max_chunks` chunks are waiting to be sent, :meth:`write` blocks,
+    so a slow network pushes back on the producer rather than the buffer
+    growing without bound.
+
+    Pass an AudioStream straight to :meth:`houndipy.Client.speech`, and
+    call :meth:`close` when the utterance is over.
+
+    If the upload fails, or stops reading before the end, the stream is
+    aborted: :meth:`write` raises
+    :class:`houndipy.exceptions.AudioStreamAborted`, including in a
+    producer already waiting for room, so it isn't left blocked forever.
+    '''
+
+    def __init__(self, max_chunks=16):
+        self._queue = queue.Queue(max_chunks)
+        self.aborted = False
+
+    def write(self, chunk, timeout=None):
+        if chunk:
+            self._check()
+            self._queue.put(chunk, timeout=timeout)
+            # woken by abort emptying the queue
+            self._check()
+
+    def close(self, timeout=None):
+        if not self.aborted:
+            self._queue.put(_EOF, timeout=timeout)
+
+    def abort(self):
+        '''
+        Stops the stream from the consuming side, waking any producer
+        waiting in :meth:`write`
+        '''
+        self.aborted = True
+        self._drain()
+
+    def _check(self):
+        if self.aborted:
+            self._drain()
+            raise AudioStreamAborted('Audio is no longer being uploaded')
+
+    def _drain(self):
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self):
+        finished = False
+        try:
+            while True:
+                chunk = self._queue.get()
+                if chunk is _EOF:
+                    finished = True
+                    return
+                yield chunk
+        finally:
+            if not finished:
+                self.abort()
+
+
+class AsyncAudioStream:
+    '''
+    asyncio version of :class:`AudioStream`, for use with
+    :class:`houndipy.aio.AsyncClient`, and aborted in the same way
+    '''
+
+    def __init__(self, max_chunks=16):
+        import asyncio
+        self._queue = asyncio.Queue(max_chunks)
+        self.aborted = False
+
+    async def write(self, chunk):
+        if chunk:
+            self._check()
+            await self._queue.put(chunk)
+            # woken by abort emptying the queue
+            self._check()
+
+    async def close(self):
+        if not self.aborted:
+            await self._queue.put(_EOF)
+
+    def abort(self):
+        '''
+        Stops the stream from the consuming side, waking any producer
+        waiting in :meth:`write`
+        '''
+        self.aborted = True
+        self._drain()
+
+    def _check(self):
+        if self.aborted:
+            self._drain()
+            raise AudioStreamAborted('Audio is no longer being uploaded')
+
+    def _drain(self):
+        import asyncio
+        try:
+            while True:
+                self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def __aiter__(self):
+        finished = False
+        try:
+            while True:
+                chunk = await self._queue.get()
+                if chunk is _EOF:
+                    finished = True
+                    return
+                yield chunk
+        finally:
+            if not finished:
+                self.abort()
+
+
+def is_path(audio):
+    return isinstance(audio, (str, os.PathLike))
+
+
+def parse_wav(buf):
+    '''
+    Finds the format and samples of the PCM WAV file in `buf`, returning
+    ``(rate, channels, width, offset, size)``, where the samples are the
+    `size` bytes from `offset`, or None if it isn't one
+    '''
+    if len(buf) < 12 or buf[:4] != b'RIFF' or buf[8:12] != b'WAVE':
+        return None
+
+    fmt = None
+    position = 12
+    while position + 8 <= len(buf):
+        chunk_id = bytes(buf[position:position + 4])
+        size, = struct.unpack_from('<I', buf, position + 4)
+        position += 8
+        if chunk_id == b'fmt ' and 16 <= size <= len(buf) - position:
+            fmt = struct.unpack_from('<HHIIHH', buf, position)
+            if fmt[0] == 0xFFFE and size >= 40:
+                # WAVE_FORMAT_EXTENSIBLE, whose real format tag starts its
+                # sub format GUID
+                fmt = struct.unpack_from('<H', buf, position + 24) + fmt[1:]
+        elif chunk_id == b'data':
+            break
+        # chunks are padded to an even length
+        position += size + size % 2
+    else:
+        return None
+
+    if fmt is None:
+        return None
+    tag, channels, rate, _, _, bits = fmt
+    if tag != 1 or bits not in (8, 16, 32):
+        return None
+
+    # streamed recordings may not know their size, and claim the largest
+    size = min(size, len(buf) - position)
+    return rate, channels, bits // 8, position, size
+
+
+class MappedAudio:
+    '''
+    Audio from a file, given by its path, or from a buffer such as a
+    memoryview or mmap, sent in slices of `chunk_size` bytes which are
+    views of it rather than copies. Files are memory mapped, so reading
+    them is left to the operating system, and pages which have been sent
+    are let go of again.
+
+    The header of a PCM WAV file is parsed once, when it is opened, and a
+    minimal header is sent followed by the samples, leaving out any other
+    chunks, such as metadata. Its format is in :attr:`rate`,
+    :attr:`channels` and :attr:`width`, which are None for anything else;
+    other formats are sent as they are.
+
+    As its length is known, it is sent with a Content-Length rather than
+    chunked, and it can be iterated again when a request is retried.
+
+    Call :meth:`close`, or use it as a context manager, to unmap the file
+    once it has been sent; clients do so for those they open themselves.
+    '''
+
+    # how much is sent between letting go of the pages already sent
+    RELEASE_SIZE = 2 ** 20
+
+    def __init__(self, audio, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self._mmap = None
+        if is_path(audio):
+            with open(audio, 'rb') as fh:
+                if os.fstat(fh.fileno()).st_size:
+                    audio = self._mmap = mmap.mmap(
+                        fh.fileno(), 0, access=mmap.ACCESS_READ
+                    )
+                else:
+                    # empty files can't be mapped
+                    audio = b''
+            self._advise('MADV_SEQUENTIAL')
+
+        buf = self._buf = memoryview(audio).cast('B')
+        wav = parse_wav(buf)
+        if wav is None:
+            self.rate = self.channels = self.width = None
+            self.header = b''
+            self._offset = 0
+            self.data = buf
+        else:
+            self.rate, self.channels, self.width, offset, size = wav
+            self.header = wav_header(
+                self.rate, self.channels, self.width, size
+            )
+            self._offset = offset
+            self.data = buf[offset:offset + size]
+
+    def __len__(self):
+        return len(self.header) + len(self.data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        '''
+        Releases the views of the audio, and unmaps the file if it was
+        given a path; buffers passed in are left open
+        '''
+        self.data.release()
+        self._buf.release()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # a chunk is still held elsewhere, such as by an upload
+                # that was abandoned; the file is unmapped once it is gone
+                pass
+            self._mmap = None
+
+    def __iter__(self):
+        if self.header:
+            yield self.header
+
+        data, chunk_size = self.data, self.chunk_size
+        released = 0
+        for start in range(0, len(data), chunk_size):
+            yield data[start:start + chunk_size]
+
+            if self._mmap is not None:
+                # the pages are read from the file again should they be
+                # needed, so only those being sent count towards RSS
+                sent = self._offset + start + chunk_size
+                sent -= sent % mmap.PAGESIZE
+                if sent - released >= self.RELEASE_SIZE:
+                    self._advise('MADV_DONTNEED', released, sent - released)
+                    released = sent
+
+    def _advise(self, option, *args):
+        # madvise isn't available everywhere, and is only ever a hint
+        if hasattr(mmap, option) and hasattr(self._mmap, 'madvise'):
+            self._mmap.madvise(getattr(mmap, option), *args)
+
+
+def is_mappable(audio):
+    return is_path(audio) or isinstance(audio, (memoryview, mmap.mmap))
+
+
+def _read_chunks(fh, chunk_size):
+    while True:
+        chunk = fh.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _skip_empty(chunks):
+    # an empty chunk would terminate a chunked upload early
+    for chunk in chunks:
+        if chunk:
+            yield chunk
+
+
+async def _skip_empty_async(chunks):
+    async for chunk in chunks:
+        if chunk:
+            yield chunk
+
+
+async def _to_async(chunks):
+    for chunk in chunks:
+        if chunk:
+            yield chunk
+
+
+def iter_audio(audio, chunk_size=DEFAULT_CHUNK_SIZE):
+    '''
+    Normalises the forms of audio accepted by `speech` into something the
+    HTTP client will upload as it is produced, using chunked transfer
+    encoding.
+
+    bytes are sent as they are, paths and buffers such as memoryviews and
+    mmaps as a :class:`MappedAudio`, file-like objects are read
+    `chunk_size` bytes at a time, and iterators of frames are passed
+    through lazily.
+    '''
+    if isinstance(audio, (bytes, bytearray)):
+        return audio
+    if is_mappable(audio):
+        return MappedAudio(audio, chunk_size)
+    if hasattr(audio, 'read'):
+        return _read_chunks(audio, chunk_size)
+    return _skip_empty(audio)
+
+
+def aiter_audio(audio, chunk_size=DEFAULT_CHUNK_SIZE):
+    '''
+    Like :func:`iter_audio`, but for aiohttp, which wants async iterators.
+
+    File-like objects are handed to aiohttp as they are, as it reads them
+    in an executor rather than blocking the event loop. Plain iterators are
+    consumed on the event loop, so they shouldn't block; mapped files are
+    read ahead sequentially by the operating system.
+    '''
+    if is_mappable(audio):
+        return _to_async(MappedAudio(audio, chunk_size))
+    if isinstance(audio, (bytes, bytearray)) or hasattr(audio, 'read'):
+        return audio
+    if hasattr(audio, '__aiter__'):
+        return _skip_empty_async(audio)
+    return _to_async(audio)
+
+
+def wav_header(rate, channels=1, width=2, data_size=0xFFFFFFFF):
+    '''
+    A RIFF/WAVE header for PCM audio. When streaming, the size of the data
+    isn't known ahead of time, so by default the largest size is used.
+    '''
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', min(data_size + 36, 0xFFFFFFFF), b'WAVE',
+        b'fmt ', 16, 1, channels, rate, rate * channels * width,
+        channels * width, width * 8,
+        b'data', data_size
+    )
+
+
+class Preprocessor:
+    '''
+    Converts chunks of PCM audio with `width` bytes per sample and
+    `channels` interleaved channels at `rate` Hz into 16 bit mono PCM at
+    `target_rate` Hz, carrying state between chunks so that it can be used
+    on frames as they are captured.
+
+    Channels are averaged together, and resampling is by linear
+    interpolation, after a moving average low pass filter when downsampling
+    by a factor of two or more. This uses numpy if it is installed, and
+    otherwise falls back to the standard library's audioop.
+    '''
+
+    def __init__(self, rate, channels=1, width=2, target_rate=TARGET_RATE):
+        if _load_numpy() is None and audioop is None:
+            raise HoundipyException(
+                'Audio preprocessing requires numpy on this version of python'
+            )
+        if width not in (1, 2, 4):
+            raise HoundipyException(
+                'Unsupported sample width: {}'.format(width)
+            )
+
+        self.rate = rate
+        self.channels = channels
+        self.width = width
+        self.target_rate = target_rate
+        self.frame_size = channels * width
+
+        # a chunk can end part way through a frame
+        self._remainder = b''
+
+        self._step = rate / target_rate
+        self._taps = int(round(self._step)) if self._step >= 2 else 1
+        # compensates for the delay the low pass filter introduces
+        self._position = (self._taps - 1) / 2
+        self._last = None
+        self._history = None
+        self._ratecv_state = None
+
+    def process(self, chunk):
+        if self._remainder:
+            chunk = self._remainder + bytes(chunk)
+        usable = len(chunk) - len(chunk) % self.frame_size
+        self._remainder = bytes(chunk[usable:])
+        if not usable:
+            return b''
+
+        if numpy is not None:
+            return self._process_numpy(memoryview(chunk)[:usable])
+        return self._process_audioop(bytes(chunk[:usable]))
+
+    def _process_numpy(self, chunk):
+        if self.width == 1:
+            # 8 bit wav is unsigned
+            samples = numpy.frombuffer(chunk, numpy.uint8)
+            samples = samples.astype(numpy.float32)
+            samples -= 128
+            samples *= 256
+        elif self.width == 2:
+            samples = numpy.frombuffer(chunk, '<i2').astype(numpy.float32)
+        else:
+            samples = numpy.frombuffer(chunk, '<i4').astype(numpy.float32)
+            samples /= 65536
+
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1)
+
+        if self._step != 1:
+            samples = self._resample(self._low_pass(samples))
+
+        return numpy.clip(
+            numpy.rint(samples), -32768, 32767
+        ).astype('<i2').tobytes()
+
+    def _low_pass(self, samples):
+        taps = self._taps
+        if taps == 1:
+            return samples
+
+        if self._history is None:
+            self._history = numpy.repeat(samples[:1], taps - 1)
+        padded = numpy.concatenate([self._history, samples])
+        self._history = padded[-(taps - 1):]
+
+        return numpy.convolve(
+            padded, numpy.full(taps, 1 / taps, numpy.float32), 'valid'
+        )
+
+    def _resample(self, samples):
+        if self._last is not None:
+            samples = numpy.concatenate([[self._last], samples])
+        end = len(samples) - 1
+
+        times = numpy.arange(self._position, end + 1e-9, self._step)
+        if len(times):
+            self._position = times[-1] + self._step - end
+        else:
+            self._position -= end
+        self._last = samples[-1]
+
+        return numpy.interp(times, numpy.arange(len(samples)), samples)
+
+    def _process_audioop(self, chunk):
+        if self.width == 1:
+            chunk = audioop.bias(chunk, 1, -128)
+        if self.width != 2:
+            chunk = audioop.lin2lin(chunk, self.width, 2)
+
+        if self.channels == 2:
+            chunk = audioop.tomono(chunk, 2, 0.5, 0.5)
+        elif self.channels > 2:
+            raise HoundipyException(
+                'Downmixing more than two channels requires numpy'
+            )
+
+        if self.rate != self.target_rate:
+            chunk, self._ratecv_state = audioop.ratecv(
+                chunk, 2, 1, int(self.rate), int(self.target_rate),
+                self._ratecv_state
+            )
+        return chunk
+
+
+def preprocess(audio, rate, channels=1, width=2, target_rate=TARGET_RATE,
+               header=True, chunk_size=DEFAULT_CHUNK_SIZE):
+    '''
+    Streams raw PCM `audio` (in any of the forms `speech` accepts) through
+    a :class:`Preprocessor`, yielding 16 bit mono PCM at `target_rate`,
+    preceded by a WAV header if `header` is set. Pass the result to
+    :meth:`houndipy.Client.speech`.
+    '''
+    preprocessor = Preprocessor(rate, channels, width, target_rate)
+
+    if header:
+        yield wav_header(target_rate)
+
+    chunks = iter_audio(audio, chunk_size)
+    if isinstance(chunks, (bytes, bytearray)):
+        chunks = [chunks]
+
+    for chunk in chunks:
+        processed = preprocessor.process(chunk)
+        if processed:
+            yield processed
+
+
+def frame_rms(pcm, frame_size):
+    '''
+    The RMS energy of each consecutive frame of `frame_size` bytes in the
+    16 bit mono PCM `pcm`, whose length must be a multiple of `frame_size`
+    '''
+    if _load_numpy() is not None:
+        samples = numpy.frombuffer(pcm, '<i2').astype(numpy.float32)
+        return numpy.sqrt(numpy.mean(
+            numpy.square(samples.reshape(-1, frame_size // 2)), axis=1
+        ))
+    return [
+        audioop.rms(pcm[start:start + frame_size], 2)
+        for start in range(0, len(pcm), frame_size)
+    ]
+
+
+class SilenceTrimmer:
+    '''
+    An energy based voice activity detector, which drops audio until
+    someone starts speaking, and signals the end of the utterance once they
+    have stopped for `trailing_ms`.
+
+    Audio is split into frames of `frame_ms`, and a frame counts as speech
+    if its RMS energy is at least `threshold`. Up to `pre_roll_ms` of audio
+    before the first speech frame is kept, so that quiet starts of words
+    aren't lost.
+
+    Expects 16 bit mono PCM, such as the output of :func:`preprocess`.
+    '''
+
+    def __init__(self, rate=TARGET_RATE, threshold=300, frame_ms=20,
+                 pre_roll_ms=200, trailing_ms=800):
+        if _load_numpy() is None and audioop is None:
+            raise HoundipyException(
+                'Silence trimming requires numpy on this version of python'
+            )
+
+        self.threshold = threshold
+        self.frame_size = int(rate * frame_ms / 1000) * 2
+        self.pre_roll = deque(maxlen=max(1, pre_roll_ms // frame_ms))
+        self.trailing_frames = max(1, trailing_ms // frame_ms)
+
+        self.speaking = False
+        self.done = False
+        self._silent_frames = 0
+        self._remainder = b''
+
+    def process(self, chunk):
+        '''
+        Returns the audio from `chunk` that should be sent; once
+        :attr:`done` is set, the utterance is over
+        '''
+        if self.done:
+            return b''
+
+        if self._remainder:
+            chunk = self._remainder + bytes(chunk)
+        usable = len(chunk) - len(chunk) % self.frame_size
+        self._remainder = bytes(chunk[usable:])
+        if not usable:
+            return b''
+
+        view = memoryview(chunk)[:usable]
+        frames = [
+            view[start:start + self.frame_size]
+            for start in range(0, usable, self.frame_size)
+        ]
+        energies = frame_rms(view, self.frame_size)
+
+        out = []
+        for frame, energy in zip(frames, energies):
+            if energy >= self.threshold:
+                if not self.speaking:
+                    self.speaking = True
+                    out.extend(self.pre_roll)
+                    self.pre_roll.clear()
+                self._silent_frames = 0
+                out.append(frame)
+            elif self.speaking:
+                out.append(frame)
+                self._silent_frames += 1
+                if self._silent_frames >= self.trailing_frames:
+                    self.done = True
+                    break
+            else:
+                self.pre_roll.append(bytes(frame))
+
+        return b''.join(out)
+
+
+def trim_silence(audio, rate=TARGET_RATE, header=False,
+                 chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+    '''
+    Streams 16 bit mono PCM `audio` through a :class:`SilenceTrimmer`,
+    dropping leading silence, and ending once the speaker has been quiet
+    for long enough, so the upload finishes without waiting for the source
+    to run out. Other keyword arguments are passed to the SilenceTrimmer.
+
+    For example, to record from a 48 kHz stereo microphone::
+
+        client.speech(trim_silence(
+            preprocess(mic, 48000, channels=2, header=False),
+            header=True
+        ))
+    '''
+    trimmer = SilenceTrimmer(rate, **kwargs)
+
+    if header:
+        yield wav_header(rate)
+
+    chunks = iter_audio(audio, chunk_size)
+    if isinstance(chunks, (bytes, bytearray)):
+        chunks = [chunks]
+
+    for chunk in chunks:
+        trimmed = trimmer.process(chunk)
+        if trimmed:
+            yield trimmed
+        if trimmer.done:
+            return
@@ -0,0 +1,77 @@
+import os
+import time
+import hmac
+import hashlib
+from uuid import uuid4
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+
+def new_request_id():
+    # cheaper than uuid4().hex, and just as unique for our purposes
+    return os.urandom(16).hex()
+
+
+class Signer:
+    '''
+    Produces the Hound-Request-Authentication and Hound-Client-Authentication
+    headers for a client.
+
+    Although not mentioned in the Houndify documentation to the best
+    of my knowledge, the urlsafe version of base64 is required here,
+    along with the sha256 version of HMAC (also left unmentioned).
+
+    The client key is only decoded once, and the keyed HMAC state is
+    copied for each request rather than built from scratch.
+    '''
+
+    def __init__(self, client_id, client_key, user_id=None):
+        self.user_id = user_id or uuid4().hex
+        self.client_id = str(client_id)
+        self.client_key = str(client_key)
+
+        self._init_hmac()
+
+    def _init_hmac(self):
+        self._hmac = hmac.new(
+            urlsafe_b64decode(self.client_key),
+            digestmod=hashlib.sha256
+        )
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_hmac']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_hmac()
+
+    def auth_headers(self, request_id=None, timestamp=None):
+        if request_id is None:
+            request_id = new_request_id()
+        if timestamp is None:
+            timestamp = int(time.time())
+
+        q_hmac = self._hmac.copy()
+        q_hmac.update(
+            '{};{}{}'.format(self.user_id, request_id, timestamp).encode()
+        )
+        signature = urlsafe_b64encode(q_hmac.digest()).decode()
+
+        return {
+            'Hound-Request-Authentication': '{};{}'.format(
+                self.user_id, request_id
+            ),
+            'Hound-Client-Authentication': '{};{};{}'.format(
+                self.client_id, timestamp, signature
+            )
+        }
+
+
+def sign_request(request_id, timestamp, user_id, client_id, client_key):
+    '''
+    Performs the actual signing of the request.
+    '''
+    return Signer(client_id, client_key, user_id).auth_headers(
+        request_id, timestamp
+    )
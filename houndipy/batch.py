@@ -0,0 +1,136 @@
+import os
+from functools import partial
+from contextvars import copy_context
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class BatchResult(namedtuple('BatchResult', 'item response error')):
+    '''
+    The outcome of one item of a batch; exactly one of `response` and
+    `error` is set
+    '''
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def _result(item, future):
+    try:
+        return BatchResult(item, future.result(), None)
+    except Exception as e:
+        return BatchResult(item, None, e)
+
+
+def _ordered(executor, func, items, window):
+    pending = deque()
+    try:
+        for item in items:
+            pending.append((item, executor.submit(func, item)))
+            if len(pending) >= window:
+                yield _result(*pending.popleft())
+
+        while pending:
+            yield _result(*pending.popleft())
+    finally:
+        # if we were closed early, don't start anything else
+        for item, future in pending:
+            future.cancel()
+
+
+def imap_ordered(func, items, concurrency):
+    '''
+    Calls `func` on each of `items` from `concurrency` threads, yielding
+    :class:`BatchResult` objects in the order of `items`.
+
+    `items` is consumed lazily, and at most twice `concurrency` items are in
+    flight or waiting to be yielded at once, so memory use doesn't depend on
+    how many items there are.
+    '''
+    # run each call in a copy of our context, so tracing and the like carry
+    # over to the worker threads
+    context = copy_context()
+
+    def call(item):
+        return context.copy().run(func, item)
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        yield from _ordered(executor, call, items, 2 * concurrency)
+
+
+# the client for the current worker process of process_map
+_worker_client = None
+
+
+def _init_worker(client):
+    global _worker_client
+    _worker_client = client
+
+
+def _call_in_worker(func, item):
+    return func(_worker_client, item)
+
+
+def process_map(client, func, items, workers=None):
+    '''
+    Calls ``func(client, item)`` for each of `items` in a pool of `workers`
+    processes, yielding :class:`BatchResult` objects in the order of
+    `items`, for batch jobs that do CPU heavy work such as audio
+    preprocessing alongside their queries.
+
+    `client` is pickled once per worker, each of which opens its own
+    connections. `func` must be picklable, so defined at module level, as
+    must its return values.
+    '''
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(client,)
+    ) as executor:
+        yield from _ordered(
+            executor, partial(_call_in_worker, func), items, 2 * workers
+        )
+
+
+async def _async_result(item, task):
+    try:
+        return BatchResult(item, await task, None)
+    except Exception as e:
+        return BatchResult(item, None, e)
+
+
+async def aimap_ordered(func, items, concurrency):
+    '''
+    asyncio version of :func:`imap_ordered`; `func` is a coroutine function,
+    and `items` may be an iterable or an async iterable
+    '''
+    import asyncio
+
+    window = 2 * concurrency
+    semaphore = asyncio.Semaphore(concurrency)
+    pending = deque()
+
+    async def call(item):
+        async with semaphore:
+            return await func(item)
+
+    if not hasattr(items, '__aiter__'):
+        items = _to_async(items)
+
+    try:
+        async for item in items:
+            pending.append((item, asyncio.ensure_future(call(item))))
+            if len(pending) >= window:
+                yield await _async_result(*pending.popleft())
+
+        while pending:
+            yield await _async_result(*pending.popleft())
+    finally:
+        for item, task in pending:
+            task.cancel()
+
+
+async def _to_async(items):
+    for item in items:
+        yield item
@@ -0,0 +1,230 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+from . import codec
+from .request_info import VOLATILE_FIELDS
+
+# the body we cache has already been decoded
+DROPPED_HEADERS = ('Content-Encoding', 'Content-Length', 'Transfer-Encoding')
+
+
+def request_key(url, params, template, request_info):
+    '''
+    Identifies a query by its URL, query parameters and request info, less
+    fields that change with every request such as RequestID and TimeStamp
+    '''
+    canonical = {
+        key: val
+        for key, val in request_info.items()
+        if key not in VOLATILE_FIELDS
+    }
+    key = codec.dumps(
+        [url, params or {}, template.render(), canonical],
+        sort_keys=True
+    )
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+
+    def __repr__(self):
+        return '<CacheStats hits={} misses={} bypasses={}>'.format(
+            self.hits, self.misses, self.bypasses
+        )
+
+    def count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+
+class ResponseCache:
+    '''
+    Base class for caches of text query responses.
+
+    Responses are keyed on the URL, query parameters and request info, less
+    fields that change with every request such as RequestID and TimeStamp.
+    Requests setting any of the `never_cache` fields, by default
+    ConversationState, bypass the cache entirely, as do speech queries.
+
+    Subclasses implement :meth:`_get` and :meth:`_set`.
+    '''
+
+    def __init__(self, ttl=300, never_cache=('ConversationState',)):
+        self.ttl = ttl
+        self.never_cache = tuple(never_cache)
+        self.stats = CacheStats()
+
+    def __setstate__(self, state):
+        # only configuration is pickled; each process gets its own
+        # entries, or its own connection to the same database
+        self.__init__(**state)
+
+    def cacheable(self, template, request_info):
+        for field in self.never_cache:
+            if request_info.get(field) or template.request_info.get(field):
+                self.stats.count('bypasses')
+                return False
+        return True
+
+    def key(self, url, params, template, request_info):
+        return request_key(url, params, template, request_info)
+
+    def get(self, key):
+        entry = self._get(key)
+        if entry is None:
+            self.stats.count('misses')
+            return None
+
+        self.stats.count('hits')
+        status_code, headers, content, url = entry
+
+        res = Response()
+        res.status_code = status_code
+        res.headers = CaseInsensitiveDict(headers)
+        res._content = content
+        res.url = url
+        res.encoding = 'utf-8'
+        return res
+
+    def set(self, key, res):
+        headers = {
+            name: value
+            for name, value in res.headers.items()
+            if name not in DROPPED_HEADERS
+        }
+        self._set(key, (res.status_code, headers, res.content, res.url))
+
+    def _get(self, key):
+        raise NotImplementedError()
+
+    def _set(self, key, entry):
+        raise NotImplementedError()
+
+
+class MemoryCache(ResponseCache):
+    '''
+    An in-memory, least recently used cache of up to `maxsize` responses,
+    each kept for at most `ttl` seconds
+    '''
+
+    def __init__(self, maxsize=1024, **kwargs):
+        super(MemoryCache, self).__init__(**kwargs)
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'never_cache': self.never_cache,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, key):
+        with self._lock:
+            try:
+                expires, entry = self._entries[key]
+            except KeyError:
+                return None
+
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return entry
+
+    def _set(self, key, entry):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class DiskCache(ResponseCache):
+    '''
+    A cache stored in an SQLite database at `path`, so it can be shared
+    between processes and survive restarts
+    '''
+
+    def __init__(self, path, **kwargs):
+        super(DiskCache, self).__init__(**kwargs)
+        self.path = path
+        self._db = None
+        self._pid = None
+        with self._connection() as db:
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, expires REAL, status_code INTEGER, '
+                'headers TEXT, content BLOB, url TEXT)'
+            )
+            db.execute(
+                'CREATE INDEX IF NOT EXISTS responses_expires '
+                'ON responses (expires)'
+            )
+
+    def __getstate__(self):
+        return {
+            'path': self.path,
+            'ttl': self.ttl,
+            'never_cache': self.never_cache,
+        }
+
+    def close(self):
+        if self._pid == os.getpid():
+            self._db.close()
+            self._pid = None
+
+    def _connection(self):
+        # sqlite connections mustn't be used across a fork, so a forked
+        # child opens its own, as it does its own lock
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._pid = os.getpid()
+        return self._db
+
+    def _get(self, key):
+        db = self._connection()
+        with self._lock:
+            row = db.execute(
+                'SELECT status_code, headers, content, url FROM responses '
+                'WHERE key = ? AND expires >= ?',
+                (key, time.time())
+            ).fetchone()
+
+        if row is None:
+            return None
+        status_code, headers, content, url = row
+        return status_code, codec.loads(headers), bytes(content), url
+
+    def _set(self, key, entry):
+        status_code, headers, content, url = entry
+        db = self._connection()
+        with self._lock, db:
+            db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                (
+                    key, time.time() + self.ttl, status_code,
+                    codec.dumpb(headers), content, url
+                )
+            )
+            db.execute(
+                'DELETE FROM responses WHERE expires < ?', (time.time(),)
+            )
@@ -0,0 +1,780 @@
+import os
+import time
+import socket
+import weakref
+import threading
+from contextlib import closing
+
+from requests import Request, Session
+from requests.adapters import (
+    DEFAULT_POOLBLOCK, DEFAULT_POOLSIZE, DEFAULT_RETRIES, HTTPAdapter
+)
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from . import DEFAULT_BASE_URL, quote_url, translate_request_headers
+from .audio import DEFAULT_CHUNK_SIZE, AudioStream, MappedAudio, iter_audio
+from .auth import Signer
+from .batch import imap_ordered
+from .compression import Compression, DecodingResponse
+from .exceptions import HoundipyException
+from .policy import Policy
+from .ratelimit import BATCH, INTERACTIVE
+from .request_info import RequestInfoTemplate
+from .response import HoundResponse
+from .store import MemoryStore
+from .streaming import HoundServer, iter_events
+from .trace import count_sent, current_trace, start_trace
+
+
+class PoolStats:
+    '''
+    Counts how the connection pools of a :class:`HoundifyAdapter` are used,
+    for tuning `pool_maxsize` and `pool_block`.
+
+    `requests` is the number of times a connection was taken from a pool,
+    `new_connections` the number of those for which a connection had to be
+    opened, and `waits` the number of times a request had to wait for a
+    connection to be returned to a full, blocking pool.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.waits = 0
+
+    def __repr__(self):
+        return '<PoolStats hits={} new_connections={} waits={}>'.format(
+            self.hits, self.new_connections, self.waits
+        )
+
+    @property
+    def hits(self):
+        return self.requests - self.new_connections
+
+    def count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+
+class CountingPoolMixin:
+    stats = None
+
+    def _get_conn(self, timeout=None):
+        if self.block and self.pool is not None and self.pool.empty():
+            self.stats.count('waits')
+        self.stats.count('requests')
+        return super(CountingPoolMixin, self)._get_conn(timeout)
+
+    def _new_conn(self):
+        self.stats.count('new_connections')
+        return super(CountingPoolMixin, self)._new_conn()
+
+    def _make_request(self, conn, *args, **kwargs):
+        trace = current_trace()
+        if trace is not None:
+            trace.reused_connection = conn.sock is not None
+        return super(CountingPoolMixin, self)._make_request(
+            conn, *args, **kwargs
+        )
+
+
+def keepalive_socket_options():
+    '''
+    Socket options enabling TCP keep-alive, so idle pooled connections
+    aren't silently dropped by NATs and load balancers in between
+    '''
+    options = list(HTTPConnection.default_socket_options)
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    for name, value in [
+        ('TCP_KEEPIDLE', 60), ('TCP_KEEPINTVL', 15), ('TCP_KEEPCNT', 4)
+    ]:
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+
+# adapters whose pooled connections need discarding in a forked child
+_adapters = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for adapter in list(_adapters):
+        adapter.reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class HoundifyAdapter(Signer, HTTPAdapter):
+    '''
+    `pool_connections`, `pool_maxsize`, `pool_block` and `max_retries` are
+    passed to :class:`requests.adapters.HTTPAdapter`. `tcp_keepalive`
+    enables TCP keep-alive on pooled connections.
+
+    `policy` is a :class:`houndipy.policy.Policy` governing timeouts,
+    retries and hedging; by default each attempt times out after 30
+    seconds and failures are retried twice.
+
+    `compression` is a :class:`houndipy.compression.Compression`; by
+    default gzip and deflate responses are accepted, and request bodies
+    are sent uncompressed.
+
+    Only the configuration is pickled, and after a fork the child starts
+    with empty connection pools rather than sharing the parent's sockets.
+    '''
+
+    # how long a signature made ahead of time by sign_many is used for
+    PRESIGNED_TTL = 60
+
+    __attrs__ = HTTPAdapter.__attrs__ + [
+        'user_id', 'client_id', 'client_key', 'tcp_keepalive', 'policy',
+        'compression'
+    ]
+
+    def __init__(self, client_id, client_key,
+                 pool_connections=DEFAULT_POOLSIZE,
+                 pool_maxsize=DEFAULT_POOLSIZE, pool_block=DEFAULT_POOLBLOCK,
+                 max_retries=DEFAULT_RETRIES, tcp_keepalive=True,
+                 policy=None, compression=None):
+        Signer.__init__(self, client_id, client_key)
+
+        self.tcp_keepalive = tcp_keepalive
+        self.policy = policy or Policy()
+        self.compression = compression or Compression()
+        self.pool_stats = PoolStats()
+
+        HTTPAdapter.__init__(
+            self,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=max_retries
+        )
+        _adapters.add(self)
+
+    __getstate__ = HTTPAdapter.__getstate__
+
+    def __setstate__(self, state):
+        Signer.__init__(
+            self, state['client_id'], state['client_key'], state['user_id']
+        )
+        self.pool_stats = PoolStats()
+
+        HTTPAdapter.__setstate__(self, state)
+        _adapters.add(self)
+
+    def reset(self):
+        '''
+        Forgets all pooled connections without closing them, as they may
+        belong to another process
+        '''
+        self.pool_stats = PoolStats()
+        self.policy.reset()
+        self.proxy_manager = {}
+        self.init_poolmanager(
+            self._pool_connections, self._pool_maxsize, block=self._pool_block
+        )
+
+    def init_poolmanager(self, connections, maxsize, block=DEFAULT_POOLBLOCK,
+                         **pool_kwargs):
+        if self.tcp_keepalive:
+            pool_kwargs.setdefault(
+                'socket_options', keepalive_socket_options()
+            )
+
+        super(HoundifyAdapter, self).init_poolmanager(
+            connections, maxsize, block, **pool_kwargs
+        )
+
+        stats = {'stats': self.pool_stats}
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': type(
+                'CountingHTTPConnectionPool',
+                (CountingPoolMixin, HTTPConnectionPool), stats
+            ),
+            'https': type(
+                'CountingHTTPSConnectionPool',
+                (CountingPoolMixin, HTTPSConnectionPool), stats
+            ),
+        }
+
+    def prewarm(self, url, connections, verify=True, cert=None,
+                proxies=None):
+        '''
+        Opens up to `connections` connections to the host of `url` ahead of
+        time, so that the first requests don't pay for the TCP and TLS
+        handshakes. `verify`, `cert` and `proxies` must be those requests
+        will be sent with, as each combination has a pool of its own.
+        '''
+        # the pool requests will take connections from, for the same url
+        request = Request('POST', url).prepare()
+        pool = self.get_connection_with_tls_context(
+            request, verify, proxies=proxies, cert=cert
+        )
+        conns = []
+        try:
+            for _ in range(min(connections, self._pool_maxsize)):
+                conn = pool._get_conn()
+                conn.connect()
+                conns.append(conn)
+        finally:
+            for conn in conns:
+                pool._put_conn(conn)
+        return len(conns)
+
+    def send(self, request, **kwargs):
+        compression = self.compression
+        if compression.accept_encoding is None:
+            request.headers.pop('Accept-Encoding', None)
+        else:
+            request.headers['Accept-Encoding'] = compression.accept_encoding
+        request.body = compression.compress(request.headers, request.body)
+
+        trace = current_trace()
+        if trace is not None:
+            request.body = count_sent(trace, request.body)
+
+        request.url = quote_url(request.url)
+        translate_request_headers(request.headers)
+
+        return self.policy.send(self._attempt, request, **kwargs)
+
+    def _attempt(self, request, **kwargs):
+        # signed for each attempt, so retries don't reuse a stale timestamp
+        trace = current_trace()
+        if trace is not None:
+            trace.attempts += 1
+
+        if self._take_presigned(request):
+            # already signed, by sign_many
+            pass
+        elif trace is None:
+            self.sign_request(request)
+        else:
+            with trace.phase('sign'):
+                self.sign_request(request)
+
+        if trace is None:
+            response = self._transmit(request, **kwargs)
+        else:
+            with trace.phase('send'):
+                response = self._transmit(request, **kwargs)
+            trace.status_code = response.status_code
+
+        encoding = response.headers.pop(
+            'Hound-Response-Content-Encoding', None
+        )
+        if 'Content-Encoding' in response.headers:
+            # which urllib3 decodes itself
+            encoding = None
+        if encoding is not None or trace is not None:
+            response.raw = DecodingResponse(response.raw, encoding, trace)
+
+        return response
+
+    def _transmit(self, request, **kwargs):
+        # sends a signed request once, over whichever transport
+        return super(HoundifyAdapter, self).send(request, **kwargs)
+
+    def sign_request(self, request, timestamp=None):
+        '''
+        Signs a PreparedRequest in place
+        '''
+        request.headers.update(self.auth_headers(timestamp=timestamp))
+        return request
+
+    def sign_many(self, requests):
+        '''
+        Signs a batch of PreparedRequests in place, for pre-signing a queue of
+        work; they all share the one timestamp.
+
+        When sent through this adapter within :attr:`PRESIGNED_TTL` seconds,
+        the first attempt at each uses its signature rather than signing
+        again; retries, and hedged copies, are still signed afresh.
+        '''
+        timestamp = int(time.time())
+        for request in requests:
+            self.sign_request(request, timestamp)
+            request._houndipy_presigned = timestamp
+        return requests
+
+    def _take_presigned(self, request):
+        # a signature from sign_many is only good for one attempt
+        timestamp = request.__dict__.pop('_houndipy_presigned', None)
+        return (
+            timestamp is not None and
+            time.time() - timestamp < self.PRESIGNED_TTL
+        )
+
+
+class Conversation:
+    def __init__(self, client, template=None, session_id=None, store=None):
+        self.client = client
+        self.template = template or client.request_info
+        self.session_id = session_id
+        self.store = store
+        self._converstation_state = None
+
+    @property
+    def converstation_state(self):
+        if self.store is not None:
+            return self.store.load(self.session_id)
+        return self._converstation_state
+
+    @converstation_state.setter
+    def converstation_state(self, state):
+        if self.store is not None:
+            self.store.save(self.session_id, state)
+        else:
+            self._converstation_state = state
+
+    def _conversation_state_request(self, func, *args, **kwargs):
+        kwargs.setdefault('ConversationState', self.converstation_state or {})
+        kwargs.setdefault('template', self.template)
+
+        res = func(*args, **kwargs)
+
+        if res.all_results:
+            self.converstation_state = res.conversation_state
+        return res
+
+    def _conversation_state_stream(self, func, *args, **kwargs):
+        kwargs.setdefault('ConversationState', self.converstation_state or {})
+        kwargs.setdefault('template', self.template)
+
+        for event in func(*args, **kwargs):
+            if isinstance(event, HoundServer) and event.get('AllResults'):
+                self.converstation_state = (
+                    event['AllResults'][0]['ConversationState']
+                )
+            yield event
+
+    def text(self, *args, **kwargs):
+        return self._conversation_state_request(
+            self.client.text,
+            *args, **kwargs
+        )
+
+    def speech(self, *args, **kwargs):
+        return self._conversation_state_request(
+            self.client.speech,
+            *args, **kwargs
+        )
+
+    def stream_text(self, *args, **kwargs):
+        return self._conversation_state_stream(
+            self.client.stream_text,
+            *args, **kwargs
+        )
+
+    def stream_speech(self, *args, **kwargs):
+        return self._conversation_state_stream(
+            self.client.stream_speech,
+            *args, **kwargs
+        )
+
+
+class Client:
+
+    def __init__(self, client_id, client_key, request_info=None, prewarm=0,
+                 cache=None, conversation_store=None, rate_limiter=None,
+                 single_flight=None, base_url=DEFAULT_BASE_URL, http2=False,
+                 **adapter_kwargs):
+        '''
+        `request_info` is sent with every request, and may be either a
+        dict or a :class:`houndipy.request_info.RequestInfoTemplate`.
+
+        `cache` may be a :class:`houndipy.cache.ResponseCache` to cache text
+        query responses in.
+
+        `conversation_store` is a :class:`houndipy.store.ConversationStore`
+        for conversations with a session id, by default in memory.
+
+        `rate_limiter` is a :class:`houndipy.ratelimit.RateLimiter` which
+        every request sent takes a token from, to stay within Houndify's
+        quota; share one between clients, or use a
+        :class:`houndipy.ratelimit.FileTokenBucket` to share one between
+        processes.
+
+        `single_flight` may be a :class:`houndipy.coalesce.SingleFlight`, so
+        that identical text queries made at the same time share one
+        request. Each caller still gets a :class:`HoundResponse` of its own.
+
+        `base_url` is where the API is found, for pointing the client at a
+        proxy or a :class:`houndipy.testing.MockHoundServer`.
+
+        `adapter_kwargs` configure connection pooling and the retry policy,
+        see :class:`HoundifyAdapter`. If `prewarm` is given, that many
+        connections are opened up front.
+
+        If `http2` is set, requests are sent over HTTP/2 by a
+        :class:`houndipy.http2.HTTP2Adapter`, which needs httpx.
+        '''
+        if http2:
+            from .http2 import HTTP2Adapter
+            self.adapter = HTTP2Adapter(
+                client_id, client_key, **adapter_kwargs
+            )
+        else:
+            self.adapter = HoundifyAdapter(
+                client_id, client_key, **adapter_kwargs
+            )
+        self.base_url = base_url
+        self._session = None
+        self.cache = cache
+        if conversation_store is None:
+            # not `or`, as an empty store is falsy
+            conversation_store = MemoryStore()
+        self.conversation_store = conversation_store
+        self.rate_limiter = rate_limiter
+        self.single_flight = single_flight
+
+        if prewarm:
+            self.prewarm(prewarm)
+
+        if not isinstance(request_info, RequestInfoTemplate):
+            request_info = RequestInfoTemplate(**(request_info or {}))
+        self.request_info = request_info
+
+    def __getstate__(self):
+        # the session is rebuilt on demand, in whichever process needs it
+        state = self.__dict__.copy()
+        state['_session'] = None
+        return state
+
+    @property
+    def _sess(self):
+        if self._session is None:
+            self._session = Session()
+            self._session.mount(self.base_url, self.adapter)
+        return self._session
+
+    @property
+    def pool_stats(self):
+        return self.adapter.pool_stats
+
+    def prewarm(self, connections):
+        # with the settings requests would send to base_url with
+        settings = self._sess.merge_environment_settings(
+            self.base_url, {}, None, None, None
+        )
+        return self.adapter.prewarm(
+            self.base_url, connections, verify=settings['verify'],
+            cert=settings['cert'], proxies=settings['proxies']
+        )
+
+    def converse(self, session_id=None, **request_info):
+        '''
+        `request_info` is sent with every request in the conversation, in
+        addition to the client wide request info.
+
+        If a `session_id` is given, it is sent as the SessionID, and the
+        ConversationState is kept in the client's conversation store under
+        it rather than on the conversation object, so the conversation can
+        be continued by any worker sharing the store.
+        '''
+        if session_id is None:
+            return Conversation(self, self.request_info.extend(**request_info))
+
+        return Conversation(
+            self,
+            self.request_info.extend(SessionID=session_id, **request_info),
+            session_id,
+            self.conversation_store
+        )
+
+    def _post(self, url, request_info, template=None, **kwargs):
+        template = template or self.request_info
+
+        trace = current_trace()
+        if trace is None:
+            header = template.render(request_info)
+        else:
+            with trace.phase('encode'):
+                header = template.render(request_info)
+
+        return self._sess.post(
+            url, headers={'Hound-Request-Info': header}, **kwargs
+        )
+
+    def _throttle(self, priority, trace=None):
+        if self.rate_limiter is None:
+            return
+        if trace is None:
+            self.rate_limiter.acquire(priority)
+        else:
+            with trace.phase('throttle'):
+                self.rate_limiter.acquire(priority)
+
+    def _request(self, url, request_info, template=None, **kwargs):
+        trace = start_trace(url)
+        if trace is None:
+            return self._fetch(url, request_info, template, **kwargs)
+
+        with trace:
+            return self._fetch(url, request_info, template, trace, **kwargs)
+
+    def _fetch(self, url, request_info, template=None, trace=None,
+               priority=INTERACTIVE, **kwargs):
+        template = template or self.request_info
+
+        key = None
+        cache = self.cache
+        if (
+            cache is not None and
+            'data' not in kwargs and
+            cache.cacheable(template, request_info)
+        ):
+            key = cache.key(url, kwargs.get('params'), template, request_info)
+            res = cache.get(key)
+            if res is not None:
+                if trace is not None:
+                    trace.cache_hit = True
+                return HoundResponse(res)
+
+        flight = self.single_flight
+        if (
+            flight is None or
+            'data' in kwargs or
+            not flight.coalescable(template, request_info)
+        ):
+            return self._send(
+                url, request_info, template, trace, priority, key, **kwargs
+            )
+
+        flight_key = key
+        if flight_key is None:
+            flight_key = flight.key(
+                url, kwargs.get('params'), template, request_info
+            )
+        res, coalesced = flight.do(flight_key, lambda: self._send(
+            url, request_info, template, trace, priority, key, **kwargs
+        ))
+        if coalesced:
+            if trace is not None:
+                trace.coalesced = True
+            # parsed separately, so callers can't see each other's changes
+            res = HoundResponse(res.response, res.content)
+        return res
+
+    def _send(self, url, request_info, template, trace, priority, key,
+              **kwargs):
+        # `key` is the cache key, if the response is to be cached
+        self._throttle(priority, trace)
+
+        if trace is not None:
+            # otherwise requests reads the body before we can time it
+            kwargs.setdefault('stream', True)
+
+        res = HoundResponse(self._post(url, request_info, template, **kwargs))
+
+        if trace is None:
+            error_message = res.error_message
+        else:
+            with trace.phase('read'):
+                res.content
+            with trace.phase('parse'):
+                error_message = res.error_message
+
+        if error_message is not None:
+            raise HoundipyException(error_message)
+
+        if key is not None and res.status_code == 200:
+            self.cache.set(key, res)
+        return res
+
+    def _stream(self, url, request_info, template=None,
+                priority=INTERACTIVE, **kwargs):
+        template = template or self.request_info
+        request_info.setdefault('PartialTranscriptsDesired', True)
+        request_info.setdefault('ResultUpdateAllowed', True)
+
+        trace = start_trace(url)
+        if trace is None:
+            self._throttle(priority)
+            res = self._post(
+                url, request_info, template, stream=True, **kwargs
+            )
+            yield from self._stream_events(res, request_info, template)
+            return
+
+        error = None
+        try:
+            # only current while sending, as the caller may well make other
+            # requests between events
+            with trace.active():
+                self._throttle(priority, trace)
+                res = self._post(
+                    url, request_info, template, stream=True, **kwargs
+                )
+            with trace.phase('stream'):
+                yield from self._stream_events(res, request_info, template)
+        except GeneratorExit:
+            raise
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            trace.finish(error)
+
+    def _stream_events(self, res, request_info, template):
+        with closing(res):
+            events = iter_events(
+                res.iter_content(chunk_size=None),
+                request_info.get(
+                    'ObjectByteCountPrefix',
+                    template.request_info.get('ObjectByteCountPrefix', False)
+                )
+            )
+            for event in events:
+                if 'ErrorMessage' in event:
+                    raise HoundipyException(event['ErrorMessage'])
+                yield event
+
+    def text(self, query, template=None, timeout=None,
+             priority=INTERACTIVE, **kwargs):
+        '''
+        `timeout` is the deadline in seconds for the query, including any
+        retries, in place of that of the client's
+        :class:`houndipy.policy.Policy`.
+
+        `priority` is the query's class for the client's rate limiter,
+        :data:`houndipy.ratelimit.INTERACTIVE` or
+        :data:`houndipy.ratelimit.BATCH`.
+        '''
+        return self._request(
+            self.base_url + 'v1/text',
+            params={'query': query},
+            template=template,
+            request_info=kwargs,
+            timeout=timeout,
+            priority=priority
+        )
+
+    def speech(self, audio, chunk_size=DEFAULT_CHUNK_SIZE, template=None,
+               timeout=None, priority=INTERACTIVE, **kwargs):
+        '''
+        `audio` may be bytes, the path to an audio file, a buffer such as a
+        memoryview or mmap, a file-like object, or an iterator of audio
+        frames (such as an :class:`houndipy.audio.AudioStream`), in which case
+        frames are uploaded as they are produced. Paths and buffers are sent
+        in slices without being copied, as a
+        :class:`houndipy.audio.MappedAudio`.
+
+        `timeout` and `priority` are as for :meth:`text`.
+        '''
+        if hasattr(audio, '__aiter__'):
+            raise TypeError(
+                'async iterators require houndipy.aio.AsyncClient'
+            )
+        data = iter_audio(audio, chunk_size)
+        try:
+            return self._request(
+                self.base_url + 'v1/audio',
+                data=data,
+                template=template,
+                request_info=kwargs,
+                timeout=timeout,
+                priority=priority
+            )
+        finally:
+            _finish(audio, data)
+
+    def stream_text(self, query, template=None, timeout=None,
+                    priority=INTERACTIVE, **kwargs):
+        '''
+        Like :meth:`text`, but yields :class:`houndipy.streaming.HoundEvent`
+        objects as they arrive instead of waiting for the whole response
+        '''
+        return self._stream(
+            self.base_url + 'v1/text',
+            params={'query': query},
+            template=template,
+            request_info=kwargs,
+            timeout=timeout,
+            priority=priority
+        )
+
+    def stream_speech(self, audio, chunk_size=DEFAULT_CHUNK_SIZE,
+                      template=None, timeout=None, priority=INTERACTIVE,
+                      **kwargs):
+        '''
+        Like :meth:`speech`, but yields
+        :class:`houndipy.streaming.HoundPartialTranscript` objects, followed
+        by the HoundServer object and any HoundUpdate objects, as they
+        arrive.
+
+        requests sends the whole of the audio before reading any of the
+        response, so nothing arrives until the upload has finished, even
+        when `audio` is an iterator still being recorded. For transcripts
+        while the user is still talking, use
+        :meth:`houndipy.aio.AsyncClient.stream_speech`, which reads the
+        response as the audio is uploaded.
+        '''
+        if hasattr(audio, '__aiter__'):
+            raise TypeError(
+                'async iterators require houndipy.aio.AsyncClient'
+            )
+        data = iter_audio(audio, chunk_size)
+        return _finishing(audio, data, self._stream(
+            self.base_url + 'v1/audio',
+            data=data,
+            template=template,
+            request_info=kwargs,
+            timeout=timeout,
+            priority=priority
+        ))
+
+    def text_many(self, queries, concurrency=8, **kwargs):
+        '''
+        Runs :meth:`text` for each of `queries` from `concurrency` threads,
+        sharing this client's connection pool, and yields
+        :class:`houndipy.batch.BatchResult` objects in the order of
+        `queries`.
+
+        `queries` may be a generator over any number of queries; only a
+        bounded number are read ahead. A failed query is reported in its
+        result rather than ending the batch. `concurrency` should be no more
+        than the `pool_maxsize` the client was created with.
+
+        Queries are sent with :data:`houndipy.ratelimit.BATCH` priority
+        unless another is given.
+        '''
+        kwargs.setdefault('priority', BATCH)
+        return imap_ordered(
+            lambda query: self.text(query, **kwargs),
+            queries,
+            concurrency
+        )
+
+    def speech_many(self, audios, concurrency=8, **kwargs):
+        '''
+        Like :meth:`text_many`, but for :meth:`speech`. Each of `audios` may
+        be a path to an audio file, which is only opened when it is sent.
+        '''
+        kwargs.setdefault('priority', BATCH)
+        return imap_ordered(
+            lambda audio: self.speech(audio, **kwargs),
+            audios,
+            concurrency
+        )
+
+
+def _finish(audio, data):
+    # once the request is over, nothing will read any more of the audio,
+    # so a producer still writing to a stream mustn't be left waiting, and
+    # files mapped for the request are unmapped
+    if isinstance(audio, AudioStream):
+        audio.abort()
+    if data is not audio and isinstance(data, MappedAudio):
+        data.close()
+
+
+def _finishing(audio, data, events):
+    try:
+        yield from events
+    finally:
+        _finish(audio, data)
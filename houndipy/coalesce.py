@@ -0,0 +1,158 @@
+import os
+import weakref
+import threading
+from functools import partial
+
+from .cache import request_key
+
+
+class CoalesceStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.bypasses = 0
+
+    def __repr__(self):
+        return '<CoalesceStats leaders={} coalesced={} bypasses={}>'.format(
+            self.leaders, self.coalesced, self.bypasses
+        )
+
+    def count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+
+# single flights whose calls in flight belong to the parent, in a forked
+# child
+_flights = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for flight in list(_flights):
+        flight.reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    '''
+    Coalesces identical text queries made at the same time, so that only
+    the first is sent, and everyone asking gets its response.
+
+    Queries are identified the same way as by
+    :class:`houndipy.cache.ResponseCache`. Those setting any of the
+    `never_coalesce` fields, by default ConversationState, are always sent
+    on their own, as are speech queries.
+
+    Threads and asyncio tasks are coalesced separately, tasks only with
+    others on the same event loop. :attr:`stats` counts the queries sent
+    (`leaders`), those that waited on another's instead (`coalesced`), and
+    those that couldn't be (`bypasses`).
+    '''
+
+    def __init__(self, never_coalesce=('ConversationState',)):
+        self.never_coalesce = tuple(never_coalesce)
+        self.stats = CoalesceStats()
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = {}
+        _flights.add(self)
+
+    def __getstate__(self):
+        return {'never_coalesce': self.never_coalesce}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def reset(self):
+        '''
+        Forgets the queries in flight, whose threads and event loops don't
+        survive a fork, along with any locks they held
+        '''
+        self.stats._lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = {}
+
+    def coalescable(self, template, request_info):
+        for field in self.never_coalesce:
+            if request_info.get(field) or template.request_info.get(field):
+                self.stats.count('bypasses')
+                return False
+        return True
+
+    def key(self, url, params, template, request_info):
+        return request_key(url, params, template, request_info)
+
+    def do(self, key, func):
+        '''
+        Calls `func`, unless another thread is already doing so for `key`,
+        in which case its result is waited for instead. Returns the result
+        and whether it came from another thread; exceptions are shared too.
+        '''
+        with self._lock:
+            call = self._calls.get(key)
+            coalesced = call is not None
+            if not coalesced:
+                call = self._calls[key] = _Call()
+
+        if coalesced:
+            self.stats.count('coalesced')
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        self.stats.count('leaders')
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    async def do_async(self, key, func):
+        '''
+        Like :meth:`do`, but awaits the coroutine returned by `func`.
+
+        It is run in a task of its own, so that it carries on for the
+        others waiting on it if whoever started it is cancelled.
+        '''
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        key = (loop, key)
+
+        with self._lock:
+            task = self._tasks.get(key)
+            coalesced = task is not None
+            if not coalesced:
+                task = self._tasks[key] = loop.create_task(func())
+                task.add_done_callback(partial(self._task_done, key))
+
+        self.stats.count('coalesced' if coalesced else 'leaders')
+        return await asyncio.shield(task), coalesced
+
+    def _task_done(self, key, task):
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+        if not task.cancelled():
+            # retrieved, in case everyone waiting on it was cancelled
+            task.exception()
@@ -0,0 +1,122 @@
+'''
+JSON encoding and decoding for the rest of houndipy, using orjson or
+ujson when one is installed, as parsing responses is the largest CPU cost
+of a query after the network.
+
+The Hound-Request-Info header and cache keys are always encoded by the
+standard library, with :func:`dumps`, so they are ASCII and byte for byte
+the same whichever backend is in use. Only parsing, with :func:`loads`,
+and internal storage, with :func:`dumpb`, use the faster backends.
+
+Set ``HOUNDIPY_JSON=json`` in the environment, or call :func:`use`, to
+pick a backend explicitly.
+'''
+import os
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+BACKENDS = ('orjson', 'ujson', 'json')
+
+backend = None
+_loads = json.loads
+_dumpb = None
+
+
+def _json_dumpb(obj):
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+def _orjson_dumpb(obj):
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        # such as integers too large for orjson
+        return _json_dumpb(obj)
+
+
+def _ujson_dumpb(obj):
+    return ujson.dumps(obj, ensure_ascii=False).encode()
+
+
+def available():
+    return [
+        name for name, module in zip(BACKENDS, (orjson, ujson, json))
+        if module is not None
+    ]
+
+
+def use(name=None):
+    '''
+    Switches to the backend `name`, one of :data:`BACKENDS`, or the
+    fastest installed if None
+    '''
+    global backend, _loads, _dumpb
+
+    if name is None:
+        name = available()[0]
+    elif name not in available():
+        raise ValueError('JSON backend not available: {!r}'.format(name))
+
+    backend = name
+    if name == 'orjson':
+        _loads, _dumpb = orjson.loads, _orjson_dumpb
+    elif name == 'ujson':
+        _loads, _dumpb = ujson.loads, _ujson_dumpb
+    else:
+        _loads, _dumpb = json.loads, _json_dumpb
+
+
+def loads(data):
+    '''
+    Parses JSON from bytes or str; accepts exactly what :func:`json.loads`
+    does, raising ValueError otherwise
+    '''
+    if _loads is not json.loads:
+        try:
+            return _loads(data)
+        except ValueError:
+            # the standard library also allows NaN, big numbers and the
+            # like, and gives the error everyone expects otherwise
+            pass
+    return json.loads(data)
+
+
+def loads_exact(data):
+    '''
+    Parses `data` with the backend alone, raising ValueError unless it is
+    exactly one JSON value, for trying the common case before falling back
+    to something slower
+    '''
+    return _loads(data)
+
+
+def dumps(obj, sort_keys=False):
+    '''
+    Encodes `obj` as :func:`json.dumps` does, for where the output has to
+    be stable: ASCII, with the standard library's separators
+    '''
+    return json.dumps(obj, sort_keys=sort_keys)
+
+
+def dumpb(obj):
+    '''
+    Encodes `obj` as compact UTF-8 bytes, for storage that is only ever
+    read back by :func:`loads`
+    '''
+    return _dumpb(obj)
+
+
+try:
+    use(os.environ.get('HOUNDIPY_JSON') or None)
+except ValueError:
+    # asked for one that isn't installed
+    use()
@@ -0,0 +1,201 @@
+import zlib
+
+from urllib3.exceptions import DecodeError
+
+ENCODINGS = ('gzip', 'deflate')
+
+
+class Compression:
+    '''
+    Compression settings for a client.
+
+    `accept_encoding` is offered to Houndify for responses, which are then
+    decoded as they are read, so streamed responses don't wait for the
+    whole body. Pass None to ask for uncompressed responses.
+
+    If `request_encoding` is set to ``'gzip'`` or ``'deflate'``, request
+    bodies, such as speech audio, are compressed at `level` before being
+    sent and marked with Content-Encoding. Bodies given as bytes are only
+    compressed from `min_size` bytes; those uploaded from an iterator are
+    compressed chunk by chunk, flushing after each, so audio is still sent
+    as it is produced. Only enable this for endpoints that accept
+    compressed request bodies.
+    '''
+
+    def __init__(self, accept_encoding='gzip, deflate', request_encoding=None,
+                 level=6, min_size=1024):
+        if request_encoding not in (None,) + ENCODINGS:
+            raise ValueError(
+                'Unsupported request encoding: {!r}'.format(request_encoding)
+            )
+        self.accept_encoding = accept_encoding
+        self.request_encoding = request_encoding
+        self.level = level
+        self.min_size = min_size
+
+    def __repr__(self):
+        return '<Compression accept={!r} request={!r}>'.format(
+            self.accept_encoding, self.request_encoding
+        )
+
+    def compress(self, headers, body):
+        '''
+        Returns `body` compressed if it should be, updating `headers` to
+        match
+        '''
+        encoding = self.request_encoding
+        if encoding is None or body is None or hasattr(body, 'read'):
+            return body
+
+        if isinstance(body, str):
+            body = body.encode()
+
+        if isinstance(body, (bytes, bytearray)):
+            if len(body) < self.min_size:
+                return body
+            compressor = _compressor(encoding, self.level)
+            body = compressor.compress(body) + compressor.flush()
+            headers['Content-Length'] = str(len(body))
+        elif hasattr(body, '__aiter__'):
+            body = _acompress(body, encoding, self.level)
+        else:
+            body = _compress(body, encoding, self.level)
+        if not isinstance(body, bytes):
+            # compressed as it is sent, so its length isn't known
+            headers.pop('Content-Length', None)
+
+        headers['Content-Encoding'] = encoding
+        return body
+
+
+def _compressor(encoding, level):
+    # 16 adds a gzip header and trailer rather than zlib's
+    wbits = 16 + zlib.MAX_WBITS if encoding == 'gzip' else zlib.MAX_WBITS
+    return zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+
+def _compress(chunks, encoding, level):
+    compressor = _compressor(encoding, level)
+    for chunk in chunks:
+        # flushing sends each chunk on now, rather than when zlib's buffer
+        # fills up
+        data = compressor.compress(chunk)
+        data += compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def _acompress(chunks, encoding, level):
+    compressor = _compressor(encoding, level)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        data += compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class Decoder:
+    '''
+    Incrementally decodes a gzip or deflate body; deflate bodies may be
+    zlib wrapped, as the standard says, or raw, as some servers send
+    '''
+
+    def __init__(self, encoding):
+        if encoding not in ENCODINGS:
+            raise ValueError('Unsupported encoding: {!r}'.format(encoding))
+        # 32 lets zlib detect gzip and zlib headers itself
+        self._decompressor = zlib.decompressobj(32 + zlib.MAX_WBITS)
+        self._raw_fallback = encoding == 'deflate'
+
+    def decompress(self, data):
+        try:
+            return self._decompressor.decompress(data)
+        except zlib.error:
+            if not self._raw_fallback:
+                raise
+            self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            return self._decompressor.decompress(data)
+        finally:
+            # only the first chunk can tell us it's raw deflate
+            self._raw_fallback = False
+
+    def flush(self):
+        return self._decompressor.flush()
+
+
+def decoder(encoding):
+    '''
+    Returns a :class:`Decoder` for a Hound-Response-Content-Encoding, or
+    None if it isn't one we decode
+    '''
+    if encoding in ENCODINGS:
+        return Decoder(encoding)
+    return None
+
+
+def decode(encoding, body):
+    dec = decoder(encoding)
+    if dec is None:
+        return body
+    return dec.decompress(body) + dec.flush()
+
+
+def iter_decoded(chunks, encoding):
+    dec = decoder(encoding)
+    if dec is None:
+        yield from chunks
+        return
+
+    for chunk in chunks:
+        data = dec.decompress(chunk)
+        if data:
+            yield data
+    data = dec.flush()
+    if data:
+        yield data
+
+
+class DecodingResponse:
+    '''
+    Wraps a urllib3 response, decoding its body as it is streamed.
+
+    Houndify gives the encoding in Hound-Response-Content-Encoding rather
+    than Content-Encoding, so urllib3 won't decode it for us. requests
+    reads the body through :meth:`stream`, both for ``iter_content`` and
+    ``content``; anything else is passed through to the wrapped response.
+
+    If a `trace` is given, the body's bytes are added to its
+    `bytes_received` as they are read, before decoding; urllib3's
+    ``tell()`` doesn't count chunked responses, which is how Houndify
+    answers.
+    '''
+
+    def __init__(self, raw, encoding, trace=None):
+        self._raw = raw
+        self._encoding = encoding
+        self._trace = trace
+
+    def __getattr__(self, name):
+        if name.startswith('__') or name in ('_raw', '_encoding', '_trace'):
+            raise AttributeError(name)
+        return getattr(self._raw, name)
+
+    def stream(self, amt=2 ** 16, decode_content=None):
+        chunks = self._raw.stream(amt, decode_content=decode_content)
+        if self._trace is not None:
+            chunks = self._counting(chunks)
+        try:
+            yield from iter_decoded(chunks, self._encoding)
+        except zlib.error as e:
+            # which requests turns into a ContentDecodingError
+            raise DecodeError(
+                'Failed to decode {} response body'.format(self._encoding)
+            ) from e
+
+    def _counting(self, chunks):
+        trace = self._trace
+        for chunk in chunks:
+            trace.bytes_received += len(chunk)
+            yield chunk
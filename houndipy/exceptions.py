@@ -2,3 +2,11 @@
 
 class HoundipyException(Exception):
     pass
+
+
+class RequestInfoError(HoundipyException, ValueError):
+    pass
+
+
+class AudioStreamAborted(HoundipyException):
+    pass
@@ -0,0 +1,220 @@
+'''
+An HTTP/2 transport for :class:`houndipy.Client`, using httpx.
+
+    client = Client(client_id, client_key, http2=True)
+
+Requests are sent as streams multiplexed over a few connections, rather
+than each in-flight request holding a connection of its own. Needs httpx
+with HTTP/2 support, from ``pip install httpx[http2]``.
+'''
+import ssl
+import os.path
+import threading
+
+from requests.exceptions import (
+    ConnectionError, ConnectTimeout, ReadTimeout, SSLError
+)
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError
+
+try:
+    import h2
+    import httpx
+except ImportError:
+    h2 = httpx = None
+
+from .client import HoundifyAdapter
+from .audio import DEFAULT_CHUNK_SIZE
+from .exceptions import HoundipyException
+
+
+class HTTP2Adapter(HoundifyAdapter):
+    '''
+    A :class:`houndipy.HoundifyAdapter` sending requests over HTTP/2.
+
+    Signing, compression, the retry policy and tracing work as they do
+    over HTTP/1.1. `pool_maxsize` caps the number of connections to each
+    host, each of which carries as many concurrent requests as the server
+    allows. Servers which only speak HTTP/1.1 are still spoken to over
+    HTTP/1.1.
+
+    Over https, HTTP/2 is negotiated during the TLS handshake. Plain http
+    servers need `prior_knowledge`, which speaks HTTP/2 from the start
+    without negotiating it.
+
+    Connections aren't counted in :attr:`pool_stats`, and can't be
+    prewarmed.
+    '''
+
+    __attrs__ = HoundifyAdapter.__attrs__ + ['prior_knowledge']
+
+    def __init__(self, client_id, client_key, prior_knowledge=False,
+                 **kwargs):
+        if httpx is None:
+            raise HoundipyException(
+                'HTTP/2 requires httpx, from pip install httpx[http2]'
+            )
+        self.prior_knowledge = prior_knowledge
+        self._clients = {}
+        self._lock = threading.Lock()
+        super(HTTP2Adapter, self).__init__(client_id, client_key, **kwargs)
+
+    def __setstate__(self, state):
+        super(HTTP2Adapter, self).__setstate__(state)
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        super(HTTP2Adapter, self).reset()
+        self._clients = {}
+
+    def close(self):
+        super(HTTP2Adapter, self).close()
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            client.close()
+
+    def prewarm(self, url, connections, verify=True, cert=None,
+                proxies=None):
+        # httpx only connects when a request is sent
+        return 0
+
+    def _client(self, verify, cert):
+        # one per distinct TLS configuration, as httpx sets it per client
+        key = (verify, cert)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = httpx.Client(
+                    http1=not self.prior_knowledge,
+                    http2=True,
+                    verify=_ssl_context(verify, cert),
+                    limits=httpx.Limits(
+                        max_connections=self._pool_maxsize,
+                        max_keepalive_connections=self._pool_maxsize
+                    )
+                )
+            return client
+
+    def _transmit(self, request, stream=False, timeout=None, verify=True,
+                  cert=None, proxies=None):
+        if isinstance(cert, list):
+            cert = tuple(cert)
+        client = self._client(verify, cert)
+
+        body = request.body
+        if hasattr(body, 'read'):
+            body = iter(lambda: body.read(DEFAULT_CHUNK_SIZE), b'')
+
+        req = client.build_request(
+            request.method, request.url,
+            headers=list(request.headers.items()),
+            content=body,
+            timeout=_timeout(timeout)
+        )
+        if 'Accept-Encoding' not in request.headers:
+            # rather than httpx's default
+            del req.headers['Accept-Encoding']
+
+        try:
+            resp = client.send(req, stream=True)
+        except httpx.ConnectTimeout as e:
+            raise ConnectTimeout(e, request=request)
+        except httpx.TimeoutException as e:
+            raise ReadTimeout(e, request=request)
+        except httpx.ConnectError as e:
+            if _caused_by(e, ssl.SSLError):
+                raise SSLError(e, request=request)
+            raise ConnectionError(e, request=request)
+        except httpx.TransportError as e:
+            raise ConnectionError(e, request=request)
+
+        return self.build_response(request, HTTPXResponse(resp))
+
+
+class HTTPXResponse:
+    '''
+    Presents an httpx response as the urllib3 response requests expects,
+    so the rest of requests, and :class:`houndipy.HoundResponse`, work
+    unchanged
+    '''
+
+    def __init__(self, response):
+        self._response = response
+        self.status = response.status_code
+        self.reason = response.reason_phrase
+        self.headers = dict(response.headers.items())
+        self.version = response.http_version
+
+    @property
+    def closed(self):
+        return self._response.is_closed
+
+    def tell(self):
+        return self._response.num_bytes_downloaded
+
+    def stream(self, amt=2 ** 16, decode_content=None):
+        response = self._response
+        chunks = (
+            response.iter_bytes(amt) if decode_content
+            else response.iter_raw(amt)
+        )
+        # as urllib3's, which requests knows to turn into its own
+        try:
+            yield from chunks
+        except httpx.DecodingError as e:
+            raise DecodeError(e) from e
+        except httpx.TimeoutException as e:
+            raise ReadTimeoutError(None, None, str(e)) from e
+        except httpx.TransportError as e:
+            raise ProtocolError(str(e), e) from e
+
+    def read(self, amt=None, decode_content=None):
+        return b''.join(self.stream(amt, decode_content))
+
+    def close(self):
+        self._response.close()
+
+    def release_conn(self):
+        self._response.close()
+
+
+def _caused_by(error, cls):
+    while error is not None:
+        if isinstance(error, cls):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _timeout(timeout):
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+def _ssl_context(verify, cert):
+    if verify is True and cert is None:
+        return True
+
+    if verify is False:
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    elif isinstance(verify, str) and os.path.isdir(verify):
+        context = ssl.create_default_context(capath=verify)
+    elif isinstance(verify, str):
+        context = ssl.create_default_context(cafile=verify)
+    else:
+        context = httpx.create_ssl_context()
+
+    if isinstance(cert, tuple):
+        context.load_cert_chain(*cert)
+    elif cert is not None:
+        context.load_cert_chain(cert)
+    return context
@@ -0,0 +1,264 @@
+import time
+import random
+import threading
+from collections import deque
+from contextvars import copy_context
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from requests.exceptions import ConnectionError, SSLError, Timeout
+
+from .trace import current_trace
+
+RETRY_STATUSES = frozenset((500, 502, 503, 504))
+
+
+class DeadlineExceeded(Timeout):
+    pass
+
+
+class LatencyWindow:
+    '''
+    The most recent `size` latencies, for picking a hedging delay
+    '''
+
+    def __init__(self, size=256):
+        self._latencies = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._latencies)
+
+    def add(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def quantile(self, q):
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return None
+        return latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+
+
+class Policy:
+    '''
+    Decides how a :class:`houndipy.HoundifyAdapter` sends each request.
+
+    `timeout` applies to each attempt, and may be a ``(connect, read)``
+    tuple as with requests. `deadline`, if set, bounds the whole request
+    in seconds, across every attempt and the backoff between them; a
+    number passed as the `timeout` of a single request replaces it.
+
+    Connection errors, timeouts and `retry_statuses` responses are retried
+    up to `retries` times, after an exponential backoff starting from
+    `backoff` seconds and capped at `max_backoff`, with jitter. Only
+    requests whose body can be sent again, such as bytes or a
+    :class:`houndipy.audio.MappedAudio`, are retried, so speech queries
+    streamed from an iterator get a single attempt. Every attempt is
+    signed afresh, with a new RequestID and timestamp.
+
+    If `hedge_after` is set, text queries that haven't been answered after
+    that many seconds are sent a second time, and whichever response
+    arrives first is used. Once `hedge_min_samples` latencies have been
+    seen, the `hedge_quantile` of recent latencies is used as the delay
+    instead, so only the slowest few percent of queries are hedged.
+    '''
+
+    def __init__(self, timeout=30, deadline=None, retries=2, backoff=0.1,
+                 max_backoff=2, retry_statuses=RETRY_STATUSES,
+                 hedge_after=None, hedge_quantile=0.95,
+                 hedge_min_samples=20, hedge_workers=32):
+        self.timeout = timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = frozenset(retry_statuses)
+        self.hedge_after = hedge_after
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_workers = hedge_workers
+
+        self.latencies = LatencyWindow()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {
+            'timeout': self.timeout,
+            'deadline': self.deadline,
+            'retries': self.retries,
+            'backoff': self.backoff,
+            'max_backoff': self.max_backoff,
+            'retry_statuses': self.retry_statuses,
+            'hedge_after': self.hedge_after,
+            'hedge_quantile': self.hedge_quantile,
+            'hedge_min_samples': self.hedge_min_samples,
+            'hedge_workers': self.hedge_workers,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def reset(self):
+        '''
+        Forgets the hedging threads, which don't survive a fork
+        '''
+        self._executor = None
+
+    def hedge_delay(self):
+        if self.hedge_after is None:
+            return None
+        if len(self.latencies) >= self.hedge_min_samples:
+            return self.latencies.quantile(self.hedge_quantile)
+        return self.hedge_after
+
+    def backoff_delay(self, retry):
+        delay = min(self.max_backoff, self.backoff * 2 ** retry)
+        return random.uniform(delay / 2, delay)
+
+    def send(self, attempt, request, stream=False, timeout=None, **kwargs):
+        '''
+        Sends `request` with ``attempt(request, stream=..., timeout=...,
+        **kwargs)`` as many times as the policy allows; `attempt` signs
+        the request and sends it once
+        '''
+        if isinstance(timeout, (int, float)):
+            attempt_timeout, budget = self.timeout, timeout
+        else:
+            attempt_timeout, budget = timeout or self.timeout, self.deadline
+        deadline = None if budget is None else time.monotonic() + budget
+
+        body = request.body
+        retries = self.retries
+        if body is not None and not hasattr(body, '__len__'):
+            # an iterator or file, which can only be read once
+            retries = 0
+
+        # only text queries, which have no body, are hedged
+        hedge_delay = None if body is not None else self.hedge_delay()
+
+        retry = 0
+        while True:
+            last = retry >= retries
+            try:
+                if hedge_delay is None:
+                    response = attempt(
+                        request, stream=stream,
+                        timeout=_remaining(attempt_timeout, deadline),
+                        **kwargs
+                    )
+                else:
+                    response = self._hedged(
+                        attempt, request, hedge_delay, deadline,
+                        stream=stream, timeout=attempt_timeout, **kwargs
+                    )
+            except SSLError:
+                raise
+            except (ConnectionError, Timeout):
+                if last or not self._sleep(retry, deadline):
+                    raise
+            else:
+                if (
+                    response.status_code not in self.retry_statuses or
+                    last or
+                    not self._sleep(retry, deadline)
+                ):
+                    return response
+                response.close()
+            retry += 1
+
+    def _sleep(self, retry, deadline):
+        delay = self.backoff_delay(retry)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return False
+        time.sleep(delay)
+        return True
+
+    def _timed(self, attempt, request, **kwargs):
+        start = time.monotonic()
+        response = attempt(request, **kwargs)
+        if response.status_code not in self.retry_statuses:
+            self.latencies.add(time.monotonic() - start)
+        return response
+
+    def _executor_for_hedging(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.hedge_workers, thread_name_prefix='houndipy-hedge'
+                )
+            return self._executor
+
+    def _hedged(self, attempt, request, delay, deadline, timeout, **kwargs):
+        executor = self._executor_for_hedging()
+
+        # each attempt is signed separately, so each needs its own headers
+        requests = [request, request.copy()]
+
+        def submit(request, timeout):
+            return executor.submit(
+                copy_context().run, self._timed, attempt, request,
+                timeout=timeout, **kwargs
+            )
+
+        pending = {submit(requests.pop(0), _remaining(timeout, deadline))}
+        done, pending = wait(pending, delay)
+        if not done:
+            try:
+                hedge_timeout = _remaining(timeout, deadline)
+            except DeadlineExceeded:
+                # too late to hedge, but the first attempt's own timeout
+                # ends at the deadline, so it is waited for rather than
+                # left holding its connection
+                pass
+            else:
+                trace = current_trace()
+                if trace is not None:
+                    trace.hedged = True
+                pending.add(submit(requests.pop(0), hedge_timeout))
+
+        error = None
+        while True:
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+
+                if response.status_code in self.retry_statuses and pending:
+                    # the other attempt may yet succeed
+                    response.close()
+                    continue
+
+                for other in pending:
+                    other.add_done_callback(_close_response)
+                return response
+
+            if not pending:
+                raise error
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+
+def _remaining(timeout, deadline):
+    if deadline is None:
+        return timeout
+
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded('Deadline exceeded')
+
+    if isinstance(timeout, tuple):
+        return tuple(
+            remaining if part is None else min(part, remaining)
+            for part in timeout
+        )
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def _close_response(future):
+    try:
+        future.result().close()
+    except Exception:
+        pass
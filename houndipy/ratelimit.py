@@ -0,0 +1,227 @@
+import os
+import time
+import struct
+import weakref
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# priority classes; interactive queries go ahead of batch ones
+INTERACTIVE = 0
+BATCH = 1
+
+_STATE = struct.Struct('<dd')
+
+# rate limiters whose waiters belong to the parent, in a forked child
+_limiters = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for limiter in list(_limiters):
+        limiter.reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class RateLimiter:
+    '''
+    Base class for token bucket rate limiters, holding up to `burst`
+    tokens and refilling at `rate` tokens a second. Each request takes a
+    token, waiting for one if there are none.
+
+    Requests have a priority class. While any :data:`INTERACTIVE` request
+    is waiting, :data:`BATCH` requests wait behind it, and batch requests
+    leave the last `reserve` tokens for interactive ones, so a batch job
+    can't use up the whole quota.
+
+    Subclasses implement :meth:`_take`, which decides where the bucket is
+    kept.
+    '''
+
+    def __init__(self, rate, burst=None, reserve=0):
+        self.rate = rate
+        self.burst = max(1, rate) if burst is None else burst
+        self.reserve = reserve
+        if reserve + 1 > self.burst:
+            raise ValueError('reserve must leave room for batch requests')
+
+        self._lock = threading.Lock()
+        self._interactive_waiting = 0
+        _limiters.add(self)
+
+    def __getstate__(self):
+        return {
+            'rate': self.rate, 'burst': self.burst, 'reserve': self.reserve
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def reset(self):
+        '''
+        Forgets the requests waiting, whose threads don't survive a fork,
+        along with the lock they may have held
+        '''
+        self._lock = threading.Lock()
+        self._interactive_waiting = 0
+
+    def _take(self, needed):
+        '''
+        Takes a token if at least `needed` are available, returning 0, or
+        otherwise how many seconds until there should be
+        '''
+        raise NotImplementedError()
+
+    def _refill(self, tokens, updated, now):
+        return min(self.burst, tokens + max(0, now - updated) * self.rate)
+
+    def _attempt(self, priority):
+        with self._lock:
+            if priority == INTERACTIVE:
+                return self._take(1)
+            if self._interactive_waiting:
+                return 1 / self.rate
+            return self._take(1 + self.reserve)
+
+    def _waiting(self, priority, delta):
+        if priority == INTERACTIVE:
+            with self._lock:
+                self._interactive_waiting += delta
+
+    def acquire(self, priority=INTERACTIVE, timeout=None):
+        '''
+        Takes a token, waiting up to `timeout` seconds for one; returns
+        whether one was taken
+        '''
+        delay = self._attempt(priority)
+        if not delay:
+            return True
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._waiting(priority, 1)
+        try:
+            while delay:
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    delay = min(delay, remaining)
+                time.sleep(delay)
+                delay = self._attempt(priority)
+            return True
+        finally:
+            self._waiting(priority, -1)
+
+    async def acquire_async(self, priority=INTERACTIVE, timeout=None):
+        '''
+        Like :meth:`acquire`, but waits without blocking the event loop
+        '''
+        import asyncio
+
+        delay = self._attempt(priority)
+        if not delay:
+            return True
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._waiting(priority, 1)
+        try:
+            while delay:
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    delay = min(delay, remaining)
+                await asyncio.sleep(delay)
+                delay = self._attempt(priority)
+            return True
+        finally:
+            self._waiting(priority, -1)
+
+
+class TokenBucket(RateLimiter):
+    '''
+    A rate limiter shared by the threads of a process
+    '''
+
+    def __init__(self, rate, burst=None, reserve=0):
+        super(TokenBucket, self).__init__(rate, burst, reserve)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+
+    def _take(self, needed):
+        now = time.monotonic()
+        self._tokens = self._refill(self._tokens, self._updated, now)
+        self._updated = now
+
+        if self._tokens >= needed:
+            self._tokens -= 1
+            return 0
+        return (needed - self._tokens) / self.rate
+
+
+class FileTokenBucket(RateLimiter):
+    '''
+    A rate limiter shared by every process on a host using the same
+    `path`, which holds the state of the bucket and is locked while it is
+    updated. Requires :mod:`fcntl`, so isn't available on Windows.
+
+    Interactive requests only go ahead of batch ones waiting in the same
+    process; across processes, `reserve` keeps tokens back for them.
+    '''
+
+    def __init__(self, path, rate, burst=None, reserve=0):
+        if fcntl is None:
+            raise RuntimeError('FileTokenBucket requires fcntl')
+        super(FileTokenBucket, self).__init__(rate, burst, reserve)
+        self.path = path
+        self._fd = None
+        self._pid = None
+
+    def __getstate__(self):
+        state = super(FileTokenBucket, self).__getstate__()
+        state['path'] = self.path
+        return state
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _file(self):
+        # locks belong to the open file, which a forked child would share
+        if self._pid != os.getpid():
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            self._pid = os.getpid()
+        return self._fd
+
+    def _take(self, needed):
+        fd = self._file()
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            # monotonic time is shared by every process on the host
+            now = time.monotonic()
+            data = os.pread(fd, _STATE.size, 0)
+            if len(data) == _STATE.size:
+                tokens, updated = _STATE.unpack(data)
+                if updated > now:
+                    # left over from before a reboot
+                    tokens, updated = self.burst, now
+            else:
+                tokens, updated = self.burst, now
+
+            tokens = self._refill(tokens, updated, now)
+            if tokens >= needed:
+                tokens -= 1
+                delay = 0
+            else:
+                delay = (needed - tokens) / self.rate
+
+            os.pwrite(fd, _STATE.pack(tokens, now), 0)
+            return delay
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
@@ -0,0 +1,108 @@
+from . import codec
+from .results import spoken_text, views
+
+_UNPARSED = object()
+
+
+class HoundResponse:
+    '''
+    Wraps the HTTP response to a Houndify query.
+
+    The body is parsed at most once, on first use, and the parsed data is
+    shared by everything that looks at the response: the client checking
+    for an ErrorMessage, a :class:`houndipy.Conversation` pulling out the
+    ConversationState, and the caller. The raw body stays available as
+    :attr:`content` for passing on untouched.
+
+    Anything else, such as ``status_code`` or ``raise_for_status()``, is
+    passed through to the underlying response.
+    '''
+
+    def __init__(self, response, content=None):
+        self.response = response
+        self._content = content
+        self._data = _UNPARSED
+
+    def __repr__(self):
+        return '<HoundResponse [{}]>'.format(self.status_code)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            # don't recurse looking for self.response while unpickling
+            raise AttributeError(name)
+        return getattr(self.response, name)
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = self.response.content
+        return self._content
+
+    @property
+    def status_code(self):
+        try:
+            return self.response.status_code
+        except AttributeError:
+            # aiohttp
+            return self.response.status
+
+    def json(self):
+        '''
+        The parsed body; raises ValueError if it isn't JSON
+        '''
+        if self._data is _UNPARSED:
+            try:
+                self._data = codec.loads(self.content)
+            except ValueError:
+                self._data = None
+                raise
+        elif self._data is None:
+            raise ValueError('Response body is not JSON')
+        return self._data
+
+    def _get(self, key, default=None):
+        try:
+            data = self.json()
+        except ValueError:
+            return default
+        if not isinstance(data, dict):
+            return default
+        return data.get(key, default)
+
+    @property
+    def error_message(self):
+        return self._get('ErrorMessage')
+
+    @property
+    def all_results(self):
+        return self._get('AllResults') or []
+
+    @property
+    def top_result(self):
+        results = self.all_results
+        return results[0] if results else None
+
+    @property
+    def results(self):
+        '''
+        :class:`houndipy.results.Result` views over AllResults
+        '''
+        return views(self.all_results)
+
+    @property
+    def spoken_text(self):
+        '''
+        What the top result says to speak to the user, preferring the long
+        form, without building any views
+        '''
+        return spoken_text(self.all_results)
+
+    @property
+    def conversation_state(self):
+        result = self.top_result
+        return result.get('ConversationState') if result else None
+
+    @property
+    def native_data(self):
+        result = self.top_result
+        return result.get('NativeData') if result else None
@@ -0,0 +1,175 @@
+class View:
+    '''
+    Base class for read only views over part of a parsed Houndify
+    response; fields are looked up in the underlying dict as they are
+    used, and nothing is copied.
+
+    The dict itself is available as :attr:`data`. Views are equal when
+    their dicts are, and so, like the dicts, can't be hashed.
+    '''
+
+    __slots__ = ('_data',)
+
+    def __init__(self, data):
+        self._data = data
+
+    def __repr__(self):
+        return '<{} {!r}>'.format(type(self).__name__, self._data)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._data is other._data or self._data == other._data
+
+    # the dict may change, and equal dicts are equal views
+    __hash__ = None
+
+    @property
+    def data(self):
+        return self._data
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+
+class CommandKind(View):
+    '''
+    What kind of command a result is, such as ``'WeatherCommand'``, along
+    with its command specific NativeData
+    '''
+
+    __slots__ = ()
+
+    def __str__(self):
+        return self.name or ''
+
+    @property
+    def name(self):
+        return self._data.get('CommandKind')
+
+    @property
+    def native_data(self):
+        return self._data.get('NativeData') or {}
+
+
+class SpokenResponse(View):
+    '''
+    The text to be spoken to the user, in short and long forms
+    '''
+
+    __slots__ = ()
+
+    def __str__(self):
+        return self.text or ''
+
+    @property
+    def text(self):
+        return self._data.get('SpokenResponse')
+
+    @property
+    def long(self):
+        return self._data.get('SpokenResponseLong')
+
+    @property
+    def ssml(self):
+        return self._data.get('SpokenResponseSSML')
+
+    @property
+    def ssml_long(self):
+        return self._data.get('SpokenResponseSSMLLong')
+
+
+class WrittenResponse(View):
+    '''
+    The text to be shown to the user, in short and long forms
+    '''
+
+    __slots__ = ()
+
+    def __str__(self):
+        return self.text or ''
+
+    @property
+    def text(self):
+        return self._data.get('WrittenResponse')
+
+    @property
+    def long(self):
+        return self._data.get('WrittenResponseLong')
+
+
+class ConversationState(View):
+    '''
+    The state to send back with the next request of a conversation, which
+    should otherwise be treated as opaque
+    '''
+
+    __slots__ = ()
+
+    @property
+    def time(self):
+        return self._data.get('ConversationStateTime')
+
+
+class Result(View):
+    '''
+    One of the AllResults of a response
+    '''
+
+    __slots__ = ()
+
+    @property
+    def command_kind(self):
+        return CommandKind(self._data)
+
+    @property
+    def spoken_response(self):
+        return SpokenResponse(self._data)
+
+    @property
+    def written_response(self):
+        return WrittenResponse(self._data)
+
+    @property
+    def conversation_state(self):
+        state = self._data.get('ConversationState')
+        return None if state is None else ConversationState(state)
+
+    @property
+    def native_data(self):
+        return self._data.get('NativeData') or {}
+
+    @property
+    def auto_listen(self):
+        return self._data.get('AutoListen', False)
+
+    @property
+    def view_type(self):
+        return self._data.get('ViewType')
+
+    @property
+    def template_name(self):
+        return self._data.get('TemplateName')
+
+    @property
+    def template_data(self):
+        return self._data.get('TemplateData')
+
+
+def views(results):
+    return [Result(result) for result in results]
+
+
+def spoken_text(results, long=True):
+    '''
+    The spoken response of the first of `results`, without building any
+    views; the long form if there is one and `long` is set
+    '''
+    if not results:
+        return None
+    result = results[0]
+    if long:
+        text = result.get('SpokenResponseLong')
+        if text is not None:
+            return text
+    return result.get('SpokenResponse')
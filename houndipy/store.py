@@ -0,0 +1,171 @@
+import os
+import time
+import zlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from . import codec
+
+
+def pack(state):
+    return zlib.compress(codec.dumpb(state))
+
+
+def unpack(packed):
+    return codec.loads(zlib.decompress(packed))
+
+
+class ConversationStore:
+    '''
+    Base class for somewhere to keep ConversationState between requests,
+    keyed by SessionID, so that any worker can continue a conversation.
+
+    States are stored as compressed JSON. Subclasses implement
+    :meth:`_load`, :meth:`_save` and :meth:`delete`.
+    '''
+
+    def __init__(self, ttl=30 * 60):
+        # houndify suggests half an hour without interaction ends a session
+        self.ttl = ttl
+
+    def __setstate__(self, state):
+        # only configuration is pickled; each process gets its own states,
+        # or its own connection to the same database
+        self.__init__(**state)
+
+    def load(self, session_id):
+        packed = self._load(session_id)
+        return None if packed is None else unpack(packed)
+
+    def save(self, session_id, state):
+        self._save(session_id, pack(state))
+
+    def _load(self, session_id):
+        raise NotImplementedError()
+
+    def _save(self, session_id, packed):
+        raise NotImplementedError()
+
+    def delete(self, session_id):
+        raise NotImplementedError()
+
+
+class MemoryStore(ConversationStore):
+    '''
+    Keeps states in memory, evicting the least recently used once they take
+    up more than `max_bytes` compressed, or haven't been used for `ttl`
+    seconds
+    '''
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, **kwargs):
+        super(MemoryStore, self).__init__(**kwargs)
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {'max_bytes': self.max_bytes, 'ttl': self.ttl}
+
+    def __len__(self):
+        return len(self._states)
+
+    def _load(self, session_id):
+        with self._lock:
+            try:
+                expires, packed = self._states[session_id]
+            except KeyError:
+                return None
+
+            if expires < time.monotonic():
+                self._remove(session_id)
+                return None
+
+            self._states.move_to_end(session_id)
+            return packed
+
+    def _save(self, session_id, packed):
+        with self._lock:
+            self._remove(session_id)
+            self._states[session_id] = (time.monotonic() + self.ttl, packed)
+            self.size += len(packed)
+
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._states)))
+
+    def _remove(self, session_id):
+        entry = self._states.pop(session_id, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+    def delete(self, session_id):
+        with self._lock:
+            self._remove(session_id)
+
+
+class SQLiteStore(ConversationStore):
+    '''
+    Keeps states in an SQLite database at `path`, which can be shared by
+    the worker processes on a host
+    '''
+
+    def __init__(self, path, **kwargs):
+        super(SQLiteStore, self).__init__(**kwargs)
+        self.path = path
+        self._db = None
+        self._pid = None
+        with self._connection() as db:
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS conversations ('
+                'session_id TEXT PRIMARY KEY, expires REAL, state BLOB)'
+            )
+            db.execute(
+                'CREATE INDEX IF NOT EXISTS conversations_expires '
+                'ON conversations (expires)'
+            )
+
+    def __getstate__(self):
+        return {'path': self.path, 'ttl': self.ttl}
+
+    def close(self):
+        if self._pid == os.getpid():
+            self._db.close()
+            self._pid = None
+
+    def _connection(self):
+        # as for houndipy.cache.DiskCache, a forked child connects again
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._pid = os.getpid()
+        return self._db
+
+    def _load(self, session_id):
+        db = self._connection()
+        with self._lock:
+            row = db.execute(
+                'SELECT state FROM conversations '
+                'WHERE session_id = ? AND expires >= ?',
+                (session_id, time.time())
+            ).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def _save(self, session_id, packed):
+        db = self._connection()
+        with self._lock, db:
+            db.execute(
+                'INSERT OR REPLACE INTO conversations VALUES (?, ?, ?)',
+                (session_id, time.time() + self.ttl, packed)
+            )
+            db.execute(
+                'DELETE FROM conversations WHERE expires < ?', (time.time(),)
+            )
+
+    def delete(self, session_id):
+        db = self._connection()
+        with self._lock, db:
+            db.execute(
+                'DELETE FROM conversations WHERE session_id = ?',
+                (session_id,)
+            )
@@ -0,0 +1,187 @@
+import re
+import codecs
+
+from . import codec
+from .exceptions import HoundipyException
+from .results import spoken_text, views
+
+
+class HoundEvent(dict):
+    '''
+    A top level JSON object from a streamed Houndify response
+    '''
+
+    def __repr__(self):
+        return '<{} {}>'.format(
+            type(self).__name__, super(HoundEvent, self).__repr__()
+        )
+
+
+class HoundPartialTranscript(HoundEvent):
+    '''
+    A transcript of the audio heard so far, sent before the HoundServer
+    object when PartialTranscriptsDesired is set
+    '''
+
+    @property
+    def transcript(self):
+        return self.get('PartialTranscript')
+
+    @property
+    def done(self):
+        return self.get('SafeToStopAudio', False)
+
+
+class HoundServer(HoundEvent):
+    '''
+    The result of the query; there is always exactly one of these
+    '''
+
+    @property
+    def results(self):
+        return views(self.get('AllResults') or [])
+
+    @property
+    def spoken_text(self):
+        return spoken_text(self.get('AllResults'))
+
+
+class HoundUpdate(HoundEvent):
+    '''
+    An update to a previously sent HoundServer object, sent when
+    ResultUpdateAllowed is set
+    '''
+
+
+# what matters outside strings
+_STRUCTURE = re.compile(r'[{}"]')
+# the rest of a string, and its closing quote if it has arrived
+_STRING = re.compile(r'(?:[^"\\]+|\\.)*(")?', re.DOTALL)
+
+
+def classify(obj):
+    fmt = obj.get('Format', '')
+
+    if 'PartialTranscript' in fmt or 'PartialTranscript' in obj:
+        return HoundPartialTranscript(obj)
+    elif 'Update' in fmt:
+        return HoundUpdate(obj)
+    elif 'AllResults' in obj or 'Status' in obj:
+        return HoundServer(obj)
+    return HoundUpdate(obj)
+
+
+class EventParser:
+    '''
+    Incrementally splits a streamed Houndify response into events.
+
+    Houndify sends one JSON object per HTTP chunk, but we can't rely on the
+    HTTP client preserving chunk boundaries, so without
+    ObjectByteCountPrefix the text is scanned as it arrives for the brace
+    closing each top level object, which is then decoded. With
+    ObjectByteCountPrefix, each object is prefixed by its length in hex, in
+    the same format as HTTP chunks.
+
+    Feed it data as it arrives, and call :meth:`close` at the end of the
+    body to check nothing was left over.
+    '''
+
+    def __init__(self, byte_count_prefix=False):
+        self.byte_count_prefix = byte_count_prefix
+        self._buffer = b''
+        # the text of the object being received, kept in pieces so that
+        # each is only scanned once
+        self._pieces = []
+        self._depth = 0
+        self._in_string = False
+        # after a backslash ending the last piece, the escaped character
+        # starts the next
+        self._skip = 0
+        self._utf8 = codecs.getincrementaldecoder('utf8')()
+
+    def feed(self, data):
+        if self.byte_count_prefix:
+            self._buffer += data
+            return list(self._parse_prefixed())
+        else:
+            return list(self._parse_raw(self._utf8.decode(data)))
+
+    def close(self):
+        if self._buffer.strip() or ''.join(self._pieces).strip():
+            raise HoundipyException('Incomplete object in response')
+
+    def _parse_raw(self, text):
+        start = 0
+        position = self._skip
+        while position < len(text):
+            if self._in_string:
+                match = _STRING.match(text, position)
+                position = match.end()
+                if match.group(1):
+                    self._in_string = False
+                elif position < len(text):
+                    # a backslash ending the text, escaping what comes next
+                    position += 2
+                continue
+
+            match = _STRUCTURE.search(text, position)
+            if match is None:
+                break
+            position = match.end()
+            char = match.group()
+            if char == '"':
+                self._in_string = True
+            elif char == '{':
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth <= 0:
+                    self._pieces.append(text[start:position])
+                    start = position
+                    yield self._decode()
+
+        self._skip = max(position - len(text), 0)
+        if start < len(text):
+            self._pieces.append(text[start:])
+
+    def _decode(self):
+        text = ''.join(self._pieces)
+        self._pieces = []
+        try:
+            # exactly one object, so the codec's backend can take it
+            return classify(codec.loads(text))
+        except ValueError:
+            raise HoundipyException(
+                'Invalid object in response: {!r}'.format(text[:100])
+            )
+
+    def _parse_prefixed(self):
+        buffer = self._buffer.lstrip()
+        while buffer:
+            newline = buffer.find(b'\r\n')
+            if newline == -1:
+                break
+
+            try:
+                size = int(buffer[:newline].split(b';')[0], 16)
+            except ValueError:
+                raise HoundipyException(
+                    'Invalid byte count prefix: {!r}'.format(buffer[:newline])
+                )
+
+            start = newline + 2
+            if len(buffer) < start + size:
+                break
+
+            if size:
+                yield classify(codec.loads(buffer[start:start + size]))
+            buffer = buffer[start + size:].lstrip()
+        self._buffer = buffer
+
+
+def iter_events(chunks, byte_count_prefix=False):
+    parser = EventParser(byte_count_prefix)
+    for chunk in chunks:
+        for event in parser.feed(chunk):
+            yield event
+    parser.close()
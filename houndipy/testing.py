@@ -0,0 +1,528 @@
+'''
+A stand-in for the Houndify API, for testing and benchmarking code that
+uses houndipy without calling the real thing.
+
+    with MockHoundServer() as server:
+        client = server.client()
+        client.text('what time is it')
+
+Run ``python -m houndipy.testing`` to serve one from its own process.
+'''
+import sys
+import hmac
+import json
+import time
+import zlib
+import socket
+import argparse
+import threading
+import socketserver
+from base64 import urlsafe_b64encode
+from collections import namedtuple
+from email.message import Message
+from urllib.parse import parse_qsl, urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import h2.config
+    import h2.events
+    import h2.exceptions
+    import h2.connection
+except ImportError:
+    h2 = None
+
+from .auth import sign_request
+
+MOCK_CLIENT_ID = 'mock-client-id'
+MOCK_CLIENT_KEY = urlsafe_b64encode(b'houndipy mock server key').decode()
+
+DEFAULT_RESPONSE = {
+    'Format': 'SoundHoundVoiceSearchResult',
+    'FormatVersion': '1.0',
+    'Status': 'OK',
+    'NumToReturn': 1,
+    'AllResults': [
+        {
+            'CommandKind': 'NoResultCommand',
+            'SpokenResponse': "Didn't get that!",
+            'SpokenResponseLong': "Didn't get that!",
+            'WrittenResponse': "Didn't get that!",
+            'WrittenResponseLong': "Didn't get that!",
+            'AutoListen': False,
+            'ConversationState': {'ConversationStateTime': 0},
+        }
+    ],
+}
+
+ReceivedRequest = namedtuple(
+    'ReceivedRequest', 'path params request_info headers body'
+)
+
+
+def verify_signature(headers, client_id, client_key):
+    '''
+    Checks the authentication headers of a request the way Houndify does,
+    returning None if they are valid, or why not
+    '''
+    request_auth = headers.get('Hound-Request-Authentication', '')
+    client_auth = headers.get('Hound-Client-Authentication', '')
+    try:
+        user_id, request_id = request_auth.split(';')
+        sent_client_id, timestamp, _ = client_auth.split(';')
+    except ValueError:
+        return 'Missing or malformed authentication headers'
+
+    if sent_client_id != client_id:
+        return 'Unknown client id'
+
+    expected = sign_request(
+        request_id, timestamp, user_id, client_id, client_key
+    )['Hound-Client-Authentication']
+    if not hmac.compare_digest(expected, client_auth):
+        return 'Invalid signature'
+    return None
+
+
+class MockHoundServer:
+    '''
+    Serves the text and audio endpoints over plain HTTP on localhost, from
+    a background thread.
+
+    Every request has its signature checked against `client_id` and
+    `client_key`, and is answered with `response`, which may be a dict or
+    a function taking the :class:`ReceivedRequest` and returning one. Bad
+    signatures get a 401 with an ErrorMessage, as from Houndify.
+
+    * `delay` seconds are waited before answering, for slow responses.
+    * `partial_transcripts` are sent ahead of the response to audio
+      queries asking for PartialTranscriptsDesired, `chunk_delay` seconds
+      apart.
+    * `chunked` sends responses with chunked transfer encoding, as
+      Houndify does; responses with partial transcripts always are.
+    * `compress` gzips responses to clients that accept it, with
+      Hound-Response-Content-Encoding.
+
+    ObjectByteCountPrefix is honoured. Requests received are kept in
+    :attr:`requests`, and :meth:`fail` makes the next requests fail.
+
+    With `http2`, HTTP/2 is served with prior knowledge in place of
+    HTTP/1.1, answering each stream of a connection concurrently, for
+    testing :class:`houndipy.http2.HTTP2Adapter`. This needs the h2
+    package.
+    '''
+
+    def __init__(self, client_id=MOCK_CLIENT_ID, client_key=MOCK_CLIENT_KEY,
+                 response=None, delay=0, partial_transcripts=(),
+                 chunk_delay=0, chunked=True, compress=True, host='127.0.0.1',
+                 port=0, keep_requests=True, http2=False):
+        self.client_id = client_id
+        self.client_key = client_key
+        self.response = DEFAULT_RESPONSE if response is None else response
+        self.delay = delay
+        self.partial_transcripts = list(partial_transcripts)
+        self.chunk_delay = chunk_delay
+        self.chunked = chunked
+        self.compress = compress
+        self.keep_requests = keep_requests
+        self.http2 = http2
+
+        self.requests = []
+        self._failures = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+        if not http2:
+            self._server = _Server((host, port), _Handler)
+        elif h2 is None:
+            raise RuntimeError('Serving HTTP/2 requires h2')
+        else:
+            self._server = _H2Server((host, port), _H2Handler)
+        self._server.mock = self
+
+    def __repr__(self):
+        return '<MockHoundServer {}>'.format(self.url)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return 'http://{}:{}/'.format(host, port)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._server.serve_forever,
+                # so that stop doesn't wait long for the server to notice
+                kwargs={'poll_interval': 0.05},
+                name='houndipy-mock-server',
+                daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def client(self, **kwargs):
+        '''
+        A :class:`houndipy.Client` for this server
+        '''
+        from . import Client
+        if self.http2:
+            kwargs.setdefault('http2', True)
+            kwargs.setdefault('prior_knowledge', True)
+        return Client(
+            self.client_id, self.client_key, base_url=self.url, **kwargs
+        )
+
+    def async_client(self, **kwargs):
+        '''
+        A :class:`houndipy.aio.AsyncClient` for this server
+        '''
+        from .aio import AsyncClient
+        return AsyncClient(
+            self.client_id, self.client_key, base_url=self.url, **kwargs
+        )
+
+    def fail(self, times=1, status=503):
+        '''
+        Answers the next `times` requests with `status`
+        '''
+        with self._lock:
+            self._failures.extend([status] * times)
+
+    def _received(self, request):
+        with self._lock:
+            if self.keep_requests:
+                self.requests.append(request)
+            if self._failures:
+                return self._failures.pop(0)
+        return None
+
+    def respond(self, request):
+        if callable(self.response):
+            return self.response(request)
+        return self.response
+
+    def _answer(self, path, headers, body):
+        # the status and objects to answer a request with, and whether to
+        # prefix each object with its size
+        url = urlsplit(path)
+
+        if headers.get('Content-Encoding') in ('gzip', 'deflate'):
+            body = zlib.decompress(body, 32 + zlib.MAX_WBITS)
+
+        if url.path not in ('/v1/text', '/v1/audio'):
+            return 404, [_error('Not found')], False
+
+        error = verify_signature(headers, self.client_id, self.client_key)
+        if error is not None:
+            return 401, [_error(error)], False
+
+        try:
+            request_info = json.loads(headers['Hound-Request-Info'])
+        except (TypeError, ValueError):
+            return 400, [_error('Invalid Hound-Request-Info')], False
+
+        request = ReceivedRequest(
+            url.path, dict(parse_qsl(url.query)), request_info,
+            dict(headers), body
+        )
+        status = self._received(request)
+        if status is not None:
+            return status, [_error('Mock failure')], False
+
+        if self.delay:
+            time.sleep(self.delay)
+
+        objects = []
+        if (
+            url.path == '/v1/audio' and
+            request_info.get('PartialTranscriptsDesired')
+        ):
+            objects.extend(
+                {
+                    'Format': 'SoundHoundVoiceSearchParialTranscript',
+                    'FormatVersion': '1.0',
+                    'PartialTranscript': transcript,
+                    'DurationMS': 100 * (i + 1),
+                    'Done': False,
+                }
+                for i, transcript in enumerate(self.partial_transcripts)
+            )
+        objects.append(self.respond(request))
+
+        return 200, objects, request_info.get('ObjectByteCountPrefix')
+
+
+def _error(message):
+    return {'Status': 'Error', 'ErrorMessage': message}
+
+
+def _parts(objects, byte_count_prefix):
+    parts = [json.dumps(obj).encode() for obj in objects]
+    if byte_count_prefix:
+        parts = [b'%x\r\n%s\r\n' % (len(part), part) for part in parts]
+    return parts
+
+
+def _compressor(mock, headers):
+    if mock.compress and 'gzip' in headers.get(
+        'Hound-Response-Accept-Encoding', ''
+    ):
+        return zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return None
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        try:
+            self._send(*self.server.mock._answer(
+                self.path, self.headers, self._read_body()
+            ))
+        except OSError:
+            # the client has gone away, such as a hedged request which lost
+            self.close_connection = True
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            body = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                body.append(self.rfile.read(size))
+                self.rfile.readline()
+                if not size:
+                    break
+            return b''.join(body)
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def _send(self, status, objects, byte_count_prefix=False):
+        mock = self.server.mock
+        parts = _parts(objects, byte_count_prefix)
+        compressor = _compressor(mock, self.headers)
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if compressor is not None:
+            self.send_header('Hound-Response-Content-Encoding', 'gzip')
+
+        if not mock.chunked and len(parts) == 1:
+            data = parts[0]
+            if compressor is not None:
+                data = compressor.compress(data) + compressor.flush()
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for i, data in enumerate(parts):
+            if i and mock.chunk_delay:
+                time.sleep(mock.chunk_delay)
+            if compressor is not None:
+                data = compressor.compress(data)
+                data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._write_chunk(data)
+        if compressor is not None:
+            self._write_chunk(compressor.flush())
+        self.wfile.write(b'0\r\n\r\n')
+
+    def _write_chunk(self, data):
+        if data:
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+            self.wfile.flush()
+
+
+class _H2Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+class _H2Handler(socketserver.BaseRequestHandler):
+    '''
+    Serves one HTTP/2 connection, answering each stream from a thread of
+    its own once its request has been received
+    '''
+
+    def setup(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.conn = h2.connection.H2Connection(h2.config.H2Configuration(
+            client_side=False, header_encoding='utf-8'
+        ))
+        self.closed = False
+        self.streams = {}
+        # guards the connection, and is waited on for flow control
+        self.lock = threading.Condition()
+
+    def handle(self):
+        with self.lock:
+            self.conn.initiate_connection()
+            self._flush()
+
+        try:
+            while not self.closed:
+                data = self.request.recv(65536)
+                if not data:
+                    break
+                with self.lock:
+                    for event in self.conn.receive_data(data):
+                        self._event(event)
+                    self._flush()
+        except (OSError, h2.exceptions.ProtocolError):
+            pass
+        finally:
+            with self.lock:
+                self.closed = True
+                self.lock.notify_all()
+
+    def _event(self, event):
+        if isinstance(event, h2.events.RequestReceived):
+            self.streams[event.stream_id] = (event.headers, [])
+        elif isinstance(event, h2.events.DataReceived):
+            self.streams[event.stream_id][1].append(event.data)
+            self.conn.acknowledge_received_data(
+                event.flow_controlled_length, event.stream_id
+            )
+        elif isinstance(event, h2.events.StreamEnded):
+            headers, body = self.streams.pop(event.stream_id)
+            threading.Thread(
+                target=self._respond,
+                args=(event.stream_id, headers, b''.join(body)),
+                daemon=True
+            ).start()
+        elif isinstance(event, h2.events.StreamReset):
+            self.streams.pop(event.stream_id, None)
+        elif isinstance(event, h2.events.ConnectionTerminated):
+            self.closed = True
+        # window updates and settings changes may let a stream send more
+        self.lock.notify_all()
+
+    def _flush(self):
+        data = self.conn.data_to_send()
+        if data:
+            self.request.sendall(data)
+
+    def _respond(self, stream_id, headers, body):
+        mock = self.server.mock
+        message = Message()
+        for name, value in headers:
+            message[name] = value
+
+        status, objects, byte_count_prefix = mock._answer(
+            message[':path'], message, body
+        )
+        compressor = _compressor(mock, message)
+
+        response_headers = [
+            (':status', str(status)), ('content-type', 'application/json')
+        ]
+        if compressor is not None:
+            response_headers.append(
+                ('hound-response-content-encoding', 'gzip')
+            )
+
+        try:
+            with self.lock:
+                self.conn.send_headers(stream_id, response_headers)
+                self._flush()
+
+            for i, data in enumerate(_parts(objects, byte_count_prefix)):
+                if i and mock.chunk_delay:
+                    time.sleep(mock.chunk_delay)
+                if compressor is not None:
+                    data = compressor.compress(data)
+                    data += compressor.flush(zlib.Z_SYNC_FLUSH)
+                self._send_data(stream_id, data)
+            if compressor is not None:
+                self._send_data(stream_id, compressor.flush())
+
+            with self.lock:
+                self.conn.end_stream(stream_id)
+                self._flush()
+        except (OSError, h2.exceptions.ProtocolError):
+            # the client has gone away, or reset the stream
+            pass
+
+    def _send_data(self, stream_id, data):
+        with self.lock:
+            while data:
+                if self.closed:
+                    raise OSError('Connection closed')
+                size = min(
+                    len(data),
+                    self.conn.local_flow_control_window(stream_id),
+                    self.conn.max_outbound_frame_size
+                )
+                if size <= 0:
+                    self.lock.wait()
+                    continue
+                self.conn.send_data(stream_id, data[:size])
+                data = data[size:]
+                self._flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Serves a mock Houndify API on localhost'
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--client-id', default=MOCK_CLIENT_ID)
+    parser.add_argument('--client-key', default=MOCK_CLIENT_KEY)
+    parser.add_argument('--delay', type=float, default=0)
+    parser.add_argument('--chunk-delay', type=float, default=0)
+    parser.add_argument(
+        '--partial-transcript', action='append', default=[],
+        dest='partial_transcripts'
+    )
+    parser.add_argument(
+        '--no-compress', action='store_false', dest='compress'
+    )
+    parser.add_argument(
+        '--http2', action='store_true',
+        help='serve HTTP/2 with prior knowledge rather than HTTP/1.1'
+    )
+    args = parser.parse_args(argv)
+
+    server = MockHoundServer(
+        args.client_id, args.client_key, delay=args.delay,
+        partial_transcripts=args.partial_transcripts,
+        chunk_delay=args.chunk_delay, compress=args.compress,
+        host=args.host, port=args.port, keep_requests=False,
+        http2=args.http2
+    )
+    # the url goes first, for whoever started us to read
+    print(server.url, flush=True)
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
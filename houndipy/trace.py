@@ -0,0 +1,272 @@
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# the callback traces are passed to once complete, set by tracing()
+_callback = ContextVar('houndipy_trace_callback', default=None)
+# the trace of the request being made, for the layers below the client
+_current = ContextVar('houndipy_trace', default=None)
+
+DEFAULT_BUCKETS = (
+    .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10
+)
+
+
+class Trace:
+    '''
+    Timings and counters for a single request, passed to the callback given
+    to :func:`tracing` once the request is done.
+
+    `phases` maps phase names to seconds spent in them:
+
+    * ``encode``: validating and encoding the request info
+    * ``sign``: signing the request
+    * ``send``: sending the request and waiting for the response headers
+    * ``read``: reading and decoding the response body
+    * ``parse``: parsing the response JSON
+    * ``throttle``: waiting on the client's rate limiter
+
+    Streamed requests have a ``stream`` phase covering the whole body in
+    place of ``read`` and ``parse``. Cached responses have no phases, and
+    nor do those `coalesced` with an identical request already being made,
+    which is traced on its own.
+
+    Retried requests accumulate the time of every attempt, which are
+    counted in `attempts`; `hedged` is set if a second attempt was sent
+    while waiting for the first.
+
+    `reused_connection` is whether a pooled connection was used, or None if
+    unknown, and `bytes_sent` and `bytes_received` count the request and
+    response bodies as sent over the wire.
+    '''
+
+    def __init__(self, url, callback=None):
+        self.url = url
+        self.phases = {}
+        self.cache_hit = False
+        self.coalesced = False
+        self.attempts = 0
+        self.hedged = False
+        self.reused_connection = None
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.status_code = None
+        self.error = None
+        self.duration = None
+        self._callback = callback
+        self._token = None
+        self._start = time.perf_counter()
+
+    def __repr__(self):
+        return '<Trace {} {}>'.format(self.url, ' '.join(
+            '{}={:.6f}'.format(name, seconds)
+            for name, seconds in self.phases.items()
+        ))
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        self.finish(exc)
+
+    @contextmanager
+    def active(self):
+        '''
+        Makes this the current trace for the duration, without finishing it
+        afterwards
+        '''
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0) + seconds
+
+    def finish(self, error=None):
+        self.duration = time.perf_counter() - self._start
+        self.error = error
+        if self._callback is not None:
+            self._callback(self)
+
+
+class _Phase:
+    __slots__ = ('trace', 'name', 'start')
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.trace.add(self.name, time.perf_counter() - self.start)
+
+
+@contextmanager
+def tracing(callback):
+    '''
+    Calls `callback` with a :class:`Trace` for each request made within the
+    block, including from tasks and threads started with a copy of the
+    current context.
+
+    Outside of a tracing block no traces are created at all.
+    '''
+    token = _callback.set(callback)
+    try:
+        yield
+    finally:
+        _callback.reset(token)
+
+
+def start_trace(url):
+    '''
+    Returns a new :class:`Trace` for a request to `url`, or None if
+    tracing isn't enabled
+    '''
+    callback = _callback.get()
+    if callback is None:
+        return None
+    return Trace(url, callback)
+
+
+def current_trace():
+    return _current.get()
+
+
+def count_sent(trace, body):
+    '''
+    Adds the size of a request body to `trace`, returning the body to send
+    in its place; iterators are wrapped to count chunks as they are sent
+    '''
+    if body is None:
+        return body
+    if hasattr(body, 'read'):
+        return body
+    if hasattr(body, '__len__'):
+        # including a MappedAudio, which is sent with a Content-Length
+        trace.bytes_sent += len(body)
+        return body
+    if hasattr(body, '__aiter__'):
+        return _acounting(trace, body)
+    return _counting(trace, body)
+
+
+def _counting(trace, chunks):
+    for chunk in chunks:
+        trace.bytes_sent += len(chunk)
+        yield chunk
+
+
+async def _acounting(trace, chunks):
+    async for chunk in chunks:
+        trace.bytes_sent += len(chunk)
+        yield chunk
+
+
+class Histogram:
+    '''
+    Counts observations into buckets with the given upper bounds, plus one
+    for anything larger
+    '''
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        '''
+        ``(upper bound, count)`` pairs in the style of Prometheus
+        '''
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def quantile(self, q):
+        '''
+        The upper bound of the bucket holding the `q` quantile
+        '''
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+
+
+class HistogramExporter:
+    '''
+    A callback for :func:`tracing` that keeps a :class:`Histogram` of each
+    phase, and of the whole request as ``total``, along with counts of
+    requests, errors, cache hits, coalesced requests, retries, hedges,
+    reused connections and bytes.
+
+    :meth:`snapshot` returns everything as plain data for handing on to a
+    metrics system.
+    '''
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.histograms = {}
+        self.counters = dict.fromkeys((
+            'requests', 'errors', 'cache_hits', 'coalesced', 'retries',
+            'hedges', 'reused_connections', 'bytes_sent', 'bytes_received'
+        ), 0)
+        self._lock = threading.Lock()
+
+    def __call__(self, trace):
+        with self._lock:
+            for name, seconds in trace.phases.items():
+                self._observe(name, seconds)
+            self._observe('total', trace.duration)
+
+            counters = self.counters
+            counters['requests'] += 1
+            counters['errors'] += trace.error is not None
+            counters['cache_hits'] += trace.cache_hit
+            counters['coalesced'] += trace.coalesced
+            counters['retries'] += max(trace.attempts - 1, 0)
+            counters['hedges'] += trace.hedged
+            counters['reused_connections'] += bool(trace.reused_connection)
+            counters['bytes_sent'] += trace.bytes_sent
+            counters['bytes_received'] += trace.bytes_received
+
+    def _observe(self, name, seconds):
+        try:
+            histogram = self.histograms[name]
+        except KeyError:
+            histogram = self.histograms[name] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'histograms': {
+                    name: {
+                        'buckets': histogram.cumulative(),
+                        'sum': histogram.sum,
+                        'count': histogram.count,
+                    }
+                    for name, histogram in self.histograms.items()
+                }
+            }
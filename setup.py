@@ -1,4 +1,4 @@
-from distutils.core import setup
+from setuptools import setup
 
 setup(
     name='houndipy',
@@ -7,8 +7,14 @@ setup(
     author_email='me@mause.me',
     url='https://github.com/Mause/houndipy',
     license='MIT',
-    install_requires=['arrow', 'requests'],
+    install_requires=['arrow', 'requests>=2.32'],
+    extras_require={
+        'async': ['aiohttp'],
+        'audio': ['numpy'],
+        'http2': ['httpx[http2]'],
+    },
     packages=['houndipy'],
+    python_requires='>=3.8',
     classifiers=[
         # How mature is this project? Common values are
         #   3 - Alpha
@@ -25,12 +31,12 @@ setup(
 
         # Specify the Python versions you support here. In particular, ensure
         # that you indicate whether you support Python 2, Python 3 or both.
-        'Programming Language :: Python :: 2',
-        'Programming Language :: Python :: 2.6',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.2',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
+        'Programming Language :: Python :: 3.12',
     ],
 )
@@ -0,0 +1,236 @@
+import os
+import wave
+import array
+import struct
+import asyncio
+import unittest
+import tempfile
+import threading
+from queue import Full
+from io import BytesIO
+
+from houndipy.audio import (
+    AsyncAudioStream, AudioStream, MappedAudio, iter_audio, preprocess,
+    trim_silence, wav_header
+)
+from houndipy.exceptions import AudioStreamAborted
+
+
+def make_wav(frames, rate=8000, channels=2):
+    fh = BytesIO()
+    with wave.open(fh, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(frames)
+    return fh.getvalue()
+
+
+class TestAudioStream(unittest.TestCase):
+
+    def test_backpressure(self):
+        stream = AudioStream(max_chunks=2)
+        stream.write(b'a')
+        stream.write(b'b')
+
+        # the buffer is full, so the producer has to wait
+        with self.assertRaises(Full):
+            stream.write(b'c', timeout=0.01)
+
+        def produce():
+            stream.write(b'c')
+            stream.close()
+
+        thread = threading.Thread(target=produce)
+        thread.start()
+        self.assertEqual(list(stream), [b'a', b'b', b'c'])
+        thread.join()
+
+    def test_consumer_stops(self):
+        stream = AudioStream(max_chunks=1)
+        errors = []
+
+        def produce():
+            try:
+                while True:
+                    stream.write(b'a')
+            except AudioStreamAborted as e:
+                errors.append(e)
+            stream.close()
+
+        thread = threading.Thread(target=produce, daemon=True)
+        thread.start()
+        chunks = iter(stream)
+        next(chunks)
+        # the producer is now waiting for room, which will never come
+        chunks.close()
+
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(stream.aborted)
+
+    def test_async_consumer_stops(self):
+        async def main():
+            stream = AsyncAudioStream(max_chunks=1)
+
+            async def produce():
+                with self.assertRaises(AudioStreamAborted):
+                    while True:
+                        await stream.write(b'a')
+
+            producer = asyncio.ensure_future(produce())
+            chunks = stream.__aiter__()
+            await chunks.__anext__()
+            # let the producer fill the queue and wait for room
+            await asyncio.sleep(0.01)
+            await chunks.aclose()
+
+            await asyncio.wait_for(producer, 5)
+            self.assertTrue(stream.aborted)
+
+        asyncio.run(main())
+
+
+class TestIterAudio(unittest.TestCase):
+
+    def test_bytes(self):
+        self.assertEqual(iter_audio(b'abc'), b'abc')
+
+    def test_file(self):
+        chunks = iter_audio(BytesIO(b'abcde'), chunk_size=2)
+        self.assertEqual(list(chunks), [b'ab', b'cd', b'e'])
+
+    def test_iterator_skips_empty(self):
+        chunks = iter_audio(iter([b'a', b'', b'b']))
+        self.assertEqual(list(chunks), [b'a', b'b'])
+
+    def test_buffer(self):
+        audio = iter_audio(memoryview(b'abcde'), chunk_size=2)
+        self.assertIsInstance(audio, MappedAudio)
+        self.assertEqual(list(map(bytes, audio)), [b'ab', b'cd', b'e'])
+
+
+class TestMappedAudio(unittest.TestCase):
+
+    def write(self, data):
+        fh = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
+        self.addCleanup(os.unlink, fh.name)
+        with fh:
+            fh.write(data)
+        return fh.name
+
+    def test_wav(self):
+        frames = bytes(range(256)) * 40
+        data = make_wav(frames)
+        # a metadata chunk, which isn't worth uploading
+        data = (
+            data[:36] + b'LIST' + struct.pack('<I', 5) + b'abcde\0' +
+            data[36:]
+        )
+        audio = MappedAudio(memoryview(data), chunk_size=4096)
+        self.assertEqual(
+            (audio.rate, audio.channels, audio.width), (8000, 2, 2)
+        )
+
+        chunks = list(audio)
+        self.assertEqual(chunks[0], wav_header(8000, 2, 2, len(frames)))
+        self.assertEqual([len(chunk) for chunk in chunks[1:]],
+                         [4096, 4096, 2048])
+        # slices of the buffer, rather than copies
+        self.assertTrue(all(
+            isinstance(chunk, memoryview) for chunk in chunks[1:]
+        ))
+        self.assertEqual(b''.join(chunks), make_wav(frames))
+        self.assertEqual(len(audio), len(make_wav(frames)))
+
+    def test_path(self):
+        data = make_wav(b'\1\2' * 5000)
+        audio = MappedAudio(self.write(data), chunk_size=1000)
+        self.assertEqual(b''.join(audio), data)
+        # again, as when a request is retried
+        self.assertEqual(b''.join(audio), data)
+
+    def test_unknown_size(self):
+        # as written by recorders which didn't know when they would stop
+        data = bytearray(make_wav(b'\1\2' * 100))
+        data[40:44] = struct.pack('<I', 0xFFFFFFFF)
+        audio = MappedAudio(self.write(data))
+        self.assertEqual(b''.join(audio), make_wav(b'\1\2' * 100))
+
+    def test_other_formats(self):
+        audio = MappedAudio(self.write(b'OggS' + b'\0' * 100))
+        self.assertIsNone(audio.rate)
+        self.assertEqual(b''.join(audio), b'OggS' + b'\0' * 100)
+
+    def test_empty(self):
+        self.assertEqual(list(MappedAudio(self.write(b''))), [])
+
+    def test_close(self):
+        with MappedAudio(self.write(b'\1' * 10000)) as audio:
+            mapped = audio._mmap
+            chunks = iter(audio)
+            next(chunks)
+        self.assertTrue(mapped.closed)
+        with self.assertRaises(ValueError):
+            next(chunks)
+
+    def test_close_buffer(self):
+        buf = bytearray(b'\1' * 100)
+        MappedAudio(memoryview(buf)).close()
+        # no longer exported, so it can be resized again
+        buf.extend(b'\2')
+
+
+class TestPreprocess(unittest.TestCase):
+
+    def test_stereo_48k(self):
+        # one second of a stereo ramp, in awkwardly sized chunks
+        samples = array.array('h', [
+            value for i in range(48000) for value in (i % 1000, -(i % 1000))
+        ])
+        data = samples.tobytes()
+        chunks = (data[i:i + 1001] for i in range(0, len(data), 1001))
+
+        processed = BytesIO(b''.join(preprocess(chunks, 48000, 2)))
+        with wave.open(processed, 'rb') as wav:
+            self.assertEqual(wav.getframerate(), 16000)
+            self.assertEqual(wav.getnchannels(), 1)
+            self.assertEqual(wav.getsampwidth(), 2)
+            frames = array.array('h', wav.readframes(20000))
+
+        self.assertEqual(len(frames), 16000)
+        # the two channels cancel out
+        self.assertLessEqual(max(map(abs, frames)), 1)
+
+    def test_passthrough(self):
+        data = array.array('h', range(-100, 100)).tobytes()
+        processed = b''.join(preprocess(data, 16000, header=False))
+        self.assertEqual(processed, data)
+
+
+class TestTrimSilence(unittest.TestCase):
+
+    def test_trim(self):
+        # 20ms frames at 16kHz are 320 samples
+        silence = array.array('h', [0] * 320 * 50).tobytes()
+        speech = array.array('h', [1000, -1000] * 160 * 10).tobytes()
+        tail = array.array('h', [0] * 320 * 100).tobytes()
+        never_sent = array.array('h', [1000, -1000] * 160 * 10).tobytes()
+
+        trimmed = b''.join(trim_silence(
+            iter([silence, speech, tail, never_sent]),
+            pre_roll_ms=100, trailing_ms=400
+        ))
+
+        # 5 frames of pre roll, the speech, then 20 frames of silence
+        self.assertEqual(len(trimmed), 640 * (5 + 10 + 20))
+        self.assertEqual(trimmed[640 * 5:640 * 15], speech)
+
+    def test_silence_only(self):
+        silence = array.array('h', [0] * 320 * 50).tobytes()
+        self.assertEqual(list(trim_silence(silence)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,15 @@
 import unittest
-from houndipy import sign_request
+from unittest import mock
+
+from requests import Request
+
+from houndipy import HoundifyAdapter, Signer, sign_request
+from houndipy.policy import Policy
+from houndipy.testing import MockHoundServer
+
+USER_ID = 'ae06fcd3-6447-4356-afaa-813aa4f2ba41'
+CLIENT_ID = 'KFvH6Rpy3tUimL-pCUFpPg=='
+CLIENT_KEY = 'KgMLuq-k1oCUv5bzTlKAJf_mGo0T07jTogbi6apcqLa114CCPH3rlK4c0RktY30xLEQ49MZ-C2bMyFOVQO4PyA=='
 
 
 class TestClient(unittest.TestCase):
@@ -21,5 +31,78 @@ class TestClient(unittest.TestCase):
 
         self.assertEqual(res, SHOULD)
 
+    def test_signer_reuse(self):
+        signer = Signer(CLIENT_ID, CLIENT_KEY, USER_ID)
+
+        # the precomputed hmac state mustn't be disturbed by signing
+        for _ in range(2):
+            res = signer.auth_headers(
+                '70aa7c25-c74f-48be-8ca8-cbf73627c05f', 1418068667
+            )
+            self.assertEqual(
+                res['Hound-Client-Authentication'],
+                'KFvH6Rpy3tUimL-pCUFpPg==;1418068667;'
+                'myWdEfHJ7AV8OP23v8pCH1PILL_gxH4uDOAXMi06akk='
+            )
+
+    def test_sign_many(self):
+        adapter = HoundifyAdapter(CLIENT_ID, CLIENT_KEY)
+        requests = [
+            Request('POST', 'https://api.houndify.com/v1/text').prepare()
+            for _ in range(3)
+        ]
+
+        self.assertIs(adapter.sign_many(requests), requests)
+
+        request_ids = {
+            request.headers['Hound-Request-Authentication']
+            for request in requests
+        }
+        self.assertEqual(len(request_ids), 3)
+
+    def test_presigned_send(self):
+        server = MockHoundServer()
+        server.start()
+        self.addCleanup(server.stop)
+        client = server.client(policy=Policy(backoff=0.001))
+
+        def prepare():
+            return Request(
+                'POST', server.url + 'v1/text', params={'query': 'hello'},
+                headers={'Hound-Request-Info': '{}'}
+            ).prepare()
+
+        fresh, stale, retried = client.adapter.sign_many(
+            [prepare(), prepare(), prepare()]
+        )
+        stale._houndipy_presigned -= client.adapter.PRESIGNED_TTL
+        signed = [
+            request.headers['Hound-Request-Authentication']
+            for request in (fresh, stale, retried)
+        ]
+
+        with mock.patch.object(
+            client.adapter, 'sign_request', wraps=client.adapter.sign_request
+        ) as sign_request:
+            for request in (fresh, stale):
+                self.assertEqual(client._sess.send(request).status_code, 200)
+            # only the stale one needed signing again
+            self.assertEqual(sign_request.call_count, 1)
+
+            server.fail(times=1)
+            self.assertEqual(client._sess.send(retried).status_code, 200)
+            self.assertEqual(sign_request.call_count, 2)
+
+        sent = [
+            request.headers['Hound-Request-Authentication']
+            for request in server.requests
+        ]
+        self.assertEqual(sent[0], signed[0])
+        self.assertNotEqual(sent[1], signed[1])
+        # the retry was signed afresh, with a new RequestID
+        self.assertEqual(sent[2], signed[2])
+        self.assertNotEqual(sent[3], signed[2])
+
+
 if __name__ == '__main__':
     unittest.main()
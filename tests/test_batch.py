@@ -0,0 +1,62 @@
+import time
+import asyncio
+import unittest
+import itertools
+
+from houndipy.batch import aimap_ordered, imap_ordered
+
+
+def flaky(item):
+    # later items finish first, to check the order is kept
+    time.sleep((10 - item) / 1000)
+    if item == 3:
+        raise ValueError(item)
+    return item * 2
+
+
+class TestImapOrdered(unittest.TestCase):
+
+    def test_ordered(self):
+        results = list(imap_ordered(flaky, range(10), concurrency=4))
+
+        self.assertEqual([result.item for result in results], list(range(10)))
+        self.assertFalse(results[3].ok)
+        self.assertIsInstance(results[3].error, ValueError)
+        self.assertEqual(results[4].response, 8)
+
+    def test_lazy(self):
+        consumed = []
+
+        def items():
+            for item in itertools.count():
+                consumed.append(item)
+                yield item
+
+        results = imap_ordered(lambda item: item, items(), concurrency=2)
+        self.assertEqual(next(results).response, 0)
+        results.close()
+
+        self.assertLessEqual(len(consumed), 5)
+
+
+class TestAimapOrdered(unittest.TestCase):
+
+    def test_ordered(self):
+        async def func(item):
+            await asyncio.sleep((10 - item) / 1000)
+            return flaky(item)
+
+        async def run():
+            return [
+                result
+                async for result in aimap_ordered(func, range(10), 4)
+            ]
+
+        results = asyncio.run(run())
+        self.assertEqual([result.item for result in results], list(range(10)))
+        self.assertFalse(results[3].ok)
+        self.assertEqual(results[9].response, 18)
+
+
+if __name__ == '__main__':
+    unittest.main()
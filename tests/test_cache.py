@@ -0,0 +1,96 @@
+import os
+import unittest
+import tempfile
+
+from requests import Response
+
+from houndipy.cache import DiskCache, MemoryCache
+from houndipy.request_info import RequestInfoTemplate
+
+URL = 'https://api.houndify.com/v1/text'
+
+
+def response(content):
+    res = Response()
+    res.status_code = 200
+    res.headers['Content-Type'] = 'application/json'
+    res.headers['Content-Length'] = str(len(content))
+    res._content = content
+    res.url = URL
+    return res
+
+
+class CacheTests:
+
+    def test_round_trip(self):
+        key = self.cache.key(URL, {'query': 'hi'}, self.template, {})
+        self.assertIsNone(self.cache.get(key))
+
+        self.cache.set(key, response(b'{"AllResults": []}'))
+        res = self.cache.get(key)
+
+        self.assertEqual(res.json(), {'AllResults': []})
+        self.assertNotIn('Content-Length', res.headers)
+        self.assertEqual(self.cache.stats.hits, 1)
+        self.assertEqual(self.cache.stats.misses, 1)
+
+    def test_key_ignores_volatile_fields(self):
+        first = self.cache.key(URL, {'query': 'hi'}, self.template, {
+            'RequestID': 'a', 'TimeStamp': 1
+        })
+        second = self.cache.key(URL, {'query': 'hi'}, self.template, {
+            'RequestID': 'b', 'TimeStamp': 2
+        })
+        other = self.cache.key(URL, {'query': 'ho'}, self.template, {})
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+
+    def test_key_includes_template(self):
+        self.assertNotEqual(
+            self.cache.key(URL, {}, self.template, {}),
+            self.cache.key(URL, {}, RequestInfoTemplate(ClientID='b'), {})
+        )
+
+    def test_conversation_state_bypasses(self):
+        self.assertTrue(self.cache.cacheable(self.template, {}))
+        self.assertFalse(self.cache.cacheable(
+            self.template, {'ConversationState': {'a': 1}}
+        ))
+        self.assertEqual(self.cache.stats.bypasses, 1)
+
+    def test_ttl(self):
+        self.cache.ttl = -1
+        self.cache.set('key', response(b'{}'))
+        self.assertIsNone(self.cache.get('key'))
+
+
+class TestMemoryCache(CacheTests, unittest.TestCase):
+
+    def setUp(self):
+        self.template = RequestInfoTemplate(ClientID='a')
+        self.cache = MemoryCache(maxsize=2)
+
+    def test_lru(self):
+        for key in 'abc':
+            self.cache.set(key, response(b'{}'))
+            self.cache.get('a')
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNotNone(self.cache.get('a'))
+        self.assertIsNone(self.cache.get('b'))
+
+
+class TestDiskCache(CacheTests, unittest.TestCase):
+
+    def setUp(self):
+        self.template = RequestInfoTemplate(ClientID='a')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.cache = DiskCache(os.path.join(directory.name, 'cache.db'))
+        self.addCleanup(self.cache.close)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,355 @@
+import os
+import time
+import socket
+import struct
+import asyncio
+import unittest
+import tempfile
+import threading
+from unittest import mock
+
+from requests.exceptions import ConnectionError
+
+from houndipy import HoundipyException, sign_request
+from houndipy.audio import AsyncAudioStream, AudioStream, MappedAudio
+from houndipy.cache import MemoryCache
+from houndipy.exceptions import AudioStreamAborted
+from houndipy.policy import Policy
+from houndipy.store import MemoryStore
+from houndipy.streaming import HoundPartialTranscript, HoundServer
+from houndipy.testing import (
+    DEFAULT_RESPONSE, MOCK_CLIENT_KEY, MockHoundServer, _Server,
+    verify_signature
+)
+
+
+class TestClient(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockHoundServer(
+            partial_transcripts=['what', 'what time']
+        )
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.client = self.server.client(policy=Policy(backoff=0.001))
+
+    def test_text(self):
+        res = self.client.text('what time is it', ClientVersion='1.0')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), DEFAULT_RESPONSE)
+
+        request, = self.server.requests
+        self.assertEqual(request.path, '/v1/text')
+        self.assertEqual(request.params, {'query': 'what time is it'})
+        self.assertEqual(request.request_info, {'ClientVersion': '1.0'})
+        # the mock compresses when asked, so this went through decoding
+        self.assertIn(
+            'gzip', request.headers['Hound-Response-Accept-Encoding']
+        )
+
+    def test_bad_signature(self):
+        client = self.server.client()
+        client.adapter.client_key = 'd3Jvbmc='
+        client.adapter._init_hmac()
+        with self.assertRaisesRegex(HoundipyException, 'Invalid signature'):
+            client.text('hello')
+
+    def test_speech(self):
+        self.client.speech(b'\0' * 10000)
+        with AudioStream() as stream:
+            stream.write(b'\1' * 100)
+        self.client.speech(stream)
+
+        bytes_request, stream_request = self.server.requests
+        self.assertEqual(bytes_request.path, '/v1/audio')
+        self.assertEqual(bytes_request.body, b'\0' * 10000)
+        self.assertEqual(stream_request.body, b'\1' * 100)
+
+    def test_speech_path(self):
+        fh = tempfile.NamedTemporaryFile(delete=False)
+        self.addCleanup(os.unlink, fh.name)
+        with fh:
+            fh.write(b'\2' * 100000)
+
+        self.server.fail(times=1)
+        res = self.client.speech(fh.name)
+        self.assertEqual(res.status_code, 200)
+
+        # the retry sent the whole file again
+        failed, request = self.server.requests
+        self.assertEqual(failed.body, b'\2' * 100000)
+        self.assertEqual(request.body, b'\2' * 100000)
+        self.assertEqual(request.headers['Content-Length'], '100000')
+        # and unmapped once sent, though the response refers to it
+        self.assertIsNone(res.response.request.body._mmap)
+
+    def test_speech_fails(self):
+        stream = AudioStream(max_chunks=2)
+        errors = []
+
+        def produce():
+            try:
+                while True:
+                    stream.write(b'\1' * 100)
+            except AudioStreamAborted as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=produce, daemon=True)
+        thread.start()
+        self.server.stop()
+        with self.assertRaises(ConnectionError):
+            self.client.speech(stream)
+
+        # rather than waiting forever for the upload to read more
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(errors), 1)
+
+    def test_stream_speech(self):
+        events = list(self.client.stream_speech(b'\0' * 100))
+        self.assertEqual(
+            [type(event) for event in events],
+            [HoundPartialTranscript, HoundPartialTranscript, HoundServer]
+        )
+        self.assertEqual(events[1].transcript, 'what time')
+
+    def test_byte_count_prefix(self):
+        events = list(self.client.stream_speech(
+            b'\0' * 100, ObjectByteCountPrefix=True
+        ))
+        self.assertEqual(len(events), 3)
+
+    def test_conversation(self):
+        conversation = self.client.converse()
+        conversation.text('hello')
+        conversation.text('again')
+
+        first, second = self.server.requests
+        self.assertFalse(first.request_info.get('ConversationState'))
+        self.assertEqual(
+            second.request_info['ConversationState'],
+            DEFAULT_RESPONSE['AllResults'][0]['ConversationState']
+        )
+
+    def test_cache(self):
+        client = self.server.client(cache=MemoryCache())
+        first = client.text('hello')
+        self.assertEqual(client.text('hello').json(), first.json())
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_retry(self):
+        self.server.fail(2)
+        self.assertEqual(self.client.text('hello').status_code, 200)
+
+        first, second, third = self.server.requests
+        self.assertNotEqual(
+            first.headers['Hound-Request-Authentication'],
+            third.headers['Hound-Request-Authentication']
+        )
+
+    def test_text_many(self):
+        results = list(self.client.text_many(map(str, range(20))))
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(len(self.server.requests), 20)
+
+
+class TestPooling(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockHoundServer()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def test_prewarm(self):
+        client = self.server.client(prewarm=3, pool_maxsize=4)
+        stats = client.pool_stats
+        self.assertEqual(stats.new_connections, 3)
+
+        client.text('hello')
+        client.text('again')
+        # sent over the connections opened up front
+        self.assertEqual(stats.new_connections, 3)
+        self.assertEqual(stats.hits, 2)
+        self.assertEqual(len(client.adapter.poolmanager.pools), 1)
+
+    def test_waits(self):
+        self.server.delay = 0.05
+        client = self.server.client(pool_maxsize=1, pool_block=True)
+        results = list(client.text_many(['a', 'b', 'c'], concurrency=3))
+        self.assertTrue(all(result.ok for result in results))
+
+        stats = client.pool_stats
+        self.assertEqual(stats.requests, 3)
+        self.assertEqual(stats.new_connections, 1)
+        self.assertGreaterEqual(stats.waits, 1)
+
+
+class TestAsyncClient(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockHoundServer(partial_transcripts=['what'])
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def test_text_and_stream(self):
+        async def main():
+            async with self.server.async_client() as client:
+                res = await client.text('hello')
+                events = [
+                    event async for event in client.stream_speech(b'\0')
+                ]
+            return res, events
+
+        res, events = asyncio.run(main())
+        self.assertEqual(res.json(), DEFAULT_RESPONSE)
+        self.assertEqual(
+            [type(event) for event in events],
+            [HoundPartialTranscript, HoundServer]
+        )
+
+    def test_conversation(self):
+        state = DEFAULT_RESPONSE['AllResults'][0]['ConversationState']
+
+        async def main():
+            async with self.server.async_client() as client:
+                conversation = client.converse()
+                await conversation.text('hello')
+                events = [
+                    event async for event in
+                    conversation.stream_speech(b'\0' * 100)
+                ]
+                await conversation.text('again')
+                return conversation, events
+
+        conversation, events = asyncio.run(main())
+        self.assertIsInstance(events[-1], HoundServer)
+        self.assertEqual(conversation.converstation_state, state)
+
+        first, streamed, last = self.server.requests
+        self.assertFalse(first.request_info.get('ConversationState'))
+        # carried from each response to the next request
+        self.assertEqual(streamed.request_info['ConversationState'], state)
+        self.assertEqual(last.request_info['ConversationState'], state)
+
+    def test_conversation_store(self):
+        store = MemoryStore()
+
+        async def main():
+            async with self.server.async_client(
+                conversation_store=store
+            ) as client:
+                await client.converse('session').text('hello')
+                # another conversation, picking up where it left off
+                await client.converse('session').text('again')
+
+        asyncio.run(main())
+        first, second = self.server.requests
+        self.assertEqual(second.request_info['SessionID'], 'session')
+        self.assertEqual(
+            second.request_info['ConversationState'],
+            DEFAULT_RESPONSE['AllResults'][0]['ConversationState']
+        )
+        self.assertEqual(
+            store.load('session'),
+            DEFAULT_RESPONSE['AllResults'][0]['ConversationState']
+        )
+
+    def test_speech_buffer(self):
+        audio = memoryview(b'\3' * 100000)
+
+        async def main():
+            async with self.server.async_client() as client:
+                return await client.speech(audio)
+
+        self.assertEqual(asyncio.run(main()).status_code, 200)
+        request, = self.server.requests
+        self.assertEqual(request.body, b'\3' * 100000)
+
+    def test_speech_path(self):
+        fh = tempfile.NamedTemporaryFile(delete=False)
+        self.addCleanup(os.unlink, fh.name)
+        with fh:
+            fh.write(b'\2' * 100000)
+
+        async def main():
+            async with self.server.async_client() as client:
+                await client.speech(fh.name)
+                async for event in client.stream_speech(fh.name):
+                    pass
+
+        with mock.patch.object(
+            MappedAudio, 'close', autospec=True, side_effect=MappedAudio.close
+        ) as close:
+            asyncio.run(main())
+        self.assertEqual(close.call_count, 2)
+        self.assertEqual(
+            [request.body for request in self.server.requests],
+            [b'\2' * 100000] * 2
+        )
+
+    def test_speech_fails(self):
+        import aiohttp
+
+        async def main():
+            stream = AsyncAudioStream(max_chunks=2)
+
+            async def produce():
+                with self.assertRaises(AudioStreamAborted):
+                    while True:
+                        await stream.write(b'\1' * 100)
+
+            producer = asyncio.ensure_future(produce())
+            async with self.server.async_client() as client:
+                self.server.stop()
+                with self.assertRaises(aiohttp.ClientConnectionError):
+                    await client.speech(stream)
+
+            # rather than waiting forever for the upload to read more
+            await asyncio.wait_for(producer, 5)
+
+        asyncio.run(main())
+
+
+class TestMockHoundServer(unittest.TestCase):
+
+    def test_client_gone(self):
+        server = MockHoundServer(delay=0.1)
+        server.start()
+        self.addCleanup(server.stop)
+        host, port = server.url.split('//')[1].rstrip('/').split(':')
+
+        with mock.patch.object(_Server, 'handle_error') as handle_error:
+            sock = socket.create_connection((host, int(port)))
+            sock.sendall(
+                b'POST /v1/text?query=hello HTTP/1.1\r\n'
+                b'Content-Length: 0\r\n\r\n'
+            )
+            # reset rather than closed, as a dropped request would be
+            sock.setsockopt(
+                socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0)
+            )
+            sock.close()
+            # for the server to answer, after its delay
+            time.sleep(0.5)
+
+        # rather than a traceback printed for every dropped request
+        handle_error.assert_not_called()
+
+
+class TestVerifySignature(unittest.TestCase):
+
+    def test_verify(self):
+        headers = sign_request('request', 1, 'user', 'id', MOCK_CLIENT_KEY)
+        self.assertIsNone(verify_signature(headers, 'id', MOCK_CLIENT_KEY))
+        self.assertEqual(
+            verify_signature(headers, 'other', MOCK_CLIENT_KEY),
+            'Unknown client id'
+        )
+        self.assertEqual(
+            verify_signature(headers, 'id', 'a2V5'), 'Invalid signature'
+        )
+        self.assertIsNotNone(verify_signature({}, 'id', MOCK_CLIENT_KEY))
+
+
+if __name__ == '__main__':
+    unittest.main()
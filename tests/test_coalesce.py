@@ -0,0 +1,177 @@
+import pickle
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from houndipy.coalesce import SingleFlight
+from houndipy.testing import MockHoundServer
+from houndipy.trace import HistogramExporter, tracing
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.flight = SingleFlight()
+
+    def test_do(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def func():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return 'result'
+
+        with ThreadPoolExecutor(4) as executor:
+            leader = executor.submit(self.flight.do, 'key', func)
+            started.wait()
+            followers = [
+                executor.submit(self.flight.do, 'key', func)
+                for _ in range(3)
+            ]
+            while self.flight.stats.coalesced < 3:
+                pass
+            release.set()
+
+            self.assertEqual(leader.result(), ('result', False))
+            for follower in followers:
+                self.assertEqual(follower.result(), ('result', True))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.flight.stats.leaders, 1)
+        # nothing is kept once the call is done
+        self.assertEqual(self.flight.do('key', lambda: 'again'),
+                         ('again', False))
+
+    def test_do_error(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def func():
+            started.set()
+            release.wait()
+            raise ValueError('failed')
+
+        with ThreadPoolExecutor(2) as executor:
+            leader = executor.submit(self.flight.do, 'key', func)
+            started.wait()
+            follower = executor.submit(self.flight.do, 'key', func)
+            while not self.flight.stats.coalesced:
+                pass
+            release.set()
+
+            for future in (leader, follower):
+                with self.assertRaisesRegex(ValueError, 'failed'):
+                    future.result()
+
+    def test_do_async(self):
+        calls = []
+
+        async def func():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'result'
+
+        async def run():
+            return await asyncio.gather(
+                *[self.flight.do_async('key', func) for _ in range(3)]
+            )
+
+        self.assertEqual(
+            asyncio.run(run()),
+            [('result', False), ('result', True), ('result', True)]
+        )
+        self.assertEqual(len(calls), 1)
+        self.assertFalse(self.flight._tasks)
+
+    def test_leader_cancelled(self):
+        async def func():
+            await asyncio.sleep(0.01)
+            return 'result'
+
+        async def run():
+            leader = asyncio.ensure_future(self.flight.do_async('key', func))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(
+                self.flight.do_async('key', func)
+            )
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        self.assertEqual(asyncio.run(run()), ('result', True))
+
+    def test_pickle(self):
+        flight = pickle.loads(pickle.dumps(SingleFlight(('SessionID',))))
+        self.assertEqual(flight.never_coalesce, ('SessionID',))
+
+
+class TestClientCoalescing(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockHoundServer(delay=0.1)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.flight = SingleFlight()
+        self.client = self.server.client(
+            single_flight=self.flight, pool_maxsize=8
+        )
+
+    def test_text(self):
+        exporter = HistogramExporter()
+        with tracing(exporter):
+            responses = [
+                result.response
+                for result in self.client.text_many(
+                    ['trending'] * 8, concurrency=8, ClientVersion='1.0'
+                )
+            ]
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.flight.stats.coalesced, 7)
+        self.assertEqual(exporter.snapshot()['counters']['coalesced'], 7)
+
+        self.assertEqual(len({id(res) for res in responses}), 8)
+        for res in responses:
+            self.assertEqual(res.content, responses[0].content)
+        responses[0].json()['Status'] = 'Changed'
+        self.assertEqual(responses[1].json()['Status'], 'OK')
+
+    def test_different_queries(self):
+        with ThreadPoolExecutor(4) as executor:
+            list(executor.map(self.client.text, ['a', 'b', 'a', 'b']))
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_conversation_state(self):
+        with ThreadPoolExecutor(3) as executor:
+            list(executor.map(
+                lambda i: self.client.text(
+                    'trending', ConversationState={'ConversationStateTime': 1}
+                ),
+                range(3)
+            ))
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(self.flight.stats.bypasses, 3)
+
+    def test_async(self):
+        client = self.server.async_client(single_flight=self.flight)
+
+        async def run():
+            async with client:
+                return await asyncio.gather(
+                    *[client.text('trending') for _ in range(5)]
+                )
+
+        responses = asyncio.run(run())
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.flight.stats.coalesced, 4)
+        self.assertEqual(
+            [res.json()['Status'] for res in responses], ['OK'] * 5
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
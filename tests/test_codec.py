@@ -0,0 +1,89 @@
+import json
+import unittest
+
+from houndipy import codec
+from houndipy.store import pack, unpack
+from houndipy.streaming import EventParser, HoundServer
+
+DATA = {
+    'Status': 'OK',
+    'AllResults': [{'SpokenResponse': 'Café 東京', 'Score': 0.5}],
+    'Count': 2 ** 40,
+    'Done': True,
+    'Missing': None,
+}
+
+
+class CodecTestMixin:
+    backend = None
+
+    def setUp(self):
+        if self.backend not in codec.available():
+            self.skipTest('{} is not installed'.format(self.backend))
+        previous = codec.backend
+        codec.use(self.backend)
+        self.addCleanup(codec.use, previous)
+
+    def test_round_trip(self):
+        self.assertEqual(codec.loads(codec.dumpb(DATA)), DATA)
+        self.assertEqual(codec.loads(json.dumps(DATA)), DATA)
+        self.assertEqual(codec.loads(json.dumps(DATA).encode()), DATA)
+
+    def test_dumps_matches_stdlib(self):
+        self.assertEqual(codec.dumps(DATA), json.dumps(DATA))
+        self.assertEqual(
+            codec.dumps(DATA, sort_keys=True), json.dumps(DATA, sort_keys=True)
+        )
+        self.assertTrue(codec.dumps(DATA).isascii())
+
+    def test_stdlib_extensions(self):
+        self.assertEqual(codec.loads('[1e400]'), [float('inf')])
+        self.assertEqual(codec.loads(str(2 ** 70)), 2 ** 70)
+        self.assertEqual(codec.loads(codec.dumpb([2 ** 70])), [2 ** 70])
+
+    def test_invalid(self):
+        for data in (b'{"a": ', b'{}{}', b'', b'\xff'):
+            with self.assertRaises(ValueError):
+                codec.loads(data)
+
+    def test_store(self):
+        state = {'ConversationStateTime': 1, 'Text': 'naïve'}
+        self.assertEqual(unpack(pack(state)), state)
+
+    def test_streaming(self):
+        parser = EventParser()
+        self.assertEqual(parser.feed(b'{"Status": '), [])
+        event, = parser.feed(b'"OK", "AllResults": []}\r\n')
+        self.assertIsInstance(event, HoundServer)
+        self.assertEqual(
+            parser.feed(b'{"Status": "OK"}{"Status": "OK"}'),
+            [{'Status': 'OK'}, {'Status': 'OK'}]
+        )
+        parser.close()
+
+
+class TestJSON(CodecTestMixin, unittest.TestCase):
+    backend = 'json'
+
+
+class TestOrjson(CodecTestMixin, unittest.TestCase):
+    backend = 'orjson'
+
+
+class TestUjson(CodecTestMixin, unittest.TestCase):
+    backend = 'ujson'
+
+
+class TestUse(unittest.TestCase):
+
+    def test_unavailable(self):
+        with self.assertRaises(ValueError):
+            codec.use('simplejson')
+
+    def test_default(self):
+        self.assertIn(codec.backend, codec.BACKENDS)
+        self.assertEqual(codec.available()[-1], 'json')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import zlib
+import gzip
+import unittest
+
+from urllib3.exceptions import DecodeError
+
+from houndipy.compression import (
+    Compression, DecodingResponse, decode, iter_decoded
+)
+
+BODY = b'{"AllResults": [{"HTML": "' + b'<b>' * 1000 + b'"}]}'
+
+
+def chunks(data, size=7):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class FakeRaw:
+    def __init__(self, data):
+        self.data = data
+        self.closed = False
+
+    def stream(self, amt=None, decode_content=None):
+        return iter(chunks(self.data))
+
+    def close(self):
+        self.closed = True
+
+
+class TestDecoding(unittest.TestCase):
+
+    def test_gzip(self):
+        self.assertEqual(decode('gzip', gzip.compress(BODY)), BODY)
+
+    def test_deflate(self):
+        self.assertEqual(decode('deflate', zlib.compress(BODY)), BODY)
+
+        raw = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        data = raw.compress(BODY) + raw.flush()
+        self.assertEqual(decode('deflate', data), BODY)
+
+    def test_unknown(self):
+        self.assertEqual(decode(None, BODY), BODY)
+
+    def test_incremental(self):
+        data = gzip.compress(BODY)
+        decoded = list(iter_decoded(chunks(data), 'gzip'))
+        self.assertGreater(len(decoded), 1)
+        self.assertEqual(b''.join(decoded), BODY)
+
+    def test_decoding_response(self):
+        raw = FakeRaw(gzip.compress(BODY))
+        res = DecodingResponse(raw, 'gzip')
+        self.assertEqual(b''.join(res.stream()), BODY)
+
+        res.close()
+        self.assertTrue(raw.closed)
+
+    def test_decoding_error(self):
+        res = DecodingResponse(FakeRaw(b'not gzip'), 'gzip')
+        with self.assertRaises(DecodeError):
+            b''.join(res.stream())
+
+
+class TestCompression(unittest.TestCase):
+
+    def test_off(self):
+        headers = {}
+        self.assertIs(Compression().compress(headers, BODY), BODY)
+        self.assertEqual(headers, {})
+
+    def test_bytes(self):
+        headers = {'Content-Length': str(len(BODY))}
+        body = Compression(request_encoding='gzip').compress(headers, BODY)
+        self.assertEqual(gzip.decompress(body), BODY)
+        self.assertEqual(headers, {
+            'Content-Length': str(len(body)), 'Content-Encoding': 'gzip'
+        })
+
+    def test_min_size(self):
+        headers = {}
+        compression = Compression(request_encoding='gzip', min_size=10000)
+        self.assertIs(compression.compress(headers, BODY), BODY)
+        self.assertEqual(headers, {})
+
+    def test_iterator(self):
+        headers = {}
+        compression = Compression(request_encoding='deflate')
+        body = list(compression.compress(headers, iter(chunks(BODY, 100))))
+        self.assertEqual(headers, {'Content-Encoding': 'deflate'})
+        # every chunk is flushed through
+        self.assertGreater(len(body), 1)
+        self.assertEqual(zlib.decompress(b''.join(body)), BODY)
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            Compression(request_encoding='br')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import time
+import pickle
+import unittest
+
+from houndipy import HoundipyException
+from houndipy.http2 import HTTP2Adapter, httpx
+from houndipy.policy import Policy
+from houndipy.streaming import HoundPartialTranscript, HoundServer
+from houndipy.testing import DEFAULT_RESPONSE, MockHoundServer, h2
+
+
+@unittest.skipIf(httpx is None or h2 is None, 'requires httpx[http2]')
+class TestHTTP2(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockHoundServer(
+            http2=True, partial_transcripts=['what', 'what time']
+        )
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.client = self.server.client(policy=Policy(backoff=0.001))
+        self.addCleanup(self.client.adapter.close)
+
+    def connections(self):
+        return sum(
+            len(client._transport._pool.connections)
+            for client in self.client.adapter._clients.values()
+        )
+
+    def test_text(self):
+        res = self.client.text('what time is it', ClientVersion='1.0')
+        self.assertIsInstance(self.client.adapter, HTTP2Adapter)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), DEFAULT_RESPONSE)
+        self.assertEqual(res.raw.version, 'HTTP/2')
+
+        request, = self.server.requests
+        self.assertEqual(request.params, {'query': 'what time is it'})
+        self.assertEqual(request.request_info, {'ClientVersion': '1.0'})
+        # HTTP/2 header names are lower case
+        self.assertIn(
+            'gzip', request.headers['hound-response-accept-encoding']
+        )
+
+    def test_stream_speech(self):
+        audio = b'\1' * 200000
+        events = list(self.client.stream_speech(audio))
+        self.assertEqual(
+            [type(event) for event in events],
+            [HoundPartialTranscript, HoundPartialTranscript, HoundServer]
+        )
+        self.assertEqual(self.server.requests[0].body, audio)
+
+    def test_speech_buffer(self):
+        res = self.client.speech(memoryview(b'\1' * 200000))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.server.requests[0].body, b'\1' * 200000)
+
+    def test_multiplexed(self):
+        self.server.delay = 0.1
+        start = time.monotonic()
+        results = list(self.client.text_many(map(str, range(20)), 20))
+        self.assertTrue(all(result.ok for result in results))
+        # concurrently over the one connection, rather than one by one
+        self.assertEqual(self.connections(), 1)
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_retry(self):
+        self.server.fail(times=2)
+        res = self.client.text('hello')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_bad_signature(self):
+        client = self.server.client()
+        self.addCleanup(client.adapter.close)
+        client.adapter.client_key = 'd3Jvbmc='
+        client.adapter._init_hmac()
+        with self.assertRaisesRegex(HoundipyException, 'Invalid signature'):
+            client.text('hello')
+
+    def test_pickle(self):
+        self.client.text('hello')
+        client = pickle.loads(pickle.dumps(self.client))
+        self.addCleanup(client.adapter.close)
+        self.assertTrue(client.adapter.prior_knowledge)
+        self.assertEqual(client.text('hello').status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
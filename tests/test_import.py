@@ -0,0 +1,46 @@
+import sys
+import unittest
+import subprocess
+
+import houndipy
+
+
+def imported_after(statement):
+    '''
+    The modules imported by `statement`, in a fresh interpreter
+    '''
+    output = subprocess.check_output([
+        sys.executable, '-c',
+        statement + '\nimport sys\nprint("\\n".join(sys.modules))'
+    ], universal_newlines=True)
+    return set(output.split())
+
+
+class TestImport(unittest.TestCase):
+
+    def test_lazy(self):
+        modules = imported_after('import houndipy')
+        for name in ('requests', 'urllib3', 'numpy', 'asyncio',
+                     'houndipy.client', 'houndipy.schema'):
+            self.assertNotIn(name, modules)
+
+    def test_client(self):
+        modules = imported_after('from houndipy import Client')
+        self.assertIn('requests', modules)
+        for name in ('numpy', 'asyncio', 'houndipy.schema'):
+            self.assertNotIn(name, modules)
+
+    def test_attributes(self):
+        from houndipy.client import Client
+        from houndipy.request_info import request_info_schema
+        from houndipy.schema import request_info_schema as schema
+
+        self.assertIs(houndipy.Client, Client)
+        self.assertIs(request_info_schema, schema)
+        self.assertIn('Client', dir(houndipy))
+        with self.assertRaises(AttributeError):
+            houndipy.Missing
+
+
+if __name__ == '__main__':
+    unittest.main()
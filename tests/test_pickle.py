@@ -0,0 +1,186 @@
+import os
+import pickle
+import signal
+import unittest
+import tempfile
+import threading
+
+from houndipy import Client
+from houndipy.batch import process_map
+from houndipy.cache import MemoryCache, DiskCache
+from houndipy.coalesce import SingleFlight
+from houndipy.ratelimit import BATCH, INTERACTIVE, TokenBucket
+from houndipy.store import SQLiteStore
+from houndipy.testing import MockHoundServer
+
+
+def _user_id(client, item):
+    return client.adapter.user_id, item
+
+
+class TestPickle(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def round_trip(self, obj):
+        return pickle.loads(pickle.dumps(obj))
+
+    def test_client(self):
+        client = Client(
+            'id', 'a2V5', pool_maxsize=3, cache=MemoryCache(ttl=5),
+            conversation_store=SQLiteStore(
+                os.path.join(self.dir.name, 'store.db')
+            )
+        )
+        client.cache.set('key', _FakeResponse())
+        copy = self.round_trip(client)
+
+        self.assertEqual(copy.adapter.user_id, client.adapter.user_id)
+        self.assertEqual(copy.adapter._pool_maxsize, 3)
+        self.assertEqual(
+            copy.adapter.auth_headers('request', 1),
+            client.adapter.auth_headers('request', 1)
+        )
+        self.assertEqual(copy.cache.ttl, 5)
+        # entries stay behind
+        self.assertEqual(len(copy.cache), 0)
+        self.assertEqual(
+            copy.conversation_store.path, client.conversation_store.path
+        )
+
+    def test_disk_cache(self):
+        cache = DiskCache(os.path.join(self.dir.name, 'cache.db'))
+        cache.set('key', _FakeResponse())
+        copy = self.round_trip(cache)
+        self.assertEqual(copy.get('key').content, b'{}')
+
+    def test_process_map(self):
+        client = Client('id', 'a2V5')
+        results = list(process_map(client, _user_id, range(5), workers=2))
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(
+            [result.response for result in results],
+            [(client.adapter.user_id, i) for i in range(5)]
+        )
+
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'requires fork')
+class TestFork(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.server = MockHoundServer()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def in_child(self, func):
+        '''
+        Runs `func` in a forked child, returning what it returns
+        '''
+        read, write = os.pipe()
+        pid = os.fork()
+        if not pid:
+            os.close(read)
+            # rather than hanging the tests should it deadlock
+            signal.alarm(5)
+            try:
+                result = func()
+            except BaseException as e:
+                result = e
+            with os.fdopen(write, 'wb') as fh:
+                pickle.dump(result, fh)
+            os._exit(0)
+
+        os.close(write)
+        with os.fdopen(read, 'rb') as fh:
+            result = pickle.load(fh)
+        os.waitpid(pid, 0)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    def test_client(self):
+        client = self.server.client()
+        client.text('hello')
+        self.assertEqual(len(client.adapter.poolmanager.pools), 1)
+
+        def child():
+            adapter = client.adapter
+            # rather than the parent's sockets
+            before = (
+                len(adapter.poolmanager.pools), adapter.pool_stats.requests
+            )
+            client.text('again')
+            return before, adapter.pool_stats.new_connections
+
+        before, new_connections = self.in_child(child)
+        self.assertEqual(before, (0, 0))
+        self.assertEqual(new_connections, 1)
+        # and the parent's are still good
+        client.text('hello')
+        self.assertEqual(client.pool_stats.new_connections, 1)
+
+    def test_sqlite(self):
+        cache = DiskCache(os.path.join(self.dir.name, 'cache.db'))
+        store = SQLiteStore(os.path.join(self.dir.name, 'store.db'))
+        cache.set('key', _FakeResponse())
+        store.save('session', {'a': 1})
+        parent = cache._connection(), store._connection()
+
+        def child():
+            connections = cache._connection(), store._connection()
+            store.save('child', {'b': 2})
+            return (
+                [a is not b for a, b in zip(parent, connections)],
+                cache.get('key').content,
+                store.load('session'),
+            )
+
+        self.assertEqual(
+            self.in_child(child), ([True, True], b'{}', {'a': 1})
+        )
+        self.assertEqual(store.load('child'), {'b': 2})
+        self.assertIs(cache._connection(), parent[0])
+
+    def test_single_flight(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+
+        def leader():
+            started.set()
+            release.wait()
+            return 'parent'
+
+        thread = threading.Thread(target=flight.do, args=('key', leader))
+        thread.start()
+        started.wait()
+        try:
+            # the parent's call won't ever finish in the child
+            result = self.in_child(lambda: flight.do('key', lambda: 'child'))
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(result, ('child', False))
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=1)
+        # as if an interactive request were waiting in another thread
+        bucket._waiting(INTERACTIVE, 1)
+        with bucket._lock:
+            taken = self.in_child(lambda: bucket.acquire(BATCH, timeout=0))
+        self.assertTrue(taken)
+
+
+class _FakeResponse:
+    status_code = 200
+    headers = {}
+    content = b'{}'
+    url = 'https://api.houndify.com/v1/text'
+
+
+if __name__ == '__main__':
+    unittest.main()
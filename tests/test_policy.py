@@ -0,0 +1,126 @@
+import time
+import pickle
+import unittest
+
+from requests import PreparedRequest
+from requests.exceptions import ConnectionError, ReadTimeout
+
+from houndipy.policy import Policy
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def prepared(body=None):
+    request = PreparedRequest()
+    request.prepare(
+        'POST', 'https://api.houndify.com/v1/text', headers={}, data=body
+    )
+    return request
+
+
+class TestPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = Policy(backoff=0.001)
+        self.attempts = []
+
+    def attempt(self, *outcomes, delay=0):
+        outcomes = list(outcomes)
+
+        def attempt(request, **kwargs):
+            self.attempts.append(kwargs)
+            time.sleep(delay)
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return FakeResponse(outcome)
+        return attempt
+
+    def test_success(self):
+        res = self.policy.send(self.attempt(200), prepared())
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.attempts, [{'stream': False, 'timeout': 30}])
+
+    def test_retry_status(self):
+        res = self.policy.send(self.attempt(503, 502, 200), prepared())
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(self.attempts), 3)
+
+    def test_retry_error(self):
+        res = self.policy.send(
+            self.attempt(ConnectionError(), ReadTimeout(), 200), prepared()
+        )
+        self.assertEqual(res.status_code, 200)
+
+    def test_retries_exhausted(self):
+        res = self.policy.send(self.attempt(503, 503, 503), prepared())
+        self.assertEqual(res.status_code, 503)
+
+        with self.assertRaises(ConnectionError):
+            self.policy.send(
+                self.attempt(*[ConnectionError()] * 3), prepared()
+            )
+
+    def test_unreplayable_body(self):
+        request = prepared(iter([b'audio']))
+        res = self.policy.send(self.attempt(503, 200), request)
+        self.assertEqual(res.status_code, 503)
+
+    def test_deadline(self):
+        self.policy.backoff = 10
+        with self.assertRaises(ConnectionError):
+            self.policy.send(
+                self.attempt(ConnectionError(), 200), prepared(), timeout=1
+            )
+        self.assertEqual(len(self.attempts), 1)
+        self.assertLessEqual(self.attempts[0]['timeout'], 1)
+
+    def test_hedge(self):
+        self.policy.hedge_after = 0.05
+        calls = []
+
+        def attempt(request, **kwargs):
+            calls.append(request.headers)
+            if len(calls) == 1:
+                time.sleep(0.5)
+                return FakeResponse(500)
+            return FakeResponse(200)
+
+        start = time.monotonic()
+        res = self.policy.send(attempt, prepared())
+        self.assertEqual(res.status_code, 200)
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertIsNot(calls[0], calls[1])
+
+    def test_hedge_after_deadline(self):
+        self.policy.hedge_after = 0.05
+        res = self.policy.send(
+            self.attempt(200, 200, delay=0.2), prepared(), timeout=0.03
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(self.attempts), 1)
+
+    def test_hedge_delay(self):
+        self.policy.hedge_after = 1
+        self.assertEqual(self.policy.hedge_delay(), 1)
+        for i in range(100):
+            self.policy.latencies.add(i / 100)
+        self.assertEqual(self.policy.hedge_delay(), 0.95)
+
+    def test_pickle(self):
+        self.policy.hedge_after = 1
+        self.policy.latencies.add(1)
+        policy = pickle.loads(pickle.dumps(self.policy))
+        self.assertEqual(policy.hedge_after, 1)
+        self.assertEqual(len(policy.latencies), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
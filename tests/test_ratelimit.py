@@ -0,0 +1,182 @@
+import os
+import time
+import pickle
+import asyncio
+import tempfile
+import threading
+import unittest
+import multiprocessing
+
+from houndipy.ratelimit import (
+    BATCH, INTERACTIVE, FileTokenBucket, TokenBucket, fcntl
+)
+from houndipy.testing import MockHoundServer
+from houndipy.trace import tracing
+
+
+def take_all(path, results):
+    bucket = FileTokenBucket(path, rate=0.001, burst=10)
+    results.put(sum(bucket.acquire(timeout=0) for _ in range(10)))
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst(self):
+        bucket = TokenBucket(rate=0.001, burst=3)
+        self.assertEqual(
+            [bucket.acquire(timeout=0) for _ in range(4)],
+            [True, True, True, False]
+        )
+
+    def test_refill(self):
+        bucket = TokenBucket(rate=100, burst=1)
+        self.assertTrue(bucket.acquire())
+        start = time.monotonic()
+        self.assertTrue(bucket.acquire())
+        self.assertGreater(time.monotonic() - start, 0.005)
+
+    def test_timeout(self):
+        bucket = TokenBucket(rate=1, burst=1)
+        bucket.acquire()
+        start = time.monotonic()
+        self.assertFalse(bucket.acquire(timeout=0.05))
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_reserve(self):
+        bucket = TokenBucket(rate=0.001, burst=3, reserve=1)
+        self.assertTrue(bucket.acquire(BATCH, timeout=0))
+        self.assertTrue(bucket.acquire(BATCH, timeout=0))
+        # the last token is kept for interactive queries
+        self.assertFalse(bucket.acquire(BATCH, timeout=0))
+        self.assertTrue(bucket.acquire(INTERACTIVE, timeout=0))
+
+    def test_reserve_too_large(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=1, burst=2, reserve=2)
+
+    def test_interactive_first(self):
+        bucket = TokenBucket(rate=20, burst=1)
+        bucket.acquire()
+        order = []
+
+        def acquire(priority):
+            bucket.acquire(priority)
+            order.append(priority)
+
+        batch = threading.Thread(target=acquire, args=(BATCH,))
+        interactive = threading.Thread(target=acquire, args=(INTERACTIVE,))
+        batch.start()
+        time.sleep(0.01)
+        interactive.start()
+        batch.join()
+        interactive.join()
+        self.assertEqual(order, [INTERACTIVE, BATCH])
+
+    def test_async(self):
+        bucket = TokenBucket(rate=100, burst=1)
+
+        async def run():
+            return await asyncio.gather(
+                *[bucket.acquire_async() for _ in range(3)]
+            )
+
+        start = time.monotonic()
+        self.assertEqual(asyncio.run(run()), [True] * 3)
+        self.assertGreater(time.monotonic() - start, 0.015)
+
+    def test_pickle(self):
+        bucket = pickle.loads(pickle.dumps(TokenBucket(5, 10, reserve=2)))
+        self.assertEqual(
+            (bucket.rate, bucket.burst, bucket.reserve), (5, 10, 2)
+        )
+        self.assertTrue(bucket.acquire(timeout=0))
+
+
+@unittest.skipIf(fcntl is None, 'requires fcntl')
+class TestFileTokenBucket(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+
+    def test_shared(self):
+        first = FileTokenBucket(self.path, rate=0.001, burst=3)
+        second = FileTokenBucket(self.path, rate=0.001, burst=3)
+        self.addCleanup(first.close)
+        self.addCleanup(second.close)
+
+        self.assertTrue(first.acquire(timeout=0))
+        self.assertTrue(second.acquire(timeout=0))
+        self.assertTrue(first.acquire(timeout=0))
+        self.assertFalse(second.acquire(timeout=0))
+
+    def test_processes(self):
+        results = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(
+                target=take_all, args=(self.path, results)
+            )
+            for _ in range(3)
+        ]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+        self.assertEqual(sum(results.get() for _ in procs), 10)
+
+    def test_pickle(self):
+        bucket = FileTokenBucket(self.path, rate=0.001, burst=2)
+        bucket.acquire()
+        copy = pickle.loads(pickle.dumps(bucket))
+        self.addCleanup(bucket.close)
+        self.addCleanup(copy.close)
+        self.assertEqual(copy.path, self.path)
+        self.assertTrue(copy.acquire(timeout=0))
+        self.assertFalse(copy.acquire(timeout=0))
+
+
+class TestClientRateLimit(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockHoundServer()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def test_client(self):
+        client = self.server.client(rate_limiter=TokenBucket(50, burst=1))
+        traces = []
+        start = time.monotonic()
+        with tracing(traces.append):
+            for _ in range(3):
+                client.text('hello')
+        self.assertGreater(time.monotonic() - start, 0.03)
+        self.assertGreater(traces[-1].phases['throttle'], 0)
+
+    def test_batch_priority(self):
+        bucket = TokenBucket(0.001, burst=3, reserve=1)
+        client = self.server.client(rate_limiter=bucket)
+        results = list(client.text_many(['a', 'b']))
+        self.assertTrue(all(result.ok for result in results))
+        # only the reserved token is left, for interactive queries
+        self.assertFalse(bucket.acquire(BATCH, timeout=0))
+        self.assertTrue(bucket.acquire(INTERACTIVE, timeout=0))
+
+    def test_async_client(self):
+        client = self.server.async_client(
+            rate_limiter=TokenBucket(50, burst=1)
+        )
+
+        async def run():
+            async with client:
+                for _ in range(3):
+                    await client.text('hello')
+
+        start = time.monotonic()
+        asyncio.run(run())
+        self.assertGreater(time.monotonic() - start, 0.03)
+        self.assertEqual(len(self.server.requests), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
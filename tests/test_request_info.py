@@ -0,0 +1,109 @@
+import json
+import unittest
+
+from houndipy.exceptions import RequestInfoError
+from houndipy.request_info import (
+    RequestInfoTemplate, encode_request_info, validate_request_info
+)
+
+
+class TestValidateRequestInfo(unittest.TestCase):
+
+    def test_valid(self):
+        info = {'Latitude': -31, 'UnitPreference': 'METRIC', 'MinResults': 2}
+        self.assertIs(validate_request_info(info), info)
+
+    def test_out_of_range(self):
+        with self.assertRaises(RequestInfoError):
+            validate_request_info({'Latitude': 91})
+
+    def test_wrong_type(self):
+        with self.assertRaises(RequestInfoError):
+            validate_request_info({'Longitude': 'west'})
+
+    def test_enum(self):
+        with self.assertRaises(RequestInfoError):
+            validate_request_info({'UnitPreference': 'CUBITS'})
+
+    def test_unknown_field(self):
+        with self.assertRaises(RequestInfoError):
+            validate_request_info({'Colour': 'blue'})
+
+
+class TestEncodeRequestInfo(unittest.TestCase):
+
+    def test_round_trip(self):
+        info = {
+            'ClientID': 'kiosk',
+            'RequestID': 'a',
+            'ConversationState': {'a': [1, 2]},
+            'MaxResults': 3,
+        }
+        self.assertEqual(json.loads(encode_request_info(info)), info)
+
+    def test_empty(self):
+        self.assertEqual(encode_request_info({}), '{}')
+
+    def test_order(self):
+        self.assertEqual(
+            encode_request_info({'RequestID': 'a', 'ClientID': 'b'}),
+            '{"RequestID": "a", "ClientID": "b"}'
+        )
+
+
+class TestRequestInfoTemplate(unittest.TestCase):
+
+    def setUp(self):
+        self.template = RequestInfoTemplate(
+            ClientID='kiosk',
+            ClientMatches=[{'Expression': '"hi"'}],
+        )
+
+    def test_static_only(self):
+        self.assertEqual(
+            json.loads(self.template.render()),
+            self.template.request_info
+        )
+
+    def test_splice(self):
+        rendered = json.loads(self.template.render({'RequestID': 'a'}))
+        self.assertEqual(rendered, {
+            'ClientID': 'kiosk',
+            'ClientMatches': [{'Expression': '"hi"'}],
+            'RequestID': 'a',
+        })
+
+    def test_splice_text(self):
+        self.assertEqual(
+            self.template.render({'ResultUpdateAllowed': True}),
+            '{"ClientID": "kiosk", '
+            '"ClientMatches": [{"Expression": "\\"hi\\""}], '
+            '"ResultUpdateAllowed": true}'
+        )
+
+    def test_splice_empty(self):
+        self.assertEqual(
+            RequestInfoTemplate().render({'MinResults': 1}),
+            '{"MinResults": 1}'
+        )
+
+    def test_override(self):
+        rendered = json.loads(self.template.render({'ClientID': 'phone'}))
+        self.assertEqual(rendered['ClientID'], 'phone')
+
+    def test_extend(self):
+        template = self.template.extend(SessionID='b')
+        self.assertEqual(json.loads(template.render())['SessionID'], 'b')
+        self.assertNotIn('SessionID', self.template.request_info)
+
+    def test_validates_static(self):
+        with self.assertRaises(RequestInfoError):
+            RequestInfoTemplate(MaxResults=0)
+
+    def test_validates_per_request(self):
+        with self.assertRaises(RequestInfoError):
+            self.template.render({'MaxResults': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from unittest import mock
+
+from requests import Response
+
+from houndipy.response import HoundResponse
+
+
+def response(content):
+    res = Response()
+    res.status_code = 200
+    res._content = content
+    return res
+
+
+class TestHoundResponse(unittest.TestCase):
+
+    def test_parsed_once(self):
+        res = HoundResponse(response(
+            b'{"AllResults": [{"ConversationState": {"a": 1}, '
+            b'"NativeData": {"LongResult": "Hi"}}]}'
+        ))
+
+        with mock.patch('houndipy.response.codec.loads') as loads:
+            loads.return_value = {'AllResults': []}
+            res.json()
+            res.all_results
+            res.error_message
+        loads.assert_called_once()
+
+    def test_fields(self):
+        res = HoundResponse(response(
+            b'{"AllResults": [{"ConversationState": {"a": 1}, '
+            b'"NativeData": {"LongResult": "Hi"}}]}'
+        ))
+
+        self.assertEqual(res.conversation_state, {'a': 1})
+        self.assertEqual(res.native_data, {'LongResult': 'Hi'})
+        self.assertIsNone(res.error_message)
+        self.assertTrue(res.ok)
+        self.assertEqual(res.status_code, 200)
+
+    def test_not_json(self):
+        res = HoundResponse(response(b'<html>'))
+
+        self.assertEqual(res.all_results, [])
+        self.assertIsNone(res.conversation_state)
+        with self.assertRaises(ValueError):
+            res.json()
+        self.assertEqual(res.content, b'<html>')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import json
+import pickle
+import unittest
+
+from requests import Response
+
+from houndipy.response import HoundResponse
+from houndipy.results import ConversationState, Result, spoken_text
+from houndipy.streaming import classify
+
+BODY = {
+    'Status': 'OK',
+    'AllResults': [
+        {
+            'CommandKind': 'InformationCommand',
+            'SpokenResponse': 'Chad is 40',
+            'SpokenResponseLong': 'Chad Reed is 40 years old',
+            'WrittenResponse': 'Chad is 40',
+            'WrittenResponseLong': 'Chad Reed is 40 years old.',
+            'ConversationState': {'ConversationStateTime': 1418068667},
+            'NativeData': {'LongResult': 'Chad Reed is 40 years old'},
+        },
+        {'CommandKind': 'NoResultCommand', 'SpokenResponse': 'Hmm'},
+    ],
+}
+
+
+def response():
+    res = Response()
+    res.status_code = 200
+    res._content = json.dumps(BODY).encode()
+    return HoundResponse(res)
+
+
+class TestResults(unittest.TestCase):
+
+    def test_views(self):
+        res = response()
+        top, other = res.results
+        data = res.json()['AllResults'][0]
+
+        self.assertEqual(top.command_kind.name, 'InformationCommand')
+        self.assertEqual(str(top.command_kind), 'InformationCommand')
+        self.assertEqual(top.spoken_response.text, 'Chad is 40')
+        self.assertEqual(top.spoken_response.long, data['SpokenResponseLong'])
+        self.assertEqual(
+            top.written_response.long, data['WrittenResponseLong']
+        )
+        self.assertEqual(top.conversation_state.time, 1418068667)
+        self.assertIs(top.native_data, data['NativeData'])
+
+        # nothing is copied
+        self.assertIs(top.data, data)
+        self.assertIs(top.conversation_state.data, data['ConversationState'])
+
+        self.assertIsNone(other.conversation_state)
+        self.assertEqual(other.native_data, {})
+        self.assertIsNone(other.written_response.text)
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            Result({}).extra = 1
+
+    def test_equality(self):
+        state = {'ConversationStateTime': 1}
+        self.assertEqual(
+            ConversationState(state), ConversationState(dict(state))
+        )
+        self.assertNotEqual(ConversationState(state), Result(state))
+        self.assertEqual(
+            pickle.loads(pickle.dumps(Result(state))), Result(state)
+        )
+        with self.assertRaises(TypeError):
+            {Result({'x': 1}), Result({'x': 1})}
+
+    def test_spoken_text(self):
+        self.assertEqual(response().spoken_text, 'Chad Reed is 40 years old')
+        self.assertEqual(spoken_text(BODY['AllResults'][1:]), 'Hmm')
+        self.assertEqual(
+            spoken_text(BODY['AllResults'], long=False), 'Chad is 40'
+        )
+        self.assertIsNone(spoken_text([]))
+
+    def test_streamed(self):
+        event = classify(BODY)
+        self.assertEqual(
+            event.results[1].command_kind.name, 'NoResultCommand'
+        )
+        self.assertEqual(event.spoken_text, 'Chad Reed is 40 years old')
+
+
+if __name__ == '__main__':
+    unittest.main()
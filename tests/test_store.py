@@ -0,0 +1,60 @@
+import os
+import unittest
+import tempfile
+
+from houndipy.store import MemoryStore, SQLiteStore, pack
+
+STATE = {'ConversationStateTime': 1418068667, 'Context': ['a'] * 100}
+
+
+class StoreTests:
+
+    def test_round_trip(self):
+        self.assertIsNone(self.store.load('session'))
+        self.store.save('session', STATE)
+        self.assertEqual(self.store.load('session'), STATE)
+
+    def test_delete(self):
+        self.store.save('session', STATE)
+        self.store.delete('session')
+        self.assertIsNone(self.store.load('session'))
+
+    def test_ttl(self):
+        self.store.ttl = -1
+        self.store.save('session', STATE)
+        self.assertIsNone(self.store.load('session'))
+
+
+class TestMemoryStore(StoreTests, unittest.TestCase):
+
+    def setUp(self):
+        self.store = MemoryStore()
+
+    def test_compressed(self):
+        self.store.save('session', STATE)
+        self.assertEqual(self.store.size, len(pack(STATE)))
+
+    def test_max_bytes(self):
+        self.store.max_bytes = len(pack(STATE)) * 2
+
+        for session_id in 'abc':
+            self.store.save(session_id, STATE)
+            self.store.load('a')
+
+        self.assertEqual(len(self.store), 2)
+        self.assertIsNotNone(self.store.load('a'))
+        self.assertIsNone(self.store.load('b'))
+
+
+class TestSQLiteStore(StoreTests, unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.store = SQLiteStore(os.path.join(directory.name, 'store.db'))
+        self.addCleanup(self.store.close)
+
+
+if __name__ == '__main__':
+    unittest.main()
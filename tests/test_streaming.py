@@ -0,0 +1,83 @@
+import json
+import unittest
+
+from houndipy.exceptions import HoundipyException
+from houndipy.streaming import (
+    EventParser, HoundPartialTranscript, HoundServer, HoundUpdate
+)
+
+PARTIAL = {
+    'Format': 'SoundHoundVoiceSearchParialTranscript',
+    'PartialTranscript': 'what is',
+}
+SERVER = {
+    'Format': 'SoundHoundVoiceSearchResult',
+    'Status': 'OK',
+    'AllResults': [],
+}
+UPDATE = {
+    'Format': 'SoundHoundVoiceSearchResultUpdate',
+}
+
+
+def prefixed(obj):
+    body = json.dumps(obj).encode()
+    return '{:x}\r\n'.format(len(body)).encode() + body + b'\r\n'
+
+
+class TestEventParser(unittest.TestCase):
+
+    def feed_bytewise(self, parser, data):
+        events = []
+        for i in range(len(data)):
+            events.extend(parser.feed(data[i:i + 1]))
+        parser.close()
+        return events
+
+    def test_raw(self):
+        data = b''.join(
+            json.dumps(obj).encode() for obj in (PARTIAL, SERVER, UPDATE)
+        )
+        events = self.feed_bytewise(EventParser(), data)
+
+        self.assertEqual(
+            [type(event) for event in events],
+            [HoundPartialTranscript, HoundServer, HoundUpdate]
+        )
+        self.assertEqual(events[0].transcript, 'what is')
+
+    def test_prefixed(self):
+        data = b''.join(prefixed(obj) for obj in (PARTIAL, SERVER))
+        events = self.feed_bytewise(EventParser(byte_count_prefix=True), data)
+
+        self.assertEqual(events, [PARTIAL, SERVER])
+        self.assertIsInstance(events[1], HoundServer)
+
+    def test_multibyte(self):
+        data = json.dumps({'AllResults': ['é']}, ensure_ascii=False)
+        events = self.feed_bytewise(EventParser(), data.encode())
+
+        self.assertEqual(events[0]['AllResults'], ['é'])
+
+    def test_braces_in_strings(self):
+        obj = {'Status': 'OK', 'Text': '} {"\\" \\\\ {', 'AllResults': []}
+        data = (json.dumps(obj) + '\r\n' + json.dumps(UPDATE)).encode()
+        events = self.feed_bytewise(EventParser(), data)
+
+        self.assertEqual(events, [obj, UPDATE])
+        self.assertIsInstance(events[0], HoundServer)
+
+    def test_invalid(self):
+        parser = EventParser()
+        with self.assertRaises(HoundipyException):
+            parser.feed(b'{"Status": OK}')
+
+    def test_incomplete(self):
+        parser = EventParser()
+        self.assertEqual(parser.feed(b'{"Status": '), [])
+        with self.assertRaises(HoundipyException):
+            parser.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
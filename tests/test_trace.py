@@ -0,0 +1,113 @@
+import unittest
+
+from houndipy.testing import MockHoundServer
+from houndipy.trace import (
+    Histogram, HistogramExporter, Trace, count_sent, current_trace,
+    start_trace, tracing
+)
+
+
+class TestTracing(unittest.TestCase):
+
+    def test_disabled(self):
+        self.assertIsNone(start_trace('url'))
+        self.assertIsNone(current_trace())
+
+    def test_enabled(self):
+        traces = []
+        with tracing(traces.append):
+            trace = start_trace('url')
+            with trace:
+                self.assertIs(current_trace(), trace)
+                with trace.phase('sign'):
+                    pass
+            self.assertIsNone(current_trace())
+
+        self.assertIsNone(start_trace('url'))
+        self.assertEqual(traces, [trace])
+        self.assertEqual(list(trace.phases), ['sign'])
+        self.assertGreaterEqual(trace.duration, trace.phases['sign'])
+
+    def test_error(self):
+        traces = []
+        with tracing(traces.append):
+            with self.assertRaises(ValueError):
+                with start_trace('url'):
+                    raise ValueError()
+        self.assertIsInstance(traces[0].error, ValueError)
+
+    def test_count_sent(self):
+        trace = Trace('url')
+        self.assertEqual(count_sent(trace, b'abc'), b'abc')
+        self.assertEqual(list(count_sent(trace, iter([b'ab', b'c']))), [
+            b'ab', b'c'
+        ])
+        self.assertEqual(trace.bytes_sent, 6)
+
+
+class TestClientTracing(unittest.TestCase):
+
+    def traced(self, **server_kwargs):
+        server = MockHoundServer(partial_transcripts=['what'], **server_kwargs)
+        server.start()
+        self.addCleanup(server.stop)
+        client = server.client()
+
+        traces = []
+        with tracing(traces.append):
+            res = client.text('hello')
+            events = list(client.stream_speech(b'\0' * 100))
+        self.assertEqual(len(events), 2)
+        return res, traces
+
+    def test_bytes_received(self):
+        # chunked, as Houndify answers
+        res, (text, stream) = self.traced(compress=False)
+        self.assertEqual(text.bytes_received, len(res.content))
+        self.assertGreater(stream.bytes_received, len(res.content))
+
+    def test_bytes_received_compressed(self):
+        res, (text, stream) = self.traced()
+        # as sent, rather than decoded
+        self.assertGreater(text.bytes_received, 0)
+        self.assertNotEqual(text.bytes_received, len(res.content))
+        self.assertGreater(stream.bytes_received, 0)
+
+    def test_bytes_received_not_chunked(self):
+        res, (text, _) = self.traced(compress=False, chunked=False)
+        self.assertEqual(text.bytes_received, len(res.content))
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_histogram(self):
+        histogram = Histogram((1, 2, 3))
+        for value in (0.5, 1, 1.5, 2.5, 10):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.cumulative(), [
+            (1, 2), (2, 3), (3, 4), (float('inf'), 5)
+        ])
+        self.assertEqual(histogram.quantile(0.5), 2)
+        self.assertEqual(histogram.quantile(1), float('inf'))
+        self.assertIsNone(Histogram().quantile(0.5))
+
+    def test_exporter(self):
+        exporter = HistogramExporter()
+        trace = Trace('url')
+        trace.add('send', 0.003)
+        trace.reused_connection = True
+        trace.bytes_received = 10
+        trace.finish()
+        exporter(trace)
+
+        snapshot = exporter.snapshot()
+        self.assertEqual(snapshot['counters']['requests'], 1)
+        self.assertEqual(snapshot['counters']['reused_connections'], 1)
+        self.assertEqual(snapshot['counters']['bytes_received'], 10)
+        self.assertEqual(snapshot['histograms']['send']['count'], 1)
+        self.assertEqual(set(snapshot['histograms']), {'send', 'total'})
+
+
+if __name__ == '__main__':
+    unittest.main()